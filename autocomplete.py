@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from heapq import nlargest
+from typing import Dict, List, Optional, Tuple
+
+from shared_state import IndexFeed
+from text_match import tokenize
+
+
+# Most suggestions returned, and kept per cached prefix
+SUGGESTION_LIMIT = 10
+
+# Prefixes matching more entries than this have their suggestions cached
+HOT_PREFIX_ENTRIES = 64
+
+# Cached prefixes kept before the cache is emptied
+MAX_CACHED_PREFIXES = 20000
+
+# Popularity added to tracked views so featured listings win ties
+PREMIUM_WEIGHT = 0.5
+VERIFIED_WEIGHT = 0.25
+
+# Separates the normalized key from the business id in an entry
+SEPARATOR = '\x00'
+
+
+def completion_key(text: Optional[str]) -> str:
+    return ' '.join(tokenize(text or ''))
+
+
+class Autocomplete:
+    """Business name and BI ID completion from a sorted array of keys.
+
+    Every business has entries for its normalized name from each word on
+    ("kilimanjaro coffee house", "coffee house", "house") and for its
+    BI ID, kept sorted so a prefix is two binary searches. Suggestions
+    are ordered by popularity: tracked views plus small premium/verified
+    weights. Short, common prefixes match many entries, so their top
+    SUGGESTION_LIMIT are cached; a view only re-sorts the cached lists
+    of that business's own prefixes instead of dropping them.
+    """
+
+    def __init__(self):
+        self.entries: List[str] = []
+        self.unsorted = False  # Entries were appended since the last sort
+        self.keys: Dict[str, List[str]] = {}
+        self.labels: Dict[str, Tuple[str, str]] = {}  # id -> (name, bi_id)
+        self.boosts: Dict[str, float] = {}
+        self.views: Dict[str, int] = {}
+        self.cache: Dict[str, List[str]] = {}
+        self.business_feed = IndexFeed(self.set_business, self.clear_businesses)
+        self.event_feed = IndexFeed(self.set_events, self.clear_events)
+
+    def rank(self, biz_id: str) -> tuple:
+        # Shorter names first among equally popular businesses
+        return self.views.get(biz_id, 0) + self.boosts[biz_id], -len(self.labels[biz_id][0])
+
+    def sorted_entries(self) -> List[str]:
+        # Sorting once after a bulk load is far cheaper than an insort per entry
+        if self.unsorted:
+            self.entries.sort()
+            self.unsorted = False
+        return self.entries
+
+    def set_business(self, biz_id: str, biz):
+        """Add, replace or remove (biz None) a business's entries"""
+        for key in self.keys.pop(biz_id, []):
+            self.sorted_entries()
+            entry = f"{key}{SEPARATOR}{biz_id}"
+            index = bisect_left(self.entries, entry)
+            if index < len(self.entries) and self.entries[index] == entry:
+                del self.entries[index]
+            self.forget_prefixes(key)
+        self.labels.pop(biz_id, None)
+        self.boosts.pop(biz_id, None)
+        if biz is None:
+            return
+
+        words = completion_key(biz.name).split()
+        keys = {' '.join(words[start:]) for start in range(len(words))}
+        keys.add(completion_key(biz.bi_id))
+        keys.discard('')
+        self.keys[biz_id] = sorted(keys)
+        self.labels[biz_id] = (biz.name, biz.bi_id)
+        self.boosts[biz_id] = PREMIUM_WEIGHT * bool(biz.premium) + VERIFIED_WEIGHT * bool(biz.verified)
+        for key in keys:
+            self.entries.append(f"{key}{SEPARATOR}{biz_id}")
+            self.forget_prefixes(key)
+        self.unsorted = True
+
+    def set_events(self, biz_id: str, rows: Optional[List[Dict]]):
+        views = sum(row['count'] for row in rows or [] if row['action'] == 'view')
+        previous = self.views.get(biz_id, 0)
+        if views == previous:
+            return
+        if views:
+            self.views[biz_id] = views
+        else:
+            self.views.pop(biz_id, None)
+        if biz_id not in self.labels:
+            return
+
+        rank = self.rank(biz_id)
+        for key in self.keys[biz_id]:
+            for end in range(1, len(key) + 1):
+                cached = self.cache.get(key[:end])
+                if cached is None:
+                    continue
+                if views < previous and biz_id in cached:
+                    # Something outside the list may now outrank it
+                    del self.cache[key[:end]]
+                elif biz_id in cached or len(cached) < SUGGESTION_LIMIT or rank > self.rank(cached[-1]):
+                    if biz_id not in cached:
+                        cached.append(biz_id)
+                    cached.sort(key=self.rank, reverse=True)
+                    del cached[SUGGESTION_LIMIT:]
+
+    def clear_businesses(self):
+        self.entries = []
+        self.unsorted = False
+        self.keys = {}
+        self.labels = {}
+        self.boosts = {}
+        self.cache = {}
+
+    def clear_events(self):
+        self.views = {}
+        self.cache = {}
+
+    def forget_prefixes(self, key: str):
+        if not self.cache:
+            return
+        for end in range(1, len(key) + 1):
+            self.cache.pop(key[:end], None)
+
+    def feeds(self) -> Dict[str, IndexFeed]:
+        """SharedState indexes for the collections suggestions are built from"""
+        return {'businesses': self.business_feed, 'events': self.event_feed}
+
+    def suggest(self, text: str, limit: int = SUGGESTION_LIMIT) -> List[Dict]:
+        """Businesses whose name or BI ID has a word starting with text, most popular first"""
+        prefix = completion_key(text)
+        if not prefix:
+            return []
+        limit = min(limit, SUGGESTION_LIMIT)
+
+        ids = self.cache.get(prefix)
+        if ids is None:
+            entries = self.sorted_entries()
+            start = bisect_left(entries, prefix)
+            end = bisect_left(entries, prefix + '\U0010ffff', start)
+            matches = {entry.rsplit(SEPARATOR, 1)[1] for entry in entries[start:end]}
+            ids = nlargest(SUGGESTION_LIMIT, matches, key=self.rank)
+            if end - start > HOT_PREFIX_ENTRIES:
+                if len(self.cache) >= MAX_CACHED_PREFIXES:
+                    self.cache = {}
+                self.cache[prefix] = ids
+        return [
+            {'id': biz_id, 'name': self.labels[biz_id][0], 'bi_id': self.labels[biz_id][1]}
+            for biz_id in ids[:limit]
+        ]
+
+    def get_stats(self) -> Dict:
+        return {'businesses': len(self.keys), 'entries': len(self.entries), 'cached_prefixes': len(self.cache)}
@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import uuid4
+
+from database import Database
+
+
+# Directory holding archive segments, relative like the default database path
+ARCHIVE_DIR = "crawl_archive"
+
+# A new segment file is started once the current one reaches this size
+SEGMENT_MAX_BYTES = 512 * 1024 * 1024
+
+# Oldest segments are deleted once the archive grows past this size
+ARCHIVE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+
+class PageArchive:
+    """Append-only archive of fetched pages in WARC-style gzip segments.
+
+    Every page is written as a WARC "resource" record compressed into its
+    own gzip member, so a record can be read back from its segment, offset
+    and length alone. Those are indexed in the crawl_archive table. Each
+    archive writes its own segments, so crawl workers never share a file.
+    Whenever a segment is started, the oldest ones are deleted until the
+    archive fits in max_bytes again.
+    """
+
+    def __init__(self, database: Database, directory: str = ARCHIVE_DIR,
+                 segment_max_bytes: int = SEGMENT_MAX_BYTES, max_bytes: int = ARCHIVE_MAX_BYTES):
+        self.db = database
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.max_bytes = max_bytes
+        self.segment: Optional[str] = None
+        self.segment_count = 0
+        # Keeps segments of two archives in one process apart
+        self.token = uuid4().hex[:6]
+        self.lock = threading.Lock()
+
+    def new_segment_name(self) -> str:
+        self.segment_count += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        return f"pages-{stamp}-{os.getpid()}-{self.token}-{self.segment_count:05d}.warc.gz"
+
+    @staticmethod
+    def build_record(url: str, target_name: str, html: str, archived_at: datetime) -> bytes:
+        payload = html.encode("utf-8")
+        headers = [
+            "WARC/1.1",
+            "WARC-Type: resource",
+            f"WARC-Record-ID: <urn:uuid:{uuid4()}>",
+            f"WARC-Date: {archived_at.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            f"WARC-Target-URI: {url}",
+            f"WARC-Block-Digest: sha256:{hashlib.sha256(payload).hexdigest()}",
+            f"BizIntel-Target: {target_name}",
+            "Content-Type: text/html; charset=utf-8",
+            f"Content-Length: {len(payload)}",
+        ]
+        record = "\r\n".join(headers).encode("utf-8") + b"\r\n\r\n" + payload + b"\r\n\r\n"
+        return gzip.compress(record, compresslevel=6)
+
+    def append(self, url: str, target_name: str, html: str, content_hash: Optional[str] = None) -> Dict:
+        """Archive a page and index it; safe to call from several threads"""
+        archived_at = datetime.now(timezone.utc)
+        member = self.build_record(url, target_name, html, archived_at)
+
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, self.segment) if self.segment else None
+            if path is None or os.path.getsize(path) >= self.segment_max_bytes:
+                self.prune(len(member))
+                self.segment = self.new_segment_name()
+                path = os.path.join(self.directory, self.segment)
+            segment = self.segment
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(member)
+
+        entry = {
+            "url": url,
+            "target_name": target_name,
+            "segment": segment,
+            "offset": offset,
+            "length": len(member),
+            "content_hash": content_hash,
+            "archived_at": archived_at.isoformat(),
+        }
+        self.db.add_archive_entry(entry)
+        return entry
+
+    def prune(self, incoming: int = 0) -> list:
+        """Delete the oldest segments until the archive plus incoming bytes fits in max_bytes"""
+        segments = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".warc.gz"):
+                stat = os.stat(os.path.join(self.directory, name))
+                segments.append((stat.st_mtime, name, stat.st_size))
+        segments.sort()
+        total = incoming + sum(size for _, _, size in segments)
+        deleted = []
+        for _, name, size in segments:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # Pruned by another archive meanwhile
+            total -= size
+            deleted.append(name)
+        if deleted:
+            self.db.delete_archive_segments(deleted)
+        return deleted
+
+    @staticmethod
+    def parse_record(data: bytes) -> Tuple[Dict[str, str], str]:
+        """Split a decompressed record into its headers and page"""
+        head, _, rest = data.partition(b"\r\n\r\n")
+        headers = {}
+        for line in head.decode("utf-8").split("\r\n")[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip()] = value.strip()
+        length = int(headers.get("Content-Length", len(rest)))
+        return headers, rest[:length].decode("utf-8", errors="replace")
+
+    def read(self, segment: str, offset: int, length: int) -> Tuple[Dict[str, str], str]:
+        """Read one record back by its index entry"""
+        with open(os.path.join(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            return self.parse_record(gzip.decompress(f.read(length)))
+
+    def iter_latest(self, target_name: Optional[str] = None) -> Iterator[Tuple[Dict, str]]:
+        """Yield (index entry, html) for the newest copy of every archived URL.
+
+        Records are read in segment and offset order, so the files are
+        scanned front to back with one open handle per segment.
+        """
+        handle, open_segment = None, None
+        try:
+            for entry in self.db.get_archive_entries(target_name):
+                if entry["segment"] != open_segment:
+                    if handle:
+                        handle.close()
+                    path = os.path.join(self.directory, entry["segment"])
+                    if not os.path.exists(path):
+                        handle, open_segment = None, None
+                        continue
+                    handle, open_segment = open(path, "rb"), entry["segment"]
+                handle.seek(entry["offset"])
+                _, html = self.parse_record(gzip.decompress(handle.read(entry["length"])))
+                yield entry, html
+        finally:
+            if handle:
+                handle.close()
@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from aiohttp import web
+
+
+# Businesses listed on every synthetic directory page
+BUSINESSES_PER_PAGE = 5
+
+# crawl_site is a thin wrapper over EnhancedCrawler, so the engine is the only path measured
+SCENARIOS = ['engine']
+
+# Seconds between checks that a scenario process is still alive
+POLL_SECONDS = 1.0
+
+# Seconds the synthetic site may take to start answering
+SERVER_START_TIMEOUT = 30
+
+
+def business_markup(page: int, index: int, style: str) -> str:
+    name = f"Benchmark Business {page}-{index}"
+    if style == 'json-ld':
+        data = {
+            "@type": "LocalBusiness",
+            "name": name,
+            "description": "Retail",
+            "address": {"addressLocality": "Dar es Salaam"}
+        }
+        return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+    if style == 'microdata':
+        return (
+            f'<div itemscope itemtype="https://schema.org/LocalBusiness">'
+            f'<span itemprop="name">{name}</span><span itemprop="address">Arusha</span></div>'
+        )
+    return (
+        f'<div class="listing"><h3 class="business-name" data-biz-name="{name}">{name}</h3>'
+        f'<span class="location">Mwanza</span><span class="category">Services</span></div>'
+    )
+
+
+def directory_page(page: int, options: Dict) -> str:
+    """Deterministic listing page with businesses and links to other pages"""
+    rng = random.Random(page)
+    total = options['pages']
+    # The next page is always linked so every page is reachable
+    targets = [(page + 1) % total] + [rng.randrange(total) for _ in range(options['fanout'] - 1)]
+    links = ''.join(f'<li><a href="/listing/{t}">Listing {t}</a></li>' for t in targets)
+
+    listings = []
+    for index in range(BUSINESSES_PER_PAGE):
+        roll = rng.random()
+        if roll < options['jsonld']:
+            style = 'json-ld'
+        elif roll < options['jsonld'] + options['microdata']:
+            style = 'microdata'
+        else:
+            style = 'css'
+        listings.append(business_markup(page, index, style))
+
+    padding = '<p>' + 'Lorem ipsum dolor sit amet. ' * options['padding'] + '</p>'
+    return (
+        f'<html><head><title>Directory page {page}</title></head><body>'
+        f'{"".join(listings)}{padding}<ul>{links}</ul></body></html>'
+    )
+
+
+def make_site(options: Dict, token: str = '') -> web.Application:
+    """Synthetic business directory with injected latency and errors.
+
+    /ready answers with token, so the benchmark can tell its own server
+    from anything else listening on the port.
+    """
+    rng = random.Random(options['seed'])
+
+    async def listing(request):
+        delay = options['latency_ms'] + rng.uniform(-1, 1) * options['jitter_ms']
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if rng.random() < options['error_rate']:
+            return web.Response(status=503, text='Injected error')
+        page = int(request.match_info.get('page', 0))
+        if page >= options['pages']:
+            raise web.HTTPNotFound()
+        return web.Response(text=directory_page(page, options), content_type='text/html')
+
+    async def robots(request):
+        return web.Response(text='User-agent: *\nAllow: /\n', content_type='text/plain')
+
+    async def ready(request):
+        return web.Response(text=token, content_type='text/plain')
+
+    app = web.Application()
+    app.router.add_get('/robots.txt', robots)
+    app.router.add_get('/ready', ready)
+    app.router.add_get('/', listing)
+    app.router.add_get('/listing/{page}', listing)
+    return app
+
+
+def serve(options: Dict, port: int, token: str = ''):
+    """Run the synthetic site until the process is terminated"""
+    web.run_app(make_site(options, token), host='127.0.0.1', port=port, print=None, access_log=None)
+
+
+def wait_for_server(process: multiprocessing.Process, base_url: str, token: str,
+                    timeout: float = SERVER_START_TIMEOUT) -> Optional[str]:
+    """Poll the synthetic site until it answers; returns an error if it never does"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if not process.is_alive():
+            return f"site exited with code {process.exitcode} (is {base_url} already in use?)"
+        try:
+            with urllib.request.urlopen(base_url + '/ready', timeout=POLL_SECONDS) as response:
+                if response.read().decode() == token:
+                    return None
+                return f"another server is answering on {base_url}"
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            return f"site did not start within {timeout:g} seconds"
+        time.sleep(0.1)
+
+
+def resource_usage() -> Dict:
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'cpu_seconds': own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime,
+        # ru_maxrss is in KiB on Linux and bytes on macOS
+        'peak_rss_mb': max(own.ru_maxrss, children.ru_maxrss) / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    }
+
+
+def run_scenario(scenario: str, base_url: str, options: Dict, results):
+    """Crawl the site once in a fresh process and report throughput and resource use"""
+    # Imported here so each scenario process starts from a clean crawler state
+    import crawler_engine
+    from crawl_metrics import crawl_metrics
+    from database import Database
+
+    workdir = tempfile.mkdtemp(prefix='bizintel-bench-')
+    os.chdir(workdir)  # Keeps the page archive out of the source tree
+    try:
+        db = Database(os.path.join(workdir, 'bench.db'))
+        if options['extraction_workers'] is not None:
+            crawler_engine.EXTRACTION_WORKERS = options['extraction_workers']
+
+        target = crawler_engine.CrawlTarget(
+            name='benchmark',
+            start_urls=[base_url + '/'],
+            allowed_domains=['127.0.0.1'],
+            max_depth=options['pages'],
+            max_pages=options['max_pages'],
+            delay_range=(0, 0)
+        )
+
+        async def crawl():
+            async with crawler_engine.EnhancedCrawler(db) as crawler:
+                return await crawler.crawl_target(target)
+
+        started = time.perf_counter()
+        stored = asyncio.run(crawl()).businesses_found
+        elapsed = time.perf_counter() - started
+
+        # Waits for the extraction workers so their CPU time is counted
+        crawler_engine.shutdown_extraction_pool(wait=True)
+    finally:
+        os.chdir(tempfile.gettempdir())
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    usage = resource_usage()
+    metrics = crawl_metrics.snapshot()
+    pages, businesses = metrics['pages_total'], metrics['businesses_total']
+    results.put({
+        'scenario': scenario,
+        'pages': pages,
+        'businesses': businesses,
+        'businesses_stored': stored,
+        'wall_seconds': round(elapsed, 3),
+        'pages_per_second': round(pages / elapsed, 2) if elapsed else None,
+        'businesses_per_second': round(businesses / elapsed, 2) if elapsed else None,
+        'cpu_seconds': round(usage['cpu_seconds'], 3),
+        'peak_rss_mb': round(usage['peak_rss_mb'], 1),
+        'stage_avg_seconds': {stage: data['avg_seconds'] for stage, data in metrics['stages'].items()}
+    })
+
+
+def wait_for_result(process: multiprocessing.Process, results, timeout: float) -> Dict:
+    """The result a scenario process reports, or an error if it dies or runs too long"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return results.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            try:
+                # The result may have been sent just before the process exited
+                return results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                return {'error': f"scenario process exited with code {process.exitcode} without a result"}
+        if time.monotonic() > deadline:
+            process.terminate()
+            return {'error': f"scenario did not finish within {timeout:g} seconds"}
+
+
+def compare(results: List[Dict], baseline: Dict) -> List[str]:
+    """Describe throughput changes against a previous benchmark run"""
+    previous = {r['scenario']: r for r in baseline.get('results', [])}
+    lines = []
+    for result in results:
+        before = previous.get(result['scenario'])
+        if not before:
+            continue
+        for metric in ('pages_per_second', 'businesses_per_second', 'cpu_seconds', 'peak_rss_mb'):
+            old, new = before.get(metric), result.get(metric)
+            if old and new is not None:
+                lines.append(f"{result['scenario']:>10} {metric:<22} {old:>10} -> {new:<10} ({(new - old) / old:+.1%})")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline crawler throughput benchmark")
+    parser.add_argument("--pages", type=int, default=500, help="pages in the synthetic directory")
+    parser.add_argument("--max-pages", type=int, default=None, help="pages to crawl (default: all)")
+    parser.add_argument("--fanout", type=int, default=5, help="links per page")
+    parser.add_argument("--jsonld", type=float, default=0.3, help="share of businesses as JSON-LD")
+    parser.add_argument("--microdata", type=float, default=0.3, help="share of businesses as microdata")
+    parser.add_argument("--padding", type=int, default=200, help="filler sentences per page")
+    parser.add_argument("--latency-ms", type=float, default=20, help="server response latency")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="random latency variation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--seed", type=int, default=1, help="seed for latency and error injection")
+    parser.add_argument("--extraction-workers", type=int, default=None, help="parser processes")
+    parser.add_argument("--timeout", type=float, default=1800, help="seconds a scenario may run")
+    parser.add_argument("--port", type=int, default=8899, help="port of the synthetic site")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to save the results")
+    parser.add_argument("--baseline", default=None, help="previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    options = {
+        'pages': args.pages,
+        'max_pages': args.max_pages or args.pages,
+        'fanout': max(1, args.fanout),
+        'jsonld': args.jsonld,
+        'microdata': args.microdata,
+        'padding': args.padding,
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'seed': args.seed,
+        'extraction_workers': args.extraction_workers
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    context = multiprocessing.get_context("spawn")
+    token = uuid4().hex
+    server = context.Process(target=serve, args=(options, args.port, token), daemon=True)
+    server.start()
+    error = wait_for_server(server, base_url, token)
+    if error:
+        print(f"Could not start the synthetic site: {error}", file=sys.stderr)
+        server.terminate()
+        server.join()
+        return 1
+
+    results = []
+    failed = False
+    try:
+        for scenario in SCENARIOS:
+            result_queue = context.Queue()
+            process = context.Process(target=run_scenario, args=(scenario, base_url, options, result_queue))
+            process.start()
+            result = wait_for_result(process, result_queue, args.timeout)
+            process.join()
+            if 'error' in result:
+                failed = True
+                result = {'scenario': scenario, **result}
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.terminate()
+        server.join()
+
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'options': options,
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('options') != options:
+            print("Note: the baseline was run with different options")
+        for line in compare(results, baseline):
+            print(line)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,218 @@
+import codecs
+import json
+import re
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+import soupsieve
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+
+# Classes looked up next to a matched element, in the order they are tried
+CONTEXT_CLASSES = {
+    'region': {'location', 'address', 'region'},
+    'sector': {'category', 'sector', 'type'},
+    'contact': {'phone', 'email', 'contact'},
+}
+
+STRUCTURED_TYPES = ['LocalBusiness', 'Organization', 'Corporation']
+
+_compiled_selectors: Dict[str, soupsieve.SoupSieve] = {}
+
+# <meta charset> must appear within the first 1024 bytes of a document
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+SNIFF_BYTES = 1024
+
+
+def sniff_charset(header_charset: Optional[str], head: bytes) -> str:
+    """Pick a page's encoding from a byte-order mark, the Content-Type charset or a <meta> tag.
+    
+    Only the first bytes of the body are inspected, so detection never
+    needs another copy of the page. Falls back to UTF-8.
+    """
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    candidates = [header_charset]
+    match = _META_CHARSET.search(head[:SNIFF_BYTES])
+    if match:
+        candidates.append(match.group(1).decode('ascii', 'ignore'))
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            return codecs.lookup(candidate.strip()).name
+        except LookupError:
+            continue
+    return 'utf-8'
+
+
+def compile_selector(selector: str) -> soupsieve.SoupSieve:
+    """Compile a CSS selector (or comma-joined selector list) once and reuse it"""
+    compiled = _compiled_selectors.get(selector)
+    if compiled is None:
+        compiled = soupsieve.compile(selector)
+        _compiled_selectors[selector] = compiled
+    return compiled
+
+
+def match_selectors(soup: BeautifulSoup, selectors: List[str]) -> Dict[int, str]:
+    """Map each matched element to the first selector that matches it.
+
+    All selectors are evaluated together in one pass over the tree; only the
+    (few) matched elements are then checked against individual selectors.
+    """
+    if not selectors:
+        return {}
+    matches = {}
+    for element in compile_selector(', '.join(selectors)).select(soup):
+        for selector in selectors:
+            if compile_selector(selector).match(element):
+                matches[id(element)] = selector
+                break
+    return matches
+
+
+def find_context(parent: Optional[Tag]) -> Dict[str, str]:
+    """Collect region/sector/contact text from a parent in a single walk"""
+    context = {}
+    if parent is None:
+        return context
+
+    for tag in parent.descendants:
+        if not isinstance(tag, Tag):
+            continue
+        classes = tag.get('class')
+        if not classes:
+            continue
+        for field, wanted in CONTEXT_CLASSES.items():
+            if field not in context and wanted.intersection(classes):
+                context[field] = tag.get_text(strip=True)
+        if len(context) == len(CONTEXT_CLASSES):
+            break
+
+    return context
+
+
+def parse_json_ld(url: str, text: Optional[str]) -> List[Dict]:
+    """Extract businesses from a JSON-LD script body"""
+    try:
+        data = json.loads(text or '')
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+    items = data if isinstance(data, list) else [data]
+    businesses = []
+    for item in items:
+        if not isinstance(item, dict) or item.get('@type') not in STRUCTURED_TYPES:
+            continue
+        address = item.get('address')
+        business = {
+            'name': item.get('name', ''),
+            'region': address.get('addressLocality', '') if isinstance(address, dict) else '',
+            'sector': item.get('description', ''),
+            'source_url': url,
+            'extraction_method': 'json-ld'
+        }
+        geo = item.get('geo')
+        if isinstance(geo, dict):
+            try:
+                business['latitude'] = float(geo['latitude'])
+                business['longitude'] = float(geo['longitude'])
+            except (KeyError, TypeError, ValueError):
+                business.pop('latitude', None)
+        if business['name']:
+            businesses.append(business)
+    return businesses
+
+
+def parse_page(url: str, html: str, selectors: List[str]) -> Dict:
+    """Parse a page once and return its outgoing links and extracted businesses.
+
+    The tree is built a single time (with lxml when it is installed) and
+    walked once, collecting links, selector matches, JSON-LD and microdata
+    as each tag is visited. Parse and extraction times are returned in
+    'timings' and the number of elements each selector matched in
+    'selector_hits', so the crawler can record them.
+    """
+    started = time.perf_counter()
+    soup = BeautifulSoup(html, HTML_PARSER)
+    parsed = time.perf_counter()
+    matched = match_selectors(soup, selectors)
+    context_cache = {}
+
+    links = []
+    businesses = []
+    structured = []
+
+    for tag in soup.descendants:
+        if not isinstance(tag, Tag):
+            continue
+
+        if tag.name == 'a':
+            href = tag.get('href')
+            if href:
+                links.append(urljoin(url, href))
+
+        elif tag.name == 'script' and tag.get('type') == 'application/ld+json':
+            structured.extend(parse_json_ld(url, tag.string))
+            continue
+
+        itemtype = tag.get('itemtype')
+        if itemtype and ('LocalBusiness' in itemtype or 'Organization' in itemtype):
+            name_elem = tag.find(attrs={'itemprop': 'name'})
+            if name_elem:
+                business = {
+                    'name': name_elem.get_text(strip=True),
+                    'source_url': url,
+                    'extraction_method': 'microdata'
+                }
+                address_elem = tag.find(attrs={'itemprop': 'address'})
+                if address_elem:
+                    business['region'] = address_elem.get_text(strip=True)
+                structured.append(business)
+
+        selector = matched.get(id(tag))
+        if selector is None:
+            continue
+
+        name = (
+            tag.get('data-biz-name') or
+            tag.get_text(strip=True) or
+            tag.get('title') or
+            tag.get('alt')
+        )
+        if name and len(name.strip()) > 2:
+            parent = tag.parent
+            key = id(parent)
+            if key not in context_cache:
+                context_cache[key] = find_context(parent)
+
+            business = {
+                'name': name.strip(),
+                'source_url': url,
+                'extraction_method': selector
+            }
+            business.update(context_cache[key])
+            businesses.append(business)
+
+    businesses.extend(structured)
+    timings = {'parse': parsed - started, 'extract': time.perf_counter() - parsed}
+    selector_hits = {}
+    for selector in matched.values():
+        selector_hits[selector] = selector_hits.get(selector, 0) + 1
+    return {
+        'links': links,
+        'businesses': businesses,
+        'timings': timings,
+        'selector_hits': selector_hits
+    }
@@ -0,0 +1,117 @@
+import hashlib
+import math
+import struct
+from typing import Iterable, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+
+# Query parameters that only carry tracking/session information and never
+# change the page that is served
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_ga', '_gl', 'phpsessid', 'jsessionid', 'sessionid'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """Normalize a URL so that equivalent links map to the same string.
+
+    Fragments and tracking parameters are dropped, query parameters are
+    sorted, the scheme and host are lowercased, default ports and trailing
+    slashes are removed. Returns None for non-HTTP(S) links.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname.lower().rstrip('.')
+    if port and port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    query_pairs = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(query_pairs))
+
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of URLs.
+
+    Memory is fixed up front from the expected capacity and false positive
+    rate, so it stays bounded no matter how many URLs are added. A false
+    positive only means a URL is treated as already seen, but the rate
+    only holds up to capacity; past it, see is_full().
+    """
+
+    HEADER = struct.Struct('>QIQQ')  # bit count, hash count, items added, capacity
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.0001,
+                 num_bits: Optional[int] = None, num_hashes: Optional[int] = None):
+        if num_bits is None:
+            num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        if num_hashes is None:
+            num_hashes = max(1, round(num_bits / max(capacity, 1) * math.log(2)))
+        self.capacity = capacity
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = 0
+        self.bits = bytearray((num_bits + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('>QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> bool:
+        """Add an item, returning True if it was not present before"""
+        added = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not self.bits[byte] & mask:
+                self.bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def is_full(self, headroom: int = 0) -> bool:
+        """Whether adding headroom more items would take the filter past its capacity"""
+        return self.count + headroom > self.capacity
+
+    def to_bytes(self) -> bytes:
+        """Serialize the filter for persistence"""
+        header = self.HEADER.pack(self.num_bits, self.num_hashes, self.count, self.capacity)
+        return header + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BloomFilter':
+        """Restore a filter produced by to_bytes"""
+        num_bits, num_hashes, count, capacity = cls.HEADER.unpack_from(data)
+        bloom = cls(capacity=capacity, num_bits=num_bits, num_hashes=num_hashes)
+        bloom.bits = bytearray(data[cls.HEADER.size:cls.HEADER.size + (num_bits + 7) // 8])
+        bloom.count = count
+        return bloom
@@ -0,0 +1,135 @@
+import time
+from typing import Dict, Optional
+
+import aiohttp
+
+from crawl_metrics import CrawlMetrics, crawl_metrics
+from crawl_throttle import RobotsCache
+
+
+USER_AGENT = 'BizIntelTZ-Crawler/1.0 (+https://bizinteltz.com/crawler)'
+
+# Open connections across all hosts
+CONNECTION_LIMIT = 100
+
+# Open connections per host, in line with HostThrottle's concurrency cap
+CONNECTIONS_PER_HOST = 8
+
+# Seconds a resolved address is reused before it is looked up again
+DNS_CACHE_TTL = 300
+
+# Seconds an idle keep-alive connection is kept open for reuse
+KEEPALIVE_TIMEOUT = 30
+
+# Total seconds allowed for one request
+REQUEST_TIMEOUT = 30
+
+
+def accept_encoding() -> str:
+    """Compressions aiohttp can decode here; brotli needs an extra package"""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+        except ImportError:
+            return 'gzip, deflate'
+    return 'gzip, deflate, br'
+
+
+class HttpClient:
+    """Long-lived HTTP session shared by the crawls of one event loop.
+
+    Keeps one tuned connector so keep-alive sockets, TLS sessions and DNS
+    answers outlive individual crawls, as does the robots.txt cache.
+    Connection reuse, DNS cache hits and waits for a free connection are
+    counted in the crawl metrics.
+    """
+
+    def __init__(self, metrics: Optional[CrawlMetrics] = None,
+                 limit: int = CONNECTION_LIMIT, limit_per_host: int = CONNECTIONS_PER_HOST,
+                 dns_cache_ttl: int = DNS_CACHE_TTL, keepalive_timeout: float = KEEPALIVE_TIMEOUT):
+        self.metrics = metrics or crawl_metrics
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.robots: Optional[RobotsCache] = None
+        self.created_at: Optional[float] = None
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Time DNS lookups and connection setup, and count connection reuse"""
+        async def start(session, context, params):
+            context.started = time.monotonic()
+
+        def finish(stage: str):
+            async def callback(session, context, params):
+                if getattr(context, 'started', None) is not None:
+                    self.metrics.observe(stage, time.monotonic() - context.started)
+            return callback
+
+        def count(event: str):
+            async def callback(session, context, params):
+                self.metrics.record_connection(event)
+            return callback
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_dns_resolvehost_start.append(start)
+        trace_config.on_dns_resolvehost_end.append(finish('dns'))
+        trace_config.on_connection_create_start.append(start)
+        trace_config.on_connection_create_end.append(finish('connect'))
+        trace_config.on_connection_create_end.append(count('created'))
+        trace_config.on_connection_reuseconn.append(count('reused'))
+        trace_config.on_connection_queued_start.append(count('queued'))
+        trace_config.on_dns_cache_hit.append(count('dns_cache_hit'))
+        trace_config.on_dns_cache_miss.append(count('dns_cache_miss'))
+        return trace_config
+
+    async def start(self) -> aiohttp.ClientSession:
+        """Open the session on the running loop, or return the open one"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                headers={
+                    'User-Agent': USER_AGENT,
+                    'Accept-Encoding': accept_encoding()
+                },
+                auto_decompress=True,
+                trace_configs=[self.trace_config()]
+            )
+            self.robots = RobotsCache(self.session, USER_AGENT)
+            self.created_at = time.monotonic()
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def get_stats(self) -> Dict:
+        """Connector settings and how long the session has been open"""
+        return {
+            'open': self.session is not None and not self.session.closed,
+            'robots_hosts': len(self.robots.parsers) if self.robots else 0,
+            'age_seconds': round(time.monotonic() - self.created_at, 1) if self.created_at else None,
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'dns_cache_ttl': self.dns_cache_ttl,
+            'keepalive_timeout': self.keepalive_timeout
+        }
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
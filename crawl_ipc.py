@@ -0,0 +1,271 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# "inprocess" runs the crawler inside the API process; "process" runs it as a
+# supervised child process that the API talks to over a Unix socket
+CRAWLER_MODE = os.environ.get("BIZINTEL_CRAWLER_MODE", "inprocess")
+
+# Unix socket the crawler service listens on, relative like the database path
+SOCKET_PATH = os.environ.get("BIZINTEL_CRAWLER_SOCKET", "crawler.sock")
+
+# Largest reply read from the service
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+# Seconds allowed for one request to the service
+REQUEST_TIMEOUT = 30
+
+# Seconds a request waits for a service process that is still starting
+SERVICE_START_TIMEOUT = 10
+
+# Exit code of a service that found another one already serving the socket
+EXIT_ALREADY_RUNNING = 3
+
+# Seconds between checks that a service run by another process is still there
+EXTERNAL_POLL_SECONDS = 5.0
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+# Most pages a one-off crawl (POST /crawl) may visit
+MAX_ADHOC_PAGES = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlerServiceError(Exception):
+    """A crawler command failed; status is the matching HTTP status code"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def encode_message(message: Dict) -> bytes:
+    return json.dumps(message, default=str).encode("utf-8") + b"\n"
+
+
+class LocalBackend:
+    """Runs crawler commands against the scheduler in this process"""
+
+    mode = "inprocess"
+
+    def __init__(self):
+        self.commands = None
+
+    def get_commands(self):
+        if self.commands is None:
+            # Imported on first use so the API starts without the crawler loaded
+            from crawl_service import CrawlerCommands
+            from crawler_engine import get_crawler_scheduler
+            self.commands = CrawlerCommands(get_crawler_scheduler())
+        return self.commands
+
+    async def call(self, op: str, **params) -> Any:
+        return await self.get_commands().dispatch(op, params)
+
+    def start(self):
+        from crawler_engine import start_crawler_service
+        start_crawler_service()
+
+    def stop(self):
+        # Nothing to stop if the crawler was never loaded
+        if "crawler_engine" in sys.modules:
+            from crawler_engine import stop_crawler_service
+            stop_crawler_service()
+
+    def get_status(self) -> Dict:
+        return {"mode": self.mode}
+
+
+class ProcessBackend:
+    """Sends crawler commands to the crawler service process over its socket"""
+
+    mode = "process"
+
+    def __init__(self, socket_path: str = SOCKET_PATH):
+        self.socket_path = socket_path
+        self.supervisor = CrawlerSupervisor(socket_path)
+
+    async def connect(self):
+        deadline = time.monotonic() + SERVICE_START_TIMEOUT
+        while True:
+            try:
+                return await asyncio.wait_for(
+                    asyncio.open_unix_connection(self.socket_path, limit=MAX_MESSAGE_BYTES),
+                    REQUEST_TIMEOUT
+                )
+            except (OSError, asyncio.TimeoutError):
+                # A service process that is still starting has not bound the socket yet
+                if not self.supervisor.process_running() or time.monotonic() >= deadline:
+                    raise CrawlerServiceError(503, "Crawler service is not running")
+                await asyncio.sleep(0.1)
+
+    async def call(self, op: str, **params) -> Any:
+        reader, writer = await self.connect()
+        try:
+            writer.write(encode_message({"op": op, "params": params}))
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            raise CrawlerServiceError(503, f"Crawler service did not answer: {str(e)}")
+        finally:
+            writer.close()
+
+        if not line:
+            raise CrawlerServiceError(503, "Crawler service closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise CrawlerServiceError(reply.get("status", 500), reply.get("error", "Unknown error"))
+        return reply.get("result")
+
+    def start(self):
+        self.supervisor.start()
+
+    def stop(self):
+        self.supervisor.stop()
+
+    def get_status(self) -> Dict:
+        return dict(self.supervisor.get_status(), mode=self.mode)
+
+
+def service_alive(socket_path: str) -> bool:
+    """Whether a crawler service answers on the socket"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2)
+            sock.connect(socket_path)
+            sock.sendall(encode_message({"op": "ping", "params": {}}))
+            return sock.recv(64).startswith(b'{"ok": true')
+    except OSError:
+        return False
+
+
+def service_locked(socket_path: str) -> bool:
+    """Whether a crawler service process holds the socket's lock file"""
+    try:
+        with open(socket_path + ".lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return False
+    except OSError:
+        return False
+
+
+class CrawlerSupervisor:
+    """Starts the crawler service process and restarts it when it exits.
+
+    Restarts back off exponentially while the service keeps failing. If
+    another service already owns the socket (another API worker started
+    it, or it runs under its own process manager), that one is used, and
+    the supervisor starts its own as soon as that one releases the socket.
+    """
+
+    def __init__(self, socket_path: str = SOCKET_PATH, restart_delay: float = 1.0,
+                 max_restart_delay: float = 60.0, poll_interval: float = EXTERNAL_POLL_SECONDS):
+        self.socket_path = socket_path
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.poll_interval = poll_interval
+        self.process: Optional[subprocess.Popen] = None
+        self.thread: Optional[threading.Thread] = None
+        self.stopping = threading.Event()
+        self.restarts = 0
+        self.external = False
+        self.logger = logging.getLogger(__name__)
+
+    def spawn(self) -> subprocess.Popen:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crawl_service.py")
+        return subprocess.Popen([sys.executable, script, "--socket", self.socket_path])
+
+    def watch(self):
+        delay = self.restart_delay
+        while not self.stopping.is_set():
+            if self.external:
+                # Another process runs the service; take over once it lets go
+                if service_locked(self.socket_path):
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                self.external = False
+                self.logger.info(f"Crawler service on {self.socket_path} went away; starting one")
+
+            started = time.monotonic()
+            self.process = self.spawn()
+            self.logger.info(f"Started crawler service process {self.process.pid}")
+            code = self.process.wait()
+            if self.stopping.is_set():
+                break
+            if code == EXIT_ALREADY_RUNNING:
+                self.external = True
+                self.logger.info(f"Using the crawler service already serving {self.socket_path}")
+                continue
+
+            # A service that ran for a while gets a fresh backoff
+            if time.monotonic() - started > self.max_restart_delay:
+                delay = self.restart_delay
+            self.logger.error(f"Crawler service exited with code {code}; restarting in {delay:.0f}s")
+            self.restarts += 1
+            self.stopping.wait(delay)
+            delay = min(delay * 2, self.max_restart_delay)
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.external = service_alive(self.socket_path)
+        if self.external:
+            self.logger.info(f"Using the crawler service already serving {self.socket_path}")
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.watch, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 15.0):
+        """Stop the service process this supervisor started"""
+        self.stopping.set()
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.logger.warning(f"Crawler service {process.pid} did not stop; killing it")
+                process.kill()
+                process.wait()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    def process_running(self) -> bool:
+        process = self.process
+        return process is not None and process.poll() is None
+
+    def get_status(self) -> Dict:
+        process = self.process
+        return {
+            "socket": self.socket_path,
+            "pid": process.pid if process is not None and process.poll() is None else None,
+            "restarts": self.restarts,
+            "external": self.external
+        }
+
+
+crawler_backend = None
+
+
+def get_crawler_backend():
+    """Get the backend selected by BIZINTEL_CRAWLER_MODE"""
+    global crawler_backend
+    if crawler_backend is None:
+        crawler_backend = ProcessBackend() if CRAWLER_MODE == "process" else LocalBackend()
+    return crawler_backend
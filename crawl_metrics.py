@@ -0,0 +1,216 @@
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Crawl stages timed in seconds, with their help text
+STAGES = {
+    'dns': 'DNS resolution time',
+    'connect': 'TCP/TLS connection setup time',
+    'fetch': 'Time from request to full response body',
+    'parse': 'HTML parse time',
+    'extract': 'Link and business extraction time',
+    'store': 'Time to write a batch of businesses',
+}
+
+# Window over which pages/sec is measured
+RATE_WINDOW_SECONDS = 60
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return result
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items())) + '}'
+
+
+class CrawlMetrics:
+    """Process-wide crawl instrumentation.
+
+    Crawlers record into it from the scheduler thread while the API reads
+    it from request handlers, so every access goes through one lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {stage: Histogram(SECONDS_BUCKETS) for stage in STAGES}
+        self.response_bytes = Histogram(BYTES_BUCKETS)
+        self.status_counts: Dict[Tuple[str, str], int] = {}
+        self.aborted_counts: Dict[str, int] = {}
+        self.connection_counts: Dict[str, int] = {}
+        self.queue_depth: Dict[str, int] = {}
+        self.in_flight: Dict[str, int] = {}
+        self.pages_total = 0
+        self.businesses_total = 0
+        self.page_times = deque()
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            self.stages[stage].observe(seconds)
+
+    def record_response(self, host: str, status: int, size: Optional[int] = None):
+        """Count a response by host and status (0 means the request failed)"""
+        key = (host, str(status) if status else 'error')
+        with self.lock:
+            self.status_counts[key] = self.status_counts.get(key, 0) + 1
+            if size is not None:
+                self.response_bytes.observe(size)
+
+    def record_abort(self, reason: str):
+        """Count a response whose body was refused (not HTML, too large)"""
+        with self.lock:
+            self.aborted_counts[reason] = self.aborted_counts.get(reason, 0) + 1
+
+    def record_connection(self, event: str):
+        """Count an HTTP client event (created, reused, queued, dns_cache_hit/miss)"""
+        with self.lock:
+            self.connection_counts[event] = self.connection_counts.get(event, 0) + 1
+
+    def record_page(self, businesses: int = 0):
+        """Count a crawled page for the throughput figures"""
+        now = time.monotonic()
+        with self.lock:
+            self.pages_total += 1
+            self.businesses_total += businesses
+            self.page_times.append(now)
+            self._trim(now)
+
+    def set_queue(self, target_name: str, queued: int, in_flight: int = 0):
+        with self.lock:
+            self.queue_depth[target_name] = queued
+            self.in_flight[target_name] = in_flight
+
+    def clear_queue(self, target_name: str):
+        with self.lock:
+            self.queue_depth.pop(target_name, None)
+            self.in_flight.pop(target_name, None)
+
+    def _trim(self, now: float):
+        while self.page_times and now - self.page_times[0] > RATE_WINDOW_SECONDS:
+            self.page_times.popleft()
+
+    def pages_per_second(self) -> float:
+        with self.lock:
+            self._trim(time.monotonic())
+            return len(self.page_times) / RATE_WINDOW_SECONDS
+
+    def snapshot(self) -> Dict:
+        """Summary of the metrics for the status endpoint"""
+        pages_per_second = self.pages_per_second()
+        with self.lock:
+            stages = {
+                stage: {
+                    'count': histogram.count,
+                    'total_seconds': round(histogram.sum, 3),
+                    'avg_seconds': round(histogram.sum / histogram.count, 4) if histogram.count else None
+                }
+                for stage, histogram in self.stages.items()
+            }
+            created = self.connection_counts.get('created', 0)
+            reused = self.connection_counts.get('reused', 0)
+            status_codes: Dict[str, Dict[str, int]] = {}
+            for (host, status), count in self.status_counts.items():
+                status_codes.setdefault(host, {})[status] = count
+            return {
+                'pages_total': self.pages_total,
+                'businesses_total': self.businesses_total,
+                'pages_per_second': round(pages_per_second, 3),
+                'bytes_downloaded': int(self.response_bytes.sum),
+                'stages': stages,
+                'status_codes': status_codes,
+                'aborted_responses': dict(self.aborted_counts),
+                'connections': dict(self.connection_counts),
+                'connection_reuse_ratio': round(reused / (created + reused), 3) if created + reused else None,
+                'queue_depth': dict(self.queue_depth),
+                'in_flight': dict(self.in_flight)
+            }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        pages_per_second = self.pages_per_second()
+        lines = []
+
+        def histogram(name: str, help_text: str, series: List[Tuple[Dict, Histogram]]):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, hist in series:
+                for bound, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{_labels(dict(labels, le=bound))} {count}')
+                lines.append(f'{name}_sum{_labels(labels)} {hist.sum}')
+                lines.append(f'{name}_count{_labels(labels)} {hist.count}')
+
+        def simple(name: str, kind: str, help_text: str, series: List[Tuple[Dict, float]]):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in series:
+                lines.append(f'{name}{_labels(labels)} {value}')
+
+        with self.lock:
+            histogram(
+                'crawler_stage_seconds', 'Time spent per crawl stage',
+                [({'stage': stage}, self.stages[stage]) for stage in STAGES]
+            )
+            histogram('crawler_response_bytes', 'Size of downloaded response bodies',
+                      [({}, self.response_bytes)])
+            simple(
+                'crawler_responses_total', 'counter', 'Responses by host and status code',
+                [({'host': host, 'status': status}, count)
+                 for (host, status), count in sorted(self.status_counts.items())]
+            )
+            simple(
+                'crawler_responses_aborted_total', 'counter', 'Response bodies refused, by reason',
+                [({'reason': reason}, count) for reason, count in sorted(self.aborted_counts.items())]
+            )
+            simple(
+                'crawler_http_connections_total', 'counter',
+                'HTTP client connection events (created, reused, queued, DNS cache hits and misses)',
+                [({'event': event}, count) for event, count in sorted(self.connection_counts.items())]
+            )
+            simple('crawler_pages_total', 'counter', 'Pages crawled', [({}, self.pages_total)])
+            simple('crawler_businesses_total', 'counter', 'Businesses extracted',
+                   [({}, self.businesses_total)])
+            simple('crawler_queue_depth', 'gauge', 'URLs waiting to be crawled',
+                   [({'target': name}, depth) for name, depth in sorted(self.queue_depth.items())])
+            simple('crawler_in_flight', 'gauge', 'Pages being fetched or extracted',
+                   [({'target': name}, count) for name, count in sorted(self.in_flight.items())])
+        simple('crawler_pages_per_second', 'gauge',
+               f'Pages crawled per second over the last {RATE_WINDOW_SECONDS}s',
+               [({}, round(pages_per_second, 3))])
+
+        return '\n'.join(lines) + '\n'
+
+
+# Shared by every crawler in the process
+crawl_metrics = CrawlMetrics()
@@ -0,0 +1,71 @@
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+# Pages a selector may be tried on without a match before it is demoted
+SELECTOR_WINDOW = 50
+
+# Demoted selectors are tried again on every Nth page of the target
+PROBE_INTERVAL = 25
+
+
+@dataclass
+class SelectorStat:
+    """Hit statistics of one selector on one target"""
+    pages: int = 0  # Pages it was tried on
+    hits: int = 0  # Pages it matched on
+    misses: int = 0  # Pages since it last matched
+    demoted: bool = False
+
+
+class SelectorStats:
+    """Tracks which business selectors pay off on a target.
+
+    A selector that has not matched on SELECTOR_WINDOW consecutive pages is
+    demoted and only run on probe pages (every PROBE_INTERVAL pages); a
+    probe that matches restores it. Only the first selector matching an
+    element is credited, so selectors made redundant by an earlier one
+    are demoted too.
+    """
+
+    def __init__(self, selectors: List[str], saved: Optional[Dict[str, Dict]] = None,
+                 window: int = SELECTOR_WINDOW, probe_interval: int = PROBE_INTERVAL):
+        saved = saved or {}
+        self.selectors = list(selectors)
+        self.window = window
+        self.probe_interval = probe_interval
+        self.stats = {s: SelectorStat(**saved.get(s, {})) for s in self.selectors}
+        self.pages = 0
+
+    def choose(self) -> List[str]:
+        """Selectors to run on the next page"""
+        self.pages += 1
+        probe = self.pages % self.probe_interval == 0
+        return [s for s in self.selectors if probe or not self.stats[s].demoted]
+
+    def record(self, used: List[str], hits: Dict[str, int]) -> List[Tuple[str, str]]:
+        """Update the statistics with a page's hit counts.
+
+        Returns the (selector, "demoted" or "restored") changes it caused.
+        """
+        changes = []
+        for selector in used:
+            stat = self.stats.get(selector)
+            if stat is None:
+                continue
+            stat.pages += 1
+            if hits.get(selector):
+                stat.hits += 1
+                stat.misses = 0
+                if stat.demoted:
+                    stat.demoted = False
+                    changes.append((selector, 'restored'))
+            else:
+                stat.misses += 1
+                if not stat.demoted and stat.misses >= self.window:
+                    stat.demoted = True
+                    changes.append((selector, 'demoted'))
+        return changes
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {selector: asdict(stat) for selector, stat in self.stats.items()}
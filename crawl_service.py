@@ -0,0 +1,230 @@
+import argparse
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import signal
+from typing import Any, Dict, List
+
+from crawl_ipc import EXIT_ALREADY_RUNNING, SOCKET_PATH, CrawlerServiceError, encode_message
+from crawl_metrics import crawl_metrics
+from crawler_engine import (
+    MAX_PAGE_BYTES, CrawlerScheduler, CrawlTarget, adhoc_target, start_crawler_service,
+    stop_crawler_service, target_to_dict
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlerCommands:
+    """The crawler's control operations, as used by the /crawler API.
+
+    Every operation takes and returns JSON-compatible values so it can run
+    in the API process or behind the crawler service socket alike. Known
+    failures raise CrawlerServiceError with the HTTP status to report.
+    """
+
+    def __init__(self, scheduler: CrawlerScheduler):
+        self.scheduler = scheduler
+        self.handlers = {
+            'ping': self.ping,
+            'status': self.status,
+            'metrics': self.metrics,
+            'targets': self.targets,
+            'add_target': self.add_target,
+            'delete_target': self.delete_target,
+            'selectors': self.selectors,
+            'run': self.run,
+            'adhoc_run': self.adhoc_run,
+            'jobs': self.jobs,
+            'job': self.job,
+            'cancel': self.cancel,
+            'start': self.start,
+            'stop': self.stop,
+        }
+
+    async def dispatch(self, op: str, params: Dict[str, Any]) -> Any:
+        handler = self.handlers.get(op)
+        if handler is None:
+            raise CrawlerServiceError(400, f"Unknown crawler command: {op}")
+        result = handler(**params)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return result
+
+    def require_target(self, target_name: str):
+        target = self.scheduler.get_target(target_name)
+        if not target:
+            raise CrawlerServiceError(404, f"Crawl target '{target_name}' not found")
+        return target
+
+    def require_run(self, job_id: str):
+        run = self.scheduler.get_run(job_id)
+        if not run:
+            raise CrawlerServiceError(404, f"Crawl job '{job_id}' not found")
+        return run
+
+    def ping(self) -> bool:
+        return True
+
+    def status(self) -> Dict:
+        return self.scheduler.get_status()
+
+    def metrics(self) -> str:
+        return crawl_metrics.render_prometheus()
+
+    def targets(self) -> List[Dict]:
+        return [target_to_dict(target) for target in self.scheduler.get_targets()]
+
+    def add_target(self, target: Dict[str, Any]) -> str:
+        try:
+            new_target = CrawlTarget(
+                name=target["name"],
+                start_urls=target["start_urls"],
+                allowed_domains=target["allowed_domains"],
+                max_depth=target["max_depth"],
+                max_pages=target["max_pages"],
+                delay_range=tuple(target["delay_range"]),
+                business_selectors=target["business_selectors"],
+                active=target["active"],
+                crawl_interval_hours=target["crawl_interval_hours"],
+                incremental=target.get("incremental", False),
+                max_page_bytes=target.get("max_page_bytes", MAX_PAGE_BYTES),
+                use_sitemaps=target.get("use_sitemaps", False),
+                sitemap_urls=target.get("sitemap_urls")
+            )
+        except KeyError as e:
+            raise CrawlerServiceError(400, f"Missing crawl target field: {e.args[0]}")
+        self.scheduler.add_target(new_target)
+        return new_target.name
+
+    def delete_target(self, target_name: str) -> str:
+        self.require_target(target_name)
+        self.scheduler.remove_target(target_name)
+        return target_name
+
+    def selectors(self, target_name: str) -> Dict:
+        self.require_target(target_name)
+        return self.scheduler.db.get_selector_stats(target_name)
+
+    def run(self, target_name: str) -> Dict:
+        self.require_target(target_name)
+        try:
+            return self.scheduler.start_run(target_name).to_dict()
+        except RuntimeError as e:
+            raise CrawlerServiceError(409, str(e))
+
+    def adhoc_run(self, start_url: str, pages: int) -> Dict:
+        """Crawl a one-off site outside the target registry"""
+        try:
+            target = adhoc_target(start_url, pages)
+        except ValueError as e:
+            raise CrawlerServiceError(400, str(e))
+        return self.scheduler.start_adhoc_run(target).to_dict()
+
+    def jobs(self) -> List[Dict]:
+        return [run.to_dict() for run in self.scheduler.get_runs()]
+
+    def job(self, job_id: str) -> Dict:
+        return self.require_run(job_id).to_dict()
+
+    def cancel(self, job_id: str) -> Dict:
+        self.require_run(job_id)
+        return self.scheduler.cancel_run(job_id).to_dict()
+
+    def start(self) -> bool:
+        """Start the scheduler; False if it was already running"""
+        if self.scheduler.running:
+            return False
+        self.scheduler.start()
+        return True
+
+    async def stop(self) -> bool:
+        """Stop the scheduler; False if it was already stopped"""
+        if not self.scheduler.running:
+            return False
+        # Joining the scheduler thread can take seconds; other clients keep being served
+        await asyncio.to_thread(self.scheduler.stop)
+        return True
+
+
+async def handle_connection(commands: CrawlerCommands, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+    """Answer one newline-delimited JSON request"""
+    try:
+        line = await reader.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            result = await commands.dispatch(request.get("op"), request.get("params") or {})
+            reply = {"ok": True, "result": result}
+        except CrawlerServiceError as e:
+            reply = {"ok": False, "status": e.status, "error": e.message}
+        except Exception as e:
+            logger.error(f"Error handling crawler command: {str(e)}")
+            reply = {"ok": False, "status": 500, "error": str(e)}
+        writer.write(encode_message(reply))
+        await writer.drain()
+    except (ConnectionError, ValueError) as e:
+        logger.warning(f"Crawler command connection failed: {str(e)}")
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str = SOCKET_PATH) -> int:
+    """Run the crawler scheduler and answer commands on a Unix socket until stopped"""
+    # Only one service may own the socket; others exit so their supervisor uses it
+    lock_file = open(socket_path + ".lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        logger.info(f"Another crawler service is serving {socket_path}")
+        lock_file.close()
+        return EXIT_ALREADY_RUNNING
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # Left behind by a service that died
+
+    scheduler = start_crawler_service()
+    commands = CrawlerCommands(scheduler)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: handle_connection(commands, reader, writer), path=socket_path
+    )
+    os.chmod(socket_path, 0o600)
+    logger.info(f"Crawler service listening on {socket_path}")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopped.set)
+
+    try:
+        await stopped.wait()
+    finally:
+        server.close()
+        await server.wait_closed()
+        await asyncio.to_thread(stop_crawler_service)
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        lock_file.close()
+        logger.info("Crawler service stopped")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="BizIntelTZ crawler service")
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket to listen on")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    return asyncio.run(serve(args.socket))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
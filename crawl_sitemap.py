@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import zlib
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+import aiohttp
+
+
+# Protocol limit on an uncompressed sitemap file
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# Sitemap files read per target per crawl, indexes included
+MAX_SITEMAP_FILES = 50
+
+SITEMAP_CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SitemapEntry:
+    """A <url> of a urlset, or a <sitemap> of a sitemap index"""
+    loc: str
+    lastmod: Optional[str] = None
+    is_sitemap: bool = False
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1]
+
+
+class SitemapParser:
+    """Incremental sitemap parser fed with raw (optionally gzipped) chunks.
+
+    Entries are returned as soon as their closing tag is seen and then
+    dropped from the tree, so memory stays flat however large the file.
+    """
+
+    def __init__(self, max_bytes: int = MAX_SITEMAP_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.decompressor = None
+        self.started = False
+        self.root = None
+        self.parser = ET.XMLPullParser(events=('start', 'end'))
+
+    def feed(self, chunk: bytes) -> List[SitemapEntry]:
+        if not self.started:
+            self.started = True
+            # Gzipped sitemaps are often served without Content-Encoding
+            if chunk[:2] == b'\x1f\x8b':
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor is not None:
+            chunk = self.decompressor.decompress(chunk, self.max_bytes - self.size + 1)
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ValueError(f"sitemap larger than {self.max_bytes} bytes")
+        self.parser.feed(chunk)
+        return self.read_entries()
+
+    def close(self) -> List[SitemapEntry]:
+        self.parser.close()
+        return self.read_entries()
+
+    def read_entries(self) -> List[SitemapEntry]:
+        entries = []
+        for event, elem in self.parser.read_events():
+            if event == 'start':
+                if self.root is None:
+                    self.root = elem
+                continue
+
+            name = _local_name(elem.tag)
+            if name not in ('url', 'sitemap'):
+                continue
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in elem}
+            if fields.get('loc'):
+                entries.append(SitemapEntry(
+                    loc=fields['loc'],
+                    lastmod=fields.get('lastmod') or None,
+                    is_sitemap=name == 'sitemap'
+                ))
+            self.root.clear()
+        return entries
+
+
+async def read_sitemap(session: aiohttp.ClientSession, url: str,
+                       max_bytes: int = MAX_SITEMAP_BYTES) -> AsyncIterator[SitemapEntry]:
+    """Stream the entries of one sitemap file; errors end the stream early"""
+    parser = SitemapParser(max_bytes)
+    try:
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.info(f"No sitemap at {url} (HTTP {response.status})")
+                return
+            async for chunk in response.content.iter_chunked(SITEMAP_CHUNK_SIZE):
+                for entry in parser.feed(chunk):
+                    yield entry
+            for entry in parser.close():
+                yield entry
+    except asyncio.TimeoutError:
+        logger.warning(f"Timed out reading sitemap {url}")
+    except (aiohttp.ClientError, ET.ParseError, ValueError, zlib.error) as e:
+        logger.warning(f"Error reading sitemap {url}: {str(e)}")
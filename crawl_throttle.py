@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+
+# Longest robots.txt read; the rest is ignored, as major crawlers do
+ROBOTS_MAX_BYTES = 512 * 1024
+
+# Responses that mean the host wants us to slow down
+BACKOFF_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Convert a Retry-After header (seconds or HTTP date) into seconds to wait"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostThrottle:
+    """AIMD rate controller for a single host.
+
+    Concurrency grows by roughly one slot per window of healthy responses and
+    the gap between requests shrinks towards the robots.txt Crawl-delay.
+    Throttling responses (429/5xx), Retry-After and latency spikes halve the
+    concurrency and double the gap.
+    """
+
+    def __init__(self, initial_delay: float = 0.0, min_delay: float = 0.0,
+                 max_concurrency: int = 8, max_delay: float = 60.0):
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.delay = max(initial_delay, min_delay)
+        # A Crawl-delay means requests must be spaced out, one at a time
+        self.max_concurrency = 1 if min_delay > 0 else max_concurrency
+        self.concurrency = 1.0
+        self.active = 0
+        self.latency = None  # EWMA of response time in seconds
+        self.next_request = 0.0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Wait for a free slot and for the host's request gap to pass"""
+        loop = asyncio.get_running_loop()
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < int(self.concurrency))
+            self.active += 1
+            now = loop.time()
+            start = max(now, self.next_request)
+            self.next_request = start + self.delay
+        if start > now:
+            try:
+                await asyncio.sleep(start - now)
+            except asyncio.CancelledError:
+                # Cancelled before the request was made: hand the slot back
+                async with self.condition:
+                    self.active -= 1
+                    self.condition.notify_all()
+                raise
+
+    async def release(self, status: int, latency: Optional[float] = None,
+                      retry_after: Optional[float] = None):
+        """Free a slot and adapt the rate to the response that came back"""
+        loop = asyncio.get_running_loop()
+        async with self.condition:
+            self.active -= 1
+
+            slow = (
+                latency is not None and self.latency is not None and
+                latency > 2 * self.latency and latency > 1.0
+            )
+            if status in BACKOFF_STATUSES or status == 0 or retry_after is not None or slow:
+                self.concurrency = max(1.0, self.concurrency / 2)
+                self.delay = min(self.max_delay, max(self.delay * 2, self.min_delay, 0.5))
+                if retry_after is not None:
+                    self.next_request = max(self.next_request, loop.time() + retry_after)
+            else:
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                self.delay = max(self.min_delay, self.delay * 0.75 if self.delay > 0.05 else 0.0)
+
+            if latency is not None:
+                self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+            self.condition.notify_all()
+
+    def snapshot(self) -> Dict:
+        """Current controller state, for status reporting"""
+        return {
+            'concurrency': int(self.concurrency),
+            'active': self.active,
+            'delay': round(self.delay, 3),
+            'latency': round(self.latency, 3) if self.latency is not None else None
+        }
+
+
+class RobotsCache:
+    """Fetches and caches robots.txt per host"""
+
+    def __init__(self, session: aiohttp.ClientSession, user_agent: str, ttl_seconds: int = 86400):
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl_seconds = ttl_seconds
+        self.parsers: Dict[str, tuple] = {}
+        self.fetching: Dict[str, asyncio.Future] = {}
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    async def get(self, url: str) -> RobotFileParser:
+        """Get the robots.txt parser for the host of a URL"""
+        host = self.host_key(url)
+        cached = self.parsers.get(host)
+        if cached and time.time() - cached[0] < self.ttl_seconds:
+            return cached[1]
+
+        if host not in self.fetching:
+            self.fetching[host] = asyncio.ensure_future(self.fetch(host))
+        try:
+            parser = await asyncio.shield(self.fetching[host])
+        finally:
+            self.fetching.pop(host, None)
+        self.parsers[host] = (time.time(), parser)
+        return parser
+
+    async def fetch(self, host: str) -> RobotFileParser:
+        parser = RobotFileParser(f"{host}/robots.txt")
+        try:
+            async with self.session.get(parser.url) as response:
+                if response.status in (401, 403):
+                    parser.disallow_all = True
+                elif response.status >= 400:
+                    parser.allow_all = True
+                else:
+                    body = await response.content.read(ROBOTS_MAX_BYTES)
+                    parser.parse(body.decode('utf-8', errors='replace').splitlines())
+        except Exception as e:
+            self.logger.warning(f"Could not fetch {parser.url}: {str(e)}")
+            parser.allow_all = True
+        return parser
+
+    async def can_fetch(self, url: str) -> bool:
+        return (await self.get(url)).can_fetch(self.user_agent, url)
+
+    async def sitemaps(self, url: str) -> List[str]:
+        """Sitemap URLs listed in the host's robots.txt"""
+        return (await self.get(url)).site_maps() or []
+
+    async def crawl_delay(self, url: str) -> float:
+        delay = (await self.get(url)).crawl_delay(self.user_agent)
+        return float(delay) if delay else 0.0
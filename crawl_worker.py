@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+import crawler_engine
+from crawl_frontier import canonicalize_url
+from crawl_metrics import crawl_metrics
+from crawler_engine import CrawlTarget, EnhancedCrawler, seed_frontier, target_from_dict
+from database import Database
+
+
+# A leased URL not completed within this many seconds is handed to another worker
+LEASE_SECONDS = 300
+# URLs that fail (or crash their worker) this many times are given up on
+MAX_ATTEMPTS = 3
+
+
+class CrawlWorker:
+    """Crawls URL batches leased from the shared SQLite frontier.
+
+    Any number of workers, in any number of processes or machines sharing
+    the database file, can run side by side. Each leases a batch, crawls
+    it, queues the discovered links and marks the batch done. If a worker
+    dies, its leases expire and the URLs are leased again by another one.
+    """
+
+    def __init__(self, database: Database, worker_id: Optional[str] = None, batch_size: int = 10,
+                 lease_seconds: float = LEASE_SECONDS, poll_interval: float = 5.0,
+                 index_refresh_seconds: float = 300.0):
+        self.db = database
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.index_refresh_seconds = index_refresh_seconds
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+        self.stats = {
+            'batches': 0,
+            'pages': 0,
+            'businesses': 0,
+            'failed_urls': 0
+        }
+
+    def load_targets(self) -> List[CrawlTarget]:
+        """Get the active targets from the shared target registry"""
+        try:
+            return [t for t in map(target_from_dict, self.db.get_crawl_targets()) if t.active]
+        except Exception as e:
+            self.logger.error(f"Error loading crawl targets: {str(e)}")
+            return []
+
+    def lease(self, target: CrawlTarget) -> List[Tuple[str, int]]:
+        """Lease the next batch of a target, respecting its max_pages"""
+        counts = self.db.frontier_counts(target.name, MAX_ATTEMPTS)
+        crawl_metrics.set_queue(target.name, counts.get('pending', 0), counts.get('leased', 0))
+        remaining = target.max_pages - counts.get('done', 0) - counts.get('leased', 0)
+        if remaining <= 0 or not counts.get('pending'):
+            return []
+        return self.db.lease_frontier(
+            target.name, self.worker_id, min(self.batch_size, remaining),
+            self.lease_seconds, MAX_ATTEMPTS
+        )
+
+    async def process_batch(self, crawler: EnhancedCrawler, target: CrawlTarget, batch: List[Tuple[str, int]]):
+        """Crawl a leased batch, queue the links it found and mark it done"""
+        outcomes = await asyncio.gather(
+            *(crawler.crawl_url(target, url) for url, _ in batch),
+            return_exceptions=True
+        )
+        await crawler.sink.flush()
+
+        done = []
+        links = []
+        for (url, depth), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                # Left leased; it is retried once the lease expires
+                self.logger.error(f"Error crawling {url}: {str(outcome)}")
+                self.stats['failed_urls'] += 1
+                continue
+
+            done.append(url)
+            self.stats['pages'] += outcome.fetched
+            self.stats['businesses'] += outcome.businesses
+            if depth < target.max_depth:
+                for link in outcome.links:
+                    canonical = canonicalize_url(link)
+                    if canonical and target.allows(canonical):
+                        links.append((canonical, depth + 1))
+
+        if links:
+            self.db.enqueue_frontier(target.name, links)
+        self.db.complete_frontier(target.name, self.worker_id, done)
+        crawler.save_selector_stats(target.name)
+        self.stats['batches'] += 1
+
+    async def run(self):
+        """Lease and crawl batches until stopped"""
+        self.running = True
+        self.logger.info(f"Crawl worker {self.worker_id} started")
+        last_refresh = time.monotonic()
+
+        async with EnhancedCrawler(self.db) as crawler:
+            while self.running:
+                # Other workers insert businesses too; pick them up for resolution
+                if time.monotonic() - last_refresh >= self.index_refresh_seconds:
+                    crawler.entity_index = crawler.load_entity_index()
+                    last_refresh = time.monotonic()
+
+                leased_any = False
+                for target in self.load_targets():
+                    try:
+                        batch = self.lease(target)
+                        if batch:
+                            leased_any = True
+                            await self.process_batch(crawler, target, batch)
+                    except Exception as e:
+                        self.logger.error(f"Error processing batch for {target.name}: {str(e)}")
+
+                if not leased_any:
+                    await asyncio.sleep(self.poll_interval)
+
+        self.logger.info(f"Crawl worker {self.worker_id} stopped: {self.stats}")
+
+    def stop(self):
+        self.running = False
+
+
+def run_worker(db_path: str, batch_size: int, extraction_workers: int):
+    """Entry point of a single worker process"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    crawler_engine.EXTRACTION_WORKERS = extraction_workers
+    worker = CrawlWorker(Database(db_path), batch_size=batch_size)
+    try:
+        asyncio.run(worker.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        crawler_engine.shutdown_extraction_pool()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="BizIntelTZ distributed crawl worker")
+    parser.add_argument("--db", default="bizinteltz.db", help="SQLite database shared by all workers")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes to start")
+    parser.add_argument("--batch-size", type=int, default=10, help="URLs leased per batch")
+    parser.add_argument("--extraction-workers", type=int, default=None,
+                        help="parser processes per worker (default: all cores for one worker, "
+                             "in-thread parsing for several)")
+    parser.add_argument("--seed", action="append", default=[], metavar="TARGET",
+                        help="start a fresh crawl of a target before working (repeatable)")
+    args = parser.parse_args(argv)
+
+    db = Database(args.db)
+    for name in args.seed:
+        targets = [target_from_dict(c) for c in db.get_crawl_targets() if c.get("name") == name]
+        if not targets:
+            print(f"Unknown crawl target: {name}")
+            return 1
+        print(f"Queued {seed_frontier(db, targets[0])} start URLs for {name}")
+
+    extraction_workers = args.extraction_workers
+    if extraction_workers is None:
+        extraction_workers = (os.cpu_count() or 1) if args.processes == 1 else 0
+
+    if args.processes == 1:
+        run_worker(args.db, args.batch_size, extraction_workers)
+        return 0
+
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(args.db, args.batch_size, extraction_workers))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Anything they had leased is picked up again once the leases expire
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+import asyncio
+import json
 import logging
 
-from crawler_engine import get_crawler_scheduler, start_crawler_service, stop_crawler_service, CrawlTarget
-from database import Database
+from crawl_ipc import FINISHED_STATUSES, CrawlerServiceError, get_crawler_backend
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +14,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# How often the progress stream checks a crawl job, and how often it
+# sends a keep-alive comment while nothing changes
+PROGRESS_POLL_SECONDS = 1.0
+PROGRESS_KEEPALIVE_SECONDS = 15.0
+
 # Create router
 router = APIRouter(prefix="/crawler", tags=["crawler"])
 
@@ -20,7 +26,7 @@ router = APIRouter(prefix="/crawler", tags=["crawler"])
 @router.on_event("startup")
 def startup_event():
     try:
-        start_crawler_service()
+        get_crawler_backend().start()
         logger.info("Crawler service started on API startup")
     except Exception as e:
         logger.error(f"Failed to start crawler service: {str(e)}")
@@ -29,46 +35,52 @@ def startup_event():
 @router.on_event("shutdown")
 def shutdown_event():
     try:
-        stop_crawler_service()
+        get_crawler_backend().stop()
         logger.info("Crawler service stopped on API shutdown")
     except Exception as e:
         logger.error(f"Failed to stop crawler service: {str(e)}")
 
+def job_links(job: Dict) -> Dict:
+    """Add the URLs to follow a crawl job to its progress"""
+    job["status_url"] = f"{router.prefix}/jobs/{job['job_id']}"
+    job["events_url"] = f"{router.prefix}/jobs/{job['job_id']}/events"
+    return job
+
 @router.get("/status")
 async def get_crawler_status():
     """Get the current status of the crawler service"""
     try:
-        scheduler = get_crawler_scheduler()
-        return scheduler.get_status()
+        backend = get_crawler_backend()
+        status = await backend.call("status")
+        status["service"] = backend.get_status()
+        return status
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error getting crawler status: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get crawler status: {str(e)}")
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_crawler_metrics():
+    """Crawl stage timings, status codes, queue depth and throughput in Prometheus text format"""
+    try:
+        return PlainTextResponse(
+            await get_crawler_backend().call("metrics"),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error rendering crawler metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to render crawler metrics: {str(e)}")
+
 @router.get("/targets")
 async def get_crawl_targets():
     """Get all crawl targets"""
     try:
-        scheduler = get_crawler_scheduler()
-        targets = scheduler.get_targets()
-        
-        # Convert to serializable format
-        serialized_targets = []
-        for target in targets:
-            serialized_targets.append({
-                "name": target.name,
-                "start_urls": target.start_urls,
-                "allowed_domains": target.allowed_domains,
-                "max_depth": target.max_depth,
-                "max_pages": target.max_pages,
-                "delay_range": target.delay_range,
-                "business_selectors": target.business_selectors,
-                "active": target.active,
-                "last_crawl": target.last_crawl.isoformat() if target.last_crawl else None,
-                "next_crawl": target.next_crawl.isoformat() if target.next_crawl else None,
-                "crawl_interval_hours": target.crawl_interval_hours
-            })
-        
-        return serialized_targets
+        return await get_crawler_backend().call("targets")
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error getting crawl targets: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get crawl targets: {str(e)}")
@@ -77,93 +89,140 @@ async def get_crawl_targets():
 async def add_crawl_target(target: Dict[str, Any]):
     """Add a new crawl target"""
     try:
-        scheduler = get_crawler_scheduler()
-        
-        # Create CrawlTarget object
-        new_target = CrawlTarget(
-            name=target["name"],
-            start_urls=target["start_urls"],
-            allowed_domains=target["allowed_domains"],
-            max_depth=target["max_depth"],
-            max_pages=target["max_pages"],
-            delay_range=tuple(target["delay_range"]),
-            business_selectors=target["business_selectors"],
-            active=target["active"],
-            crawl_interval_hours=target["crawl_interval_hours"]
-        )
-        
-        # Add to scheduler
-        scheduler.add_target(new_target)
-        
-        return {"status": "success", "message": f"Added crawl target: {target['name']}"}
+        name = await get_crawler_backend().call("add_target", target=target)
+        return {"status": "success", "message": f"Added crawl target: {name}"}
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error adding crawl target: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to add crawl target: {str(e)}")
 
+@router.get("/targets/{target_name}/selectors")
+async def get_selector_stats(target_name: str):
+    """Get per-selector hit statistics of a target; demoted selectors only run on probe pages"""
+    try:
+        return await get_crawler_backend().call("selectors", target_name=target_name)
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error getting selector stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get selector stats: {str(e)}")
+
 @router.delete("/targets/{target_name}")
 async def delete_crawl_target(target_name: str):
     """Delete a crawl target"""
     try:
-        scheduler = get_crawler_scheduler()
-        
-        # Check if target exists
-        target = scheduler.get_target(target_name)
-        if not target:
-            raise HTTPException(status_code=404, detail=f"Crawl target '{target_name}' not found")
-        
-        # Remove from scheduler
-        scheduler.remove_target(target_name)
-        
+        await get_crawler_backend().call("delete_target", target_name=target_name)
         return {"status": "success", "message": f"Deleted crawl target: {target_name}"}
-    except HTTPException:
-        raise
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error deleting crawl target: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to delete crawl target: {str(e)}")
 
-@router.post("/run/{target_name}")
+@router.post("/run/{target_name}", status_code=202)
 async def run_crawl(target_name: str):
-    """Run a crawl for a specific target"""
+    """Start a crawl for a specific target and return its job id right away"""
     try:
-        scheduler = get_crawler_scheduler()
-        
-        # Check if target exists
-        target = scheduler.get_target(target_name)
-        if not target:
-            raise HTTPException(status_code=404, detail=f"Crawl target '{target_name}' not found")
-        
-        # Run the crawl
-        result = await scheduler.run_single_crawl(target_name)
-        
-        # Convert to serializable format
-        serialized_result = {
-            "target_name": result.target_name,
-            "start_time": result.start_time.isoformat(),
-            "end_time": result.end_time.isoformat(),
-            "pages_crawled": result.pages_crawled,
-            "businesses_found": result.businesses_found,
-            "errors": result.errors,
-            "success": result.success
-        }
-        
-        return serialized_result
-    except HTTPException:
-        raise
+        return job_links(await get_crawler_backend().call("run", target_name=target_name))
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error running crawl: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to run crawl: {str(e)}")
 
+@router.get("/jobs")
+async def get_crawl_jobs():
+    """Get recent on-demand crawl jobs, newest first"""
+    try:
+        return await get_crawler_backend().call("jobs")
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error getting crawl jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get crawl jobs: {str(e)}")
+
+@router.get("/jobs/{job_id}")
+async def get_crawl_job(job_id: str):
+    """Get the progress of a crawl job"""
+    try:
+        return await get_crawler_backend().call("job", job_id=job_id)
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error getting crawl job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get crawl job: {str(e)}")
+
+@router.get("/jobs/{job_id}/events")
+async def stream_crawl_job(job_id: str, request: Request):
+    """Stream a crawl job's progress as Server-Sent Events.
+    
+    A "progress" event is sent whenever the job changes and a final "done"
+    event when it completes, fails or is cancelled.
+    """
+    backend = get_crawler_backend()
+    try:
+        data = await backend.call("job", job_id=job_id)
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error getting crawl job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get crawl job: {str(e)}")
+    
+    async def events():
+        nonlocal data
+        last_sent = None
+        idle = 0.0
+        while True:
+            if data["status"] in FINISHED_STATUSES:
+                yield f"event: done\ndata: {json.dumps(data)}\n\n"
+                return
+            if data != last_sent:
+                yield f"event: progress\ndata: {json.dumps(data)}\n\n"
+                last_sent = data
+                idle = 0.0
+            elif idle >= PROGRESS_KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(PROGRESS_POLL_SECONDS)
+            idle += PROGRESS_POLL_SECONDS
+            try:
+                data = await backend.call("job", job_id=job_id)
+            except CrawlerServiceError as e:
+                # The crawler restarted or dropped the job; nothing more will come
+                yield f"event: error\ndata: {json.dumps({'detail': e.message})}\n\n"
+                return
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_crawl_job(job_id: str):
+    """Cancel a running crawl job"""
+    try:
+        job = await get_crawler_backend().call("cancel", job_id=job_id)
+        return {"status": "success", "message": f"Cancellation requested for crawl job {job_id}", "job": job}
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    except Exception as e:
+        logger.error(f"Error cancelling crawl job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to cancel crawl job: {str(e)}")
+
 @router.post("/start")
 async def start_crawler():
     """Start the crawler service"""
     try:
-        scheduler = get_crawler_scheduler()
-        
-        if scheduler.running:
+        if not await get_crawler_backend().call("start"):
             return {"status": "success", "message": "Crawler service is already running"}
-        
-        scheduler.start()
         return {"status": "success", "message": "Crawler service started"}
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error starting crawler service: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to start crawler service: {str(e)}")
@@ -172,13 +231,11 @@ async def start_crawler():
 async def stop_crawler():
     """Stop the crawler service"""
     try:
-        scheduler = get_crawler_scheduler()
-        
-        if not scheduler.running:
+        if not await get_crawler_backend().call("stop"):
             return {"status": "success", "message": "Crawler service is already stopped"}
-        
-        scheduler.stop()
         return {"status": "success", "message": "Crawler service stopped"}
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
     except Exception as e:
         logger.error(f"Error stopping crawler service: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to stop crawler service: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to stop crawler service: {str(e)}")
@@ -2,19 +2,85 @@ import asyncio
 import aiohttp
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Set
-from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Set
+from dataclasses import dataclass, field, fields, asdict
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
-import json
 import time
 import random
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import os
+import sys
 import sqlite3
 from contextlib import asynccontextmanager
 import threading
+import heapq
+import itertools
+from collections import deque
+from uuid import uuid4
 
 from database import Database
+from crawl_frontier import BloomFilter, canonicalize_url
+from crawl_extract import SNIFF_BYTES, parse_page, sniff_charset
+from crawl_throttle import HostThrottle, parse_retry_after
+from crawl_metrics import CrawlMetrics, crawl_metrics
+from crawl_http import USER_AGENT, HttpClient
+from crawl_ipc import MAX_ADHOC_PAGES
+from crawl_sitemap import MAX_SITEMAP_FILES, read_sitemap
+from crawl_archive import PageArchive
+from crawl_selectors import SelectorStats
+from entity_resolution import EntityIndex
+
+
+# Only these responses are downloaded and parsed
+HTML_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+
+# Default cap on a page's body; larger pages are abandoned mid-download
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+
+# Bytes read from the network per chunk
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# Keep a compressed copy of every new or changed page for offline replay
+ARCHIVE_PAGES = True
+
+# Seconds between crawl job checkpoints
+CHECKPOINT_INTERVAL = 30
+
+# Days an incremental target's seen-set is kept before it is started afresh
+SEEN_FILTER_MAX_AGE_DAYS = 30
+
+# Worker processes used for HTML parsing and extraction (0 parses in a thread)
+EXTRACTION_WORKERS = os.cpu_count() or 1
+
+extraction_pool = None
+extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> Optional[ProcessPoolExecutor]:
+    """Get or create the shared process pool used for page extraction"""
+    global extraction_pool
+    if EXTRACTION_WORKERS <= 0:
+        return None
+    with extraction_pool_lock:
+        # A worker that dies marks the whole pool as broken; start a new one
+        if extraction_pool is None or getattr(extraction_pool, '_broken', False):
+            extraction_pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return extraction_pool
+
+
+def shutdown_extraction_pool(wait: bool = False):
+    """Stop the extraction worker processes"""
+    global extraction_pool
+    with extraction_pool_lock:
+        if extraction_pool is not None:
+            extraction_pool.shutdown(wait=wait, cancel_futures=True)
+            extraction_pool = None
 
 
 @dataclass
@@ -25,12 +91,73 @@ class CrawlTarget:
     allowed_domains: List[str]
     max_depth: int = 3
     max_pages: int = 100
-    delay_range: tuple = (1, 3)  # Random delay between requests
+    delay_range: tuple = (1, 3)  # Starting delay between requests, adapted per host
     business_selectors: List[str] = None
     active: bool = True
     last_crawl: Optional[datetime] = None
     next_crawl: Optional[datetime] = None
     crawl_interval_hours: int = 24
+    incremental: bool = False  # Skip pages already fetched in earlier runs
+    max_page_bytes: int = MAX_PAGE_BYTES  # Pages larger than this are not downloaded
+    use_sitemaps: bool = False  # Seed crawls with new or changed URLs from the sitemaps
+    sitemap_urls: List[str] = None  # Defaults to robots.txt Sitemap: lines, then /sitemap.xml
+    conditional_fetch: bool = True  # Revalidate pages fetched before and skip unchanged ones
+    seen_filter_max_age_days: int = SEEN_FILTER_MAX_AGE_DAYS  # Incremental seen-set lifetime
+    
+    def url_filter_capacity(self) -> int:
+        """URLs the visited and queued filters of a crawl are sized for"""
+        return max(10000, self.max_pages * 100)
+    
+    def allows(self, url: str) -> bool:
+        """Check if URL is within the target's allowed domains"""
+        netloc = urlparse(url).netloc
+        return any(domain in netloc for domain in self.allowed_domains)
+
+
+def target_to_dict(target: CrawlTarget) -> Dict:
+    """Serialize a crawl target to JSON-compatible values"""
+    data = asdict(target)
+    data['delay_range'] = list(target.delay_range)
+    data['last_crawl'] = target.last_crawl.isoformat() if target.last_crawl else None
+    data['next_crawl'] = target.next_crawl.isoformat() if target.next_crawl else None
+    return data
+
+
+def target_from_dict(data: Dict) -> CrawlTarget:
+    """Rebuild a crawl target saved with target_to_dict"""
+    data = dict(data)
+    data['delay_range'] = tuple(data.get('delay_range') or (1, 3))
+    for key in ('last_crawl', 'next_crawl'):
+        if data.get(key):
+            data[key] = datetime.fromisoformat(data[key])
+    known = {f.name for f in fields(CrawlTarget)}
+    return CrawlTarget(**{k: v for k, v in data.items() if k in known})
+
+
+def adhoc_target(start_url: str, max_pages: int) -> CrawlTarget:
+    """One-off target crawling a single site from a URL, outside the registry"""
+    if not 1 <= max_pages <= MAX_ADHOC_PAGES:
+        raise ValueError(f"Pages must be between 1 and {MAX_ADHOC_PAGES}")
+    canonical = canonicalize_url(start_url)
+    if not canonical:
+        raise ValueError(f"Not an http(s) URL: {start_url}")
+    return CrawlTarget(
+        name=f"adhoc-{uuid4().hex[:8]}",
+        start_urls=[canonical],
+        allowed_domains=[urlparse(canonical).netloc],
+        max_depth=max_pages,  # Breadth-first up to max_pages, however deep
+        max_pages=max_pages,
+        crawl_interval_hours=0,
+        # Every page is parsed so its businesses are reported, changed or not
+        conditional_fetch=False
+    )
+
+
+def seed_frontier(db: Database, target: CrawlTarget) -> int:
+    """Start a new distributed crawl of a target in the shared frontier"""
+    db.reset_frontier(target.name)
+    start_urls = [canonicalize_url(url) for url in target.start_urls]
+    return db.enqueue_frontier(target.name, [(url, 0) for url in start_urls if url])
 
 
 @dataclass
@@ -43,20 +170,215 @@ class CrawlResult:
     businesses_found: int
     errors: List[str]
     success: bool
+    pages_skipped: int = 0  # Pages unchanged since the previous crawl
+
+
+@dataclass
+class CrawlJob:
+    """Progress of a single crawl, checkpointed so an interrupted crawl can resume"""
+    target_name: str
+    start_time: datetime
+    visited_urls: BloomFilter
+    queued_urls: BloomFilter
+    url_queue: deque = field(default_factory=deque)  # (url, depth) pairs
+    revisit: Set[str] = field(default_factory=set)  # Fetched even if already visited
+    in_flight: List[tuple] = field(default_factory=list)  # (url, depth) being processed
+    sitemap_lastmod: Dict[str, str] = field(default_factory=dict)  # Recorded once the URL is crawled
+    pages_crawled: int = 0
+    pages_skipped: int = 0
+    businesses_found: int = 0
+    errors: List[str] = field(default_factory=list)
+    
+    def to_checkpoint(self) -> Dict:
+        """Serialize the job; pages still in flight are queued again on resume"""
+        state = {
+            'start_time': self.start_time.isoformat(),
+            'queue': [list(item) for item in self.in_flight] + [list(item) for item in self.url_queue],
+            'revisit': sorted(self.revisit | {url for url, _ in self.in_flight}),
+            'sitemap_lastmod': self.sitemap_lastmod,
+            'pages_crawled': self.pages_crawled,
+            'pages_skipped': self.pages_skipped,
+            'businesses_found': self.businesses_found,
+            'errors': self.errors[-50:]
+        }
+        return {
+            'state': json.dumps(state),
+            'visited': self.visited_urls.to_bytes(),
+            'queued': self.queued_urls.to_bytes()
+        }
+    
+    @classmethod
+    def from_checkpoint(cls, target_name: str, checkpoint: Dict) -> 'CrawlJob':
+        state = json.loads(checkpoint['state'])
+        return cls(
+            target_name=target_name,
+            start_time=datetime.fromisoformat(state['start_time']),
+            visited_urls=BloomFilter.from_bytes(checkpoint['visited']),
+            queued_urls=BloomFilter.from_bytes(checkpoint['queued']),
+            url_queue=deque((url, depth) for url, depth in state['queue']),
+            revisit=set(state['revisit']),
+            sitemap_lastmod=state.get('sitemap_lastmod', {}),
+            pages_crawled=state['pages_crawled'],
+            pages_skipped=state['pages_skipped'],
+            businesses_found=state['businesses_found'],
+            errors=state['errors']
+        )
+
+
+@dataclass
+class CrawlRun:
+    """A crawl started on demand, tracked so clients can follow and cancel it"""
+    id: str
+    target_name: str
+    max_pages: int
+    status: str = 'queued'  # queued, running, completed, failed, cancelled
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    pages_crawled: int = 0
+    pages_skipped: int = 0
+    businesses_found: int = 0
+    queued_urls: int = 0
+    errors: List[str] = field(default_factory=list)  # Most recent only
+    error_count: int = 0
+    eta_seconds: Optional[float] = None
+    cancel_requested: bool = False
+    adhoc: bool = False  # One-off target, never resumed
+    future: object = None  # Task or concurrent future running the crawl
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed', 'cancelled')
+    
+    def update(self, job: CrawlJob):
+        """Copy progress from the crawl job and estimate the time left"""
+        self.pages_crawled = job.pages_crawled
+        self.pages_skipped = job.pages_skipped
+        self.businesses_found = job.businesses_found
+        self.queued_urls = len(job.url_queue)
+        self.errors = job.errors[-5:]
+        self.error_count = len(job.errors)
+        
+        # Upper bound: assumes the crawl runs until max_pages at the current rate
+        elapsed = (datetime.now() - self.started_at).total_seconds() if self.started_at else 0
+        if self.pages_crawled and elapsed > 0:
+            remaining = max(0, self.max_pages - self.pages_crawled)
+            self.eta_seconds = round(remaining * elapsed / self.pages_crawled, 1)
+    
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'target_name': self.target_name,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'pages_crawled': self.pages_crawled,
+            'pages_skipped': self.pages_skipped,
+            'businesses_found': self.businesses_found,
+            'queued_urls': self.queued_urls,
+            'max_pages': self.max_pages,
+            'errors': self.errors,
+            'error_count': self.error_count,
+            'eta_seconds': self.eta_seconds
+        }
+
+
+@dataclass
+class PageOutcome:
+    """What crawling a single URL produced"""
+    fetched: bool = False
+    skipped: bool = False  # Unchanged since the previous crawl, not parsed
+    businesses: int = 0
+    links: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FetchResult:
+    """Response of a single page fetch"""
+    status: int
+    html: str = ""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    retry_after: Optional[float] = None  # Seconds requested by a Retry-After header
+    elapsed: Optional[float] = None
+    aborted: Optional[str] = None  # Why the body was not downloaded, if it was refused
+
+
+class BusinessSink:
+    """Buffers business records and writes them in batched transactions.
+    
+    Writes run in a worker thread so SQLite never blocks the event loop.
+    Rows that fail are reported individually in errors.
+    """
+    
+    def __init__(self, database: Database, batch_size: int = 100, errors: Optional[List[str]] = None,
+                 metrics: Optional[CrawlMetrics] = None):
+        self.db = database
+        self.batch_size = batch_size
+        self.errors = errors if errors is not None else []
+        self.metrics = metrics or crawl_metrics
+        self.buffer: List[Dict] = []
+        self.written = 0
+        self.failed = 0
+        self.lock = asyncio.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    async def add(self, records: List[Dict]):
+        """Queue records, flushing once a full batch is buffered"""
+        self.buffer.extend(records)
+        if len(self.buffer) >= self.batch_size:
+            await self.flush()
+    
+    async def flush(self):
+        """Write all buffered records in one transaction"""
+        # One flush at a time keeps later updates of a record after earlier ones
+        async with self.lock:
+            if not self.buffer:
+                return
+            batch, self.buffer = self.buffer, []
+            rows = [type('Business', (), record) for record in batch]
+            loop = asyncio.get_running_loop()
+            started = time.monotonic()
+            try:
+                failures = await loop.run_in_executor(None, self.db.add_businesses, rows)
+            except Exception as e:
+                failures = [(row, str(e)) for row in rows]
+            self.metrics.observe('store', time.monotonic() - started)
+            
+            for row, error in failures:
+                error_msg = f"Error storing business {row.name}: {error}"
+                self.errors.append(error_msg)
+                self.logger.error(error_msg)
+            self.failed += len(failures)
+            self.written += len(rows) - len(failures)
 
 
 class EnhancedCrawler:
     """Enhanced web crawler with multiple extraction strategies"""
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, metrics: Optional[CrawlMetrics] = None,
+                 archive: Optional[PageArchive] = None, client: Optional[HttpClient] = None):
         self.db = database
+        # A shared client is left open on exit; otherwise the crawler owns one
+        self.client = client
+        self.owns_client = client is None
         self.session = None
+        self.robots = None
+        self.metrics = metrics or crawl_metrics
+        self.archive = archive or (PageArchive(database) if ARCHIVE_PAGES else None)
+        self.entity_index: Optional[EntityIndex] = None
+        self.sink = BusinessSink(database, metrics=self.metrics)
+        self.throttles: Dict[str, HostThrottle] = {}
+        self.selector_stats: Dict[str, SelectorStats] = {}
+        self.max_in_flight = max(16, EXTRACTION_WORKERS * 2)
         self.logger = logging.getLogger(__name__)
         self.running = False
         self.stats = {
             'total_crawls': 0,
             'total_businesses': 0,
             'total_pages': 0,
+            'total_pages_skipped': 0,
             'last_crawl': None,
             'errors': []
         }
@@ -75,17 +397,15 @@ class EnhancedCrawler:
         ]
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                'User-Agent': 'BizIntelTZ-Crawler/1.0 (+https://bizinteltz.com/crawler)'
-            }
-        )
+        if self.owns_client:
+            self.client = HttpClient(self.metrics)
+        self.session = await self.client.start()
+        self.robots = self.client.robots
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        if self.owns_client and self.client:
+            await self.client.close()
     
     def generate_bi_id(self) -> str:
         """Generate unique Business Intelligence ID"""
@@ -93,231 +413,623 @@ class EnhancedCrawler:
         random_suffix = f"{random.randint(1000, 9999)}"
         return f"BIZ-TZ-{date_str}-{random_suffix}"
     
+    def submit_extraction(self, url: str, html: str, selectors: List[str]) -> asyncio.Future:
+        """Parse a page in the extraction pool, returning a future of its links and businesses"""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(get_extraction_pool(), parse_page, url, html, selectors)
+    
     async def extract_businesses_from_page(self, url: str, html: str, selectors: List[str]) -> List[Dict]:
         """Extract business information from a web page"""
-        businesses = []
-        
         try:
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            for selector in selectors:
-                elements = soup.select(selector)
-                
-                for element in elements:
-                    # Try different methods to extract business name
-                    name = (
-                        element.get('data-biz-name') or
-                        element.get_text(strip=True) or
-                        element.get('title') or
-                        element.get('alt')
-                    )
-                    
-                    if name and len(name.strip()) > 2:
-                        # Extract additional information if available
-                        business_data = {
-                            'name': name.strip(),
-                            'source_url': url,
-                            'extraction_method': selector
-                        }
-                        
-                        # Try to find region/location
-                        location_element = element.find_parent().find(class_=['location', 'address', 'region'])
-                        if location_element:
-                            business_data['region'] = location_element.get_text(strip=True)
-                        
-                        # Try to find sector/category
-                        category_element = element.find_parent().find(class_=['category', 'sector', 'type'])
-                        if category_element:
-                            business_data['sector'] = category_element.get_text(strip=True)
-                        
-                        # Try to find contact information
-                        contact_element = element.find_parent().find(class_=['phone', 'email', 'contact'])
-                        if contact_element:
-                            business_data['contact'] = contact_element.get_text(strip=True)
-                        
-                        businesses.append(business_data)
-            
-            # Also try structured data extraction (JSON-LD, microdata)
-            structured_businesses = await self.extract_structured_data(soup)
-            businesses.extend(structured_businesses)
-            
+            page = await self.submit_extraction(url, html, selectors)
+            return page['businesses']
         except Exception as e:
             self.logger.error(f"Error extracting businesses from {url}: {str(e)}")
-        
-        return businesses
+            return []
     
-    async def extract_structured_data(self, soup: BeautifulSoup) -> List[Dict]:
-        """Extract business data from structured data (JSON-LD, microdata)"""
-        businesses = []
-        
+    def load_entity_index(self) -> EntityIndex:
+        """Index the businesses already in the database for duplicate resolution"""
+        index = EntityIndex()
         try:
-            # JSON-LD extraction
-            json_scripts = soup.find_all('script', type='application/ld+json')
-            for script in json_scripts:
-                try:
-                    data = json.loads(script.string)
-                    if isinstance(data, dict):
-                        if data.get('@type') in ['LocalBusiness', 'Organization', 'Corporation']:
-                            business = {
-                                'name': data.get('name', ''),
-                                'region': data.get('address', {}).get('addressLocality', ''),
-                                'sector': data.get('description', ''),
-                                'extraction_method': 'json-ld'
-                            }
-                            if business['name']:
-                                businesses.append(business)
-                except json.JSONDecodeError:
-                    continue
-            
-            # Microdata extraction
-            microdata_items = soup.find_all(attrs={'itemtype': True})
-            for item in microdata_items:
-                itemtype = item.get('itemtype', '')
-                if 'LocalBusiness' in itemtype or 'Organization' in itemtype:
-                    name_elem = item.find(attrs={'itemprop': 'name'})
-                    if name_elem:
-                        business = {
-                            'name': name_elem.get_text(strip=True),
-                            'extraction_method': 'microdata'
-                        }
-                        
-                        address_elem = item.find(attrs={'itemprop': 'address'})
-                        if address_elem:
-                            business['region'] = address_elem.get_text(strip=True)
-                        
-                        businesses.append(business)
-        
+            for record in self.db.get_businesses():
+                index.add(record)
         except Exception as e:
-            self.logger.error(f"Error extracting structured data: {str(e)}")
+            self.logger.error(f"Error loading businesses for entity resolution: {str(e)}")
+        return index
+    
+    def get_selector_stats(self, target: CrawlTarget, selectors: List[str]) -> SelectorStats:
+        """Get the selector hit statistics of a target, loading saved ones first"""
+        stats = self.selector_stats.get(target.name)
+        if stats is None or stats.selectors != selectors:
+            try:
+                saved = self.db.get_selector_stats(target.name)
+            except Exception as e:
+                self.logger.warning(f"Could not load selector stats for {target.name}: {str(e)}")
+                saved = {}
+            stats = SelectorStats(selectors, saved)
+            self.selector_stats[target.name] = stats
+        return stats
+    
+    def save_selector_stats(self, target_name: str):
+        """Persist a target's selector statistics for later crawls"""
+        stats = self.selector_stats.get(target_name)
+        if stats is None:
+            return
+        try:
+            self.db.save_selector_stats(target_name, stats.to_dict())
+        except Exception as e:
+            self.logger.warning(f"Could not save selector stats for {target_name}: {str(e)}")
+    
+    async def store_businesses(self, businesses: List[Dict]) -> int:
+        """Resolve extracted businesses and queue them for batched upserts.
         
-        return businesses
+        Each business is resolved against the entity index first; a match
+        only fills in missing fields on the existing record instead of
+        inserting a duplicate. Returns the number of businesses accepted.
+        """
+        if self.entity_index is None:
+            self.entity_index = self.load_entity_index()
+        
+        accepted = 0
+        changed = []
+        for business_data in businesses:
+            existing = self.entity_index.match(business_data['name'], business_data.get('region'))
+            if existing:
+                record = dict(existing)
+                record['region'] = record.get('region') or business_data.get('region')
+                record['sector'] = record.get('sector') or business_data.get('sector')
+                if business_data.get('latitude') is not None and record.get('location_precision') != 'exact':
+                    record['latitude'] = business_data['latitude']
+                    record['longitude'] = business_data['longitude']
+                    record['location_precision'] = 'exact'
+            else:
+                bi_id = self.generate_bi_id()
+                while bi_id in self.entity_index.bi_ids:
+                    bi_id = self.generate_bi_id()
+                record = {
+                    'id': str(uuid4()),
+                    'name': business_data['name'],
+                    'bi_id': bi_id,
+                    'region': business_data.get('region'),
+                    'sector': business_data.get('sector'),
+                    'digital_score': random.randint(40, 85),
+                    'formality': random.choice(['Formal', 'Informal', 'Semi-formal']),
+                    'premium': False,
+                    'verified': False,
+                    'claimed': False,
+                    'latitude': business_data.get('latitude'),
+                    'longitude': business_data.get('longitude'),
+                }
+            
+            if record != existing:
+                self.entity_index.add(record)
+                changed.append(record)
+            accepted += 1
+        
+        await self.sink.add(changed)
+        return accepted
+    
+    async def get_throttle(self, url: str, target: CrawlTarget) -> HostThrottle:
+        """Get the rate controller for the host of a URL"""
+        host = urlparse(url).netloc
+        throttle = self.throttles.get(host)
+        if throttle is None:
+            crawl_delay = await self.robots.crawl_delay(url)
+            throttle = self.throttles.get(host)
+            if throttle is None:
+                throttle = HostThrottle(initial_delay=min(target.delay_range), min_delay=crawl_delay)
+                self.throttles[host] = throttle
+        return throttle
     
-    async def crawl_page(self, url: str) -> tuple[str, List[str]]:
-        """Crawl a single page and return content and links"""
+    async def fetch_page(self, url: str, target: CrawlTarget, fetch_state: Optional[Dict] = None) -> FetchResult:
+        """Fetch a page within its host's adaptive rate limit"""
+        throttle = await self.get_throttle(url, target)
+        await throttle.acquire()
+        fetch = FetchResult(status=0)
+        try:
+            fetch = await self.crawl_page(url, fetch_state, target.max_page_bytes)
+        finally:
+            await throttle.release(fetch.status, fetch.elapsed, fetch.retry_after)
+        return fetch
+    
+    async def crawl_page(self, url: str, fetch_state: Optional[Dict] = None,
+                         max_bytes: int = MAX_PAGE_BYTES) -> FetchResult:
+        """Fetch a single page, revalidating against any stored ETag/Last-Modified.
+        
+        The body is streamed in chunks and only read for HTML responses no
+        larger than max_bytes; anything else is abandoned as soon as the
+        headers or the running size give it away.
+        """
+        headers = {}
+        if fetch_state:
+            if fetch_state.get('etag'):
+                headers['If-None-Match'] = fetch_state['etag']
+            if fetch_state.get('last_modified'):
+                headers['If-Modified-Since'] = fetch_state['last_modified']
+        
+        host = urlparse(url).netloc
+        started = time.monotonic()
         try:
-            async with self.session.get(url) as response:
+            async with self.session.get(url, headers=headers) as response:
+                result = FetchResult(
+                    status=response.status,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified'),
+                    retry_after=parse_retry_after(response.headers.get('Retry-After'))
+                )
+                size = None
                 if response.status == 200:
-                    html = await response.text()
+                    result.aborted = self.check_response(response, max_bytes)
+                    body = None
+                    if not result.aborted:
+                        body = await self.read_body(response, max_bytes)
+                        if body is None:
+                            result.aborted = 'too_large'
                     
-                    # Extract links for further crawling
-                    soup = BeautifulSoup(html, 'html.parser')
-                    links = []
-                    for link in soup.find_all('a', href=True):
-                        absolute_url = urljoin(url, link['href'])
-                        links.append(absolute_url)
-                    
-                    return html, links
-                else:
+                    if result.aborted:
+                        # Drop the connection rather than drain an unwanted body
+                        response.close()
+                        self.logger.info(f"Not downloading {url}: {result.aborted.replace('_', ' ')}")
+                        self.metrics.record_abort(result.aborted)
+                    else:
+                        size = len(body)
+                        encoding = sniff_charset(response.charset, bytes(body[:SNIFF_BYTES]))
+                        result.html = body.decode(encoding, errors='replace')
+                        del body
+                elif response.status != 304:
                     self.logger.warning(f"HTTP {response.status} for {url}")
-                    return "", []
+                result.elapsed = time.monotonic() - started
+                self.metrics.observe('fetch', result.elapsed)
+                self.metrics.record_response(host, response.status, size)
+                return result
         
         except Exception as e:
             self.logger.error(f"Error crawling {url}: {str(e)}")
-            return "", []
+            self.metrics.record_response(host, 0)
+            return FetchResult(status=0)
+    
+    @staticmethod
+    def check_response(response: aiohttp.ClientResponse, max_bytes: int) -> Optional[str]:
+        """Reason to refuse a response based on its headers, or None to read it"""
+        content_type = response.content_type
+        # aiohttp reports a missing Content-Type as application/octet-stream
+        if 'Content-Type' in response.headers and content_type not in HTML_CONTENT_TYPES:
+            return 'not_html'
+        if response.content_length is not None and response.content_length > max_bytes:
+            return 'too_large'
+        return None
+    
+    @staticmethod
+    async def read_body(response: aiohttp.ClientResponse, max_bytes: int) -> Optional[bytearray]:
+        """Read a body in chunks into one buffer; None once it exceeds max_bytes"""
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(FETCH_CHUNK_SIZE):
+            body += chunk
+            if len(body) > max_bytes:
+                return None
+        return body
     
-    async def crawl_target(self, target: CrawlTarget) -> CrawlResult:
-        """Crawl a specific target configuration"""
-        start_time = datetime.now()
-        visited_urls = set()
-        pages_crawled = 0
-        businesses_found = 0
-        errors = []
+    def archive_page(self, url: str, target_name: str, html: str,
+                     content_hash: str) -> Optional[asyncio.Future]:
+        """Write a page to the archive in a worker thread; returns a future to await"""
+        if self.archive is None:
+            return None
         
-        self.logger.info(f"Starting crawl for target: {target.name}")
+        def append():
+            try:
+                self.archive.append(url, target_name, html, content_hash)
+            except Exception as e:
+                self.logger.warning(f"Could not archive {url}: {str(e)}")
         
+        return asyncio.get_running_loop().run_in_executor(None, append)
+    
+    def load_fetch_state(self, url: str) -> Optional[Dict]:
+        """Get the stored validators, content hash and links for a URL"""
+        try:
+            return self.db.get_fetch_state(url)
+        except Exception as e:
+            self.logger.warning(f"Could not load fetch state for {url}: {str(e)}")
+            return None
+    
+    def save_fetch_state(self, fetch_state: Dict):
+        """Persist the fetch state of a URL for conditional re-crawls"""
+        try:
+            self.db.save_fetch_state(fetch_state)
+        except Exception as e:
+            self.logger.warning(f"Could not save fetch state for {fetch_state['url']}: {str(e)}")
+    
+    def load_seen_filter(self, target: CrawlTarget) -> BloomFilter:
+        """Load the persisted seen-set for an incremental target, or start a fresh one.
+        
+        A seen-set is started afresh once it is too old, was sized for a
+        different max_pages, or could pass its capacity during this run,
+        since past capacity its false positives would skip new URLs. The
+        pages it forgets are revalidated rather than downloaded again.
+        """
+        capacity = target.url_filter_capacity()
+        if target.incremental:
+            try:
+                stored = self.db.load_seen_filter(target.name)
+                if stored:
+                    data, age_days = stored
+                    bloom = BloomFilter.from_bytes(data)
+                    if age_days > target.seen_filter_max_age_days:
+                        reason = f"it is {age_days:.0f} days old"
+                    elif bloom.capacity != capacity:
+                        reason = f"it was sized for {bloom.capacity} URLs, not {capacity}"
+                    elif bloom.is_full(headroom=target.max_pages):
+                        reason = f"it holds {len(bloom)} of {bloom.capacity} URLs"
+                    else:
+                        return bloom
+                    self.logger.info(f"Starting a new seen-set for {target.name}: {reason}")
+                    self.db.delete_seen_filter(target.name)
+            except Exception as e:
+                self.logger.warning(f"Could not load seen-set for {target.name}: {str(e)}")
+        return BloomFilter(capacity=capacity)
+    
+    def load_checkpoint(self, target: CrawlTarget) -> Optional[CrawlJob]:
+        """Get the unfinished job of a target, if a previous crawl was interrupted"""
+        try:
+            checkpoint = self.db.get_crawl_checkpoint(target.name)
+            if checkpoint:
+                return CrawlJob.from_checkpoint(target.name, checkpoint)
+        except Exception as e:
+            self.logger.warning(f"Could not load checkpoint for {target.name}: {str(e)}")
+        return None
+    
+    async def save_checkpoint(self, job: CrawlJob):
+        """Persist job progress; buffered businesses are written first"""
+        await self.sink.flush()
+        self.save_selector_stats(job.target_name)
+        checkpoint = job.to_checkpoint()
+        loop = asyncio.get_running_loop()
         try:
-            # BFS crawling
-            url_queue = target.start_urls.copy()
-            depth_map = {url: 0 for url in target.start_urls}
+            await loop.run_in_executor(None, self.db.save_crawl_checkpoint, job.target_name, checkpoint)
+        except Exception as e:
+            self.logger.warning(f"Could not checkpoint crawl of {job.target_name}: {str(e)}")
+    
+    async def find_sitemaps(self, target: CrawlTarget) -> List[str]:
+        """Sitemaps of a target: configured ones, else those in robots.txt, else /sitemap.xml"""
+        if target.sitemap_urls:
+            return list(target.sitemap_urls)
+        sitemaps = []
+        for start_url in target.start_urls:
+            found = await self.robots.sitemaps(start_url)
+            if not found:
+                parts = urlparse(start_url)
+                found = [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+            sitemaps.extend(url for url in found if url not in sitemaps)
+        return sitemaps
+    
+    def changed_since_crawl(self, entries: List[tuple]) -> List[tuple]:
+        """Keep the (url, lastmod) entries whose lastmod differs from the one last crawled"""
+        try:
+            known = self.db.get_sitemap_lastmods([url for url, _ in entries])
+        except Exception as e:
+            self.logger.warning(f"Could not load sitemap lastmods: {str(e)}")
+            return entries
+        return [(url, lastmod) for url, lastmod in entries if lastmod is None or known.get(url) != lastmod]
+    
+    async def sitemap_seeds(self, target: CrawlTarget, limit: int,
+                            skip: Optional[Callable[[str], object]] = None) -> List[tuple]:
+        """Collect up to limit (url, lastmod) pairs from the target's sitemaps.
+        
+        Sitemap indexes are followed, files are parsed as they stream in and
+        reading stops once enough URLs are found. URLs whose lastmod matches
+        the one recorded at their last crawl are left out and passed to skip.
+        URLs without a lastmod are always included.
+        """
+        pending = deque(await self.find_sitemaps(target))
+        read = set()
+        seeds = []
+        
+        def add_batch(batch: List[tuple]):
+            changed = self.changed_since_crawl(batch)
+            if skip:
+                for url in {url for url, _ in batch} - {url for url, _ in changed}:
+                    skip(url)
+            seeds.extend(changed)
+        
+        while pending and len(read) < MAX_SITEMAP_FILES and len(seeds) < limit:
+            sitemap_url = pending.popleft()
+            if sitemap_url in read:
+                continue
+            read.add(sitemap_url)
             
-            while url_queue and pages_crawled < target.max_pages:
-                url = url_queue.pop(0)
-                current_depth = depth_map.get(url, 0)
-                
-                if url in visited_urls or current_depth > target.max_depth:
-                    continue
-                
-                # Check if URL is allowed
-                parsed_url = urlparse(url)
-                if not any(domain in parsed_url.netloc for domain in target.allowed_domains):
-                    continue
-                
-                visited_urls.add(url)
-                
-                # Add random delay to be polite
-                delay = random.uniform(*target.delay_range)
-                await asyncio.sleep(delay)
-                
-                # Crawl the page
-                html, links = await self.crawl_page(url)
-                if html:
-                    pages_crawled += 1
+            batch = []
+            entries = read_sitemap(self.session, sitemap_url)
+            try:
+                async for entry in entries:
+                    if entry.is_sitemap:
+                        pending.append(entry.loc)
+                        continue
+                    url = canonicalize_url(entry.loc)
+                    if url and target.allows(url):
+                        batch.append((url, entry.lastmod))
+                    if len(batch) >= 500:
+                        add_batch(batch)
+                        batch = []
+                        if len(seeds) >= limit:
+                            break
+            finally:
+                await entries.aclose()
+            if batch:
+                add_batch(batch)
+        
+        seeds = seeds[:limit]
+        self.logger.info(f"Found {len(seeds)} new or changed sitemap URLs in {len(read)} sitemaps of {target.name}")
+        return seeds
+    
+    async def seed_from_sitemaps(self, job: CrawlJob, target: CrawlTarget):
+        """Queue a new job's new or changed sitemap URLs behind its start URLs"""
+        # Leave room in max_pages for the start URLs
+        limit = max(0, target.max_pages - len(job.url_queue))
+        seeds = await self.sitemap_seeds(target, limit, skip=job.queued_urls.add)
+        for url, lastmod in seeds:
+            if job.queued_urls.add(url):
+                job.url_queue.append((url, 1))
+            if lastmod:
+                # Changed since it was last crawled, so fetch it even if seen
+                job.sitemap_lastmod[url] = lastmod
+                job.revisit.add(url)
+    
+    def save_sitemap_lastmod(self, target_name: str, url: str, lastmod: str):
+        try:
+            self.db.save_sitemap_lastmods(target_name, [(url, lastmod)])
+        except Exception as e:
+            self.logger.warning(f"Could not save sitemap lastmod for {url}: {str(e)}")
+    
+    def new_job(self, target: CrawlTarget) -> CrawlJob:
+        """Start a job at the target's start URLs"""
+        job = CrawlJob(
+            target_name=target.name,
+            start_time=datetime.now(),
+            visited_urls=self.load_seen_filter(target),
+            queued_urls=BloomFilter(capacity=target.url_filter_capacity())
+        )
+        # Start URLs are always revisited so incremental targets still
+        # discover new listings
+        for start_url in target.start_urls:
+            canonical = canonicalize_url(start_url)
+            if canonical and job.queued_urls.add(canonical):
+                job.url_queue.append((canonical, 0))
+                job.revisit.add(canonical)
+        return job
+    
+    async def crawl_url(self, target: CrawlTarget, url: str, selectors: Optional[List[str]] = None) -> PageOutcome:
+        """Fetch one page, extract it in the pool and store its businesses"""
+        selectors = selectors or target.business_selectors or self.default_selectors
+        outcome = PageOutcome()
+        
+        if not await self.robots.can_fetch(url):
+            self.logger.info(f"Skipping {url}: disallowed by robots.txt")
+            return outcome
+        
+        # Crawl the page, revalidating it if it was fetched before
+        previous_state = self.load_fetch_state(url) if target.conditional_fetch else None
+        fetch = await self.fetch_page(url, target, previous_state)
+        fetch_state = {
+            'url': url,
+            'target_name': target.name,
+            'etag': fetch.etag,
+            'last_modified': fetch.last_modified,
+            'last_status': fetch.status
+        }
+        
+        if fetch.status == 304 and previous_state:
+            # Not modified: reuse the links found last time without parsing
+            outcome.fetched = outcome.skipped = True
+            outcome.links = previous_state['links']
+            fetch_state.update({
+                'etag': fetch.etag or previous_state['etag'],
+                'last_modified': fetch.last_modified or previous_state['last_modified'],
+                'content_hash': previous_state['content_hash'],
+                'links': previous_state['links']
+            })
+            self.save_fetch_state(fetch_state)
+        
+        elif fetch.html:
+            outcome.fetched = True
+            fetch_state['content_hash'] = hashlib.sha256(fetch.html.encode('utf-8')).hexdigest()
+            
+            if previous_state and previous_state['content_hash'] == fetch_state['content_hash']:
+                # Same content as last time (server ignores validators)
+                outcome.skipped = True
+                outcome.links = fetch_state['links'] = previous_state['links']
+                self.save_fetch_state(fetch_state)
+                self.metrics.record_page()
+                return outcome
+            
+            # Archived while it is parsed in the extraction pool; other
+            # pages keep fetching meanwhile
+            archived = self.archive_page(url, target.name, fetch.html, fetch_state['content_hash'])
+            # Only selectors that have been matching on this target, plus periodic probes
+            selector_stats = self.get_selector_stats(target, selectors)
+            active_selectors = selector_stats.choose()
+            try:
+                page = await self.submit_extraction(url, fetch.html, active_selectors)
+            except Exception as e:
+                self.logger.error(f"Error extracting businesses from {url}: {str(e)}")
+                return outcome
+            finally:
+                if archived:
+                    await archived
+            
+            self.metrics.observe('parse', page['timings']['parse'])
+            self.metrics.observe('extract', page['timings']['extract'])
+            for selector, change in selector_stats.record(active_selectors, page['selector_hits']):
+                self.logger.info(f"Selector {selector!r} {change} for {target.name}")
+            outcome.businesses = await self.store_businesses(page['businesses'])
+            outcome.links = page['links']
+            
+            # Remember validators and links so the next run can skip this page,
+            # unless demoted selectors were left out: it is extracted again then
+            fetch_state['links'] = page['links']
+            if len(active_selectors) < len(selector_stats.selectors):
+                fetch_state.update(etag=None, last_modified=None, content_hash=None)
+            self.save_fetch_state(fetch_state)
+        
+        elif previous_state:
+            previous_state['last_status'] = fetch.status
+            self.save_fetch_state(previous_state)
+        
+        if outcome.fetched:
+            self.metrics.record_page(outcome.businesses)
+        return outcome
+    
+    async def crawl_target(self, target: CrawlTarget,
+                           on_progress: Optional[Callable[[CrawlJob], None]] = None) -> CrawlResult:
+        """Crawl a specific target configuration.
+        
+        Progress is checkpointed every CHECKPOINT_INTERVAL seconds; if a
+        checkpoint exists the crawl resumes from it instead of starting over.
+        on_progress, if given, is called with the job as pages complete.
+        """
+        job = self.load_checkpoint(target)
+        if job:
+            self.logger.info(
+                f"Resuming crawl for target: {target.name} "
+                f"({job.pages_crawled} pages done, {len(job.url_queue)} queued)"
+            )
+        else:
+            job = self.new_job(target)
+            if target.use_sitemaps:
+                await self.seed_from_sitemaps(job, target)
+            self.logger.info(f"Starting crawl for target: {target.name}")
+        
+        self.entity_index = self.load_entity_index()
+        self.sink = BusinessSink(self.db, errors=job.errors, metrics=self.metrics)
+        visited_urls = job.visited_urls
+        url_queue = job.url_queue
+        
+        # Pages being fetched or extracted, task -> (url, depth); bounded by max_in_flight
+        in_flight = {}
+        selectors = target.business_selectors or self.default_selectors
+        last_checkpoint = time.monotonic()
+        
+        def enqueue_links(links: List[str], current_depth: int):
+            """Add new links to queue for next depth level"""
+            if current_depth < target.max_depth:
+                for link in links:
+                    canonical = canonicalize_url(link)
+                    if canonical and canonical not in visited_urls and job.queued_urls.add(canonical):
+                        url_queue.append((canonical, current_depth + 1))
+        
+        async def process_url(url: str, current_depth: int):
+            """Crawl one page, then record its outcome and queue its links"""
+            outcome = await self.crawl_url(target, url, selectors)
+            lastmod = job.sitemap_lastmod.pop(url, None)
+            if lastmod and outcome.fetched:
+                self.save_sitemap_lastmod(target.name, url, lastmod)
+            # Counted once done, so a page interrupted mid-way is not counted twice on resume
+            job.pages_crawled += outcome.fetched
+            job.pages_skipped += outcome.skipped
+            job.businesses_found += outcome.businesses
+            enqueue_links(outcome.links, current_depth)
+        
+        try:
+            while url_queue or in_flight:
+                # Dispatch while there is room; per-host throttles pace the fetches
+                while (url_queue and len(in_flight) < self.max_in_flight and
+                       job.pages_crawled + len(in_flight) < target.max_pages):
+                    url, current_depth = url_queue.popleft()
                     
-                    # Extract businesses
-                    selectors = target.business_selectors or self.default_selectors
-                    businesses = await self.extract_businesses_from_page(url, html, selectors)
+                    if current_depth > target.max_depth:
+                        continue
+                    if url in visited_urls and url not in job.revisit:
+                        continue
                     
-                    # Store businesses in database
-                    for business_data in businesses:
-                        try:
-                            business = type('Business', (), {
-                                'id': str(random.randint(100000, 999999)),
-                                'name': business_data['name'],
-                                'bi_id': self.generate_bi_id(),
-                                'region': business_data.get('region'),
-                                'sector': business_data.get('sector'),
-                                'digital_score': random.randint(40, 85),
-                                'formality': random.choice(['Formal', 'Informal', 'Semi-formal']),
-                                'premium': False,
-                                'verified': False,
-                                'claimed': False,
-                            })
-                            
-                            self.db.add_business(business)
-                            businesses_found += 1
-                            
-                        except Exception as e:
-                            error_msg = f"Error storing business {business_data['name']}: {str(e)}"
-                            errors.append(error_msg)
-                            self.logger.error(error_msg)
+                    # Check if URL is allowed
+                    if not target.allows(url):
+                        continue
                     
-                    # Add new links to queue for next depth level
-                    if current_depth < target.max_depth:
-                        for link in links:
-                            if link not in visited_urls:
-                                depth_map[link] = current_depth + 1
-                                url_queue.append(link)
+                    visited_urls.add(url)
+                    job.revisit.discard(url)
+                    task = asyncio.create_task(process_url(url, current_depth))
+                    in_flight[task] = (url, current_depth)
+                
+                if not in_flight:
+                    break
+                
+                job.in_flight = list(in_flight.values())
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    del in_flight[task]
+                    task.result()
+                job.in_flight = list(in_flight.values())
+                self.metrics.set_queue(target.name, len(url_queue), len(in_flight))
+                if on_progress:
+                    on_progress(job)
                 
                 # Progress logging
-                if pages_crawled % 10 == 0:
-                    self.logger.info(f"Crawled {pages_crawled} pages, found {businesses_found} businesses")
+                if job.pages_crawled % 10 == 0:
+                    self.logger.info(f"Crawled {job.pages_crawled} pages, found {job.businesses_found} businesses")
+                
+                if time.monotonic() - last_checkpoint >= CHECKPOINT_INTERVAL:
+                    await self.save_checkpoint(job)
+                    last_checkpoint = time.monotonic()
+        
+        except asyncio.CancelledError:
+            # Service shutdown: keep the progress so the next run resumes here
+            for task in in_flight:
+                task.cancel()
+            job.in_flight = list(in_flight.values())
+            self.metrics.clear_queue(target.name)
+            await self.save_checkpoint(job)
+            raise
         
         except Exception as e:
             error_msg = f"Critical error during crawl: {str(e)}"
-            errors.append(error_msg)
+            job.errors.append(error_msg)
             self.logger.error(error_msg)
+            for task in in_flight:
+                task.cancel()
+        
+        self.metrics.clear_queue(target.name)
+        
+        # Write whatever is still buffered
+        await self.sink.flush()
+        job.businesses_found -= self.sink.failed
+        self.save_selector_stats(target.name)
+        
+        try:
+            self.db.delete_crawl_checkpoint(target.name)
+        except Exception as e:
+            self.logger.warning(f"Could not clear checkpoint for {target.name}: {str(e)}")
+        
+        if target.incremental:
+            try:
+                self.db.save_seen_filter(target.name, visited_urls.to_bytes())
+            except Exception as e:
+                self.logger.warning(f"Could not persist seen-set for {target.name}: {str(e)}")
         
         end_time = datetime.now()
+        errors = job.errors
         
         result = CrawlResult(
             target_name=target.name,
-            start_time=start_time,
+            start_time=job.start_time,
             end_time=end_time,
-            pages_crawled=pages_crawled,
-            businesses_found=businesses_found,
+            pages_crawled=job.pages_crawled,
+            businesses_found=job.businesses_found,
             errors=errors,
-            success=len(errors) == 0
+            success=len(errors) == 0,
+            pages_skipped=job.pages_skipped
         )
         
         # Update statistics
         self.stats['total_crawls'] += 1
-        self.stats['total_businesses'] += businesses_found
-        self.stats['total_pages'] += pages_crawled
+        self.stats['total_businesses'] += job.businesses_found
+        self.stats['total_pages'] += job.pages_crawled
+        self.stats['total_pages_skipped'] += job.pages_skipped
         self.stats['last_crawl'] = end_time
         if errors:
             self.stats['errors'].extend(errors[-5:])  # Keep last 5 errors
         
-        self.logger.info(f"Crawl completed: {businesses_found} businesses from {pages_crawled} pages")
+        self.logger.info(
+            f"Crawl completed: {job.businesses_found} businesses from {job.pages_crawled} pages "
+            f"({job.pages_skipped} unchanged)"
+        )
         
         return result
 
@@ -325,16 +1037,56 @@ class EnhancedCrawler:
 class CrawlerScheduler:
     """Scheduler for managing crawler runs"""
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, max_concurrent_crawls: int = 2, distributed: bool = False):
         self.db = database
+        # Distributed mode only seeds the shared frontier; crawl workers fetch
+        self.distributed = distributed
         self.crawler = None
         self.targets: List[CrawlTarget] = []
         self.running = False
         self.scheduler_thread = None
         self.logger = logging.getLogger(__name__)
         
-        # Load default targets
-        self.load_default_targets()
+        # Min-heap of (next crawl timestamp, sequence, target name). Entries
+        # are never removed in place; stale ones are dropped when popped.
+        self.max_concurrent_crawls = max_concurrent_crawls
+        self.heap: List[tuple] = []
+        self.heap_lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.running_targets: Set[str] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        # HTTP client shared by every crawl on the scheduler loop
+        self.http_client: Optional[HttpClient] = None
+        
+        # On-demand crawls by id, oldest first; only the last max_runs are kept
+        self.runs: Dict[str, CrawlRun] = {}
+        self.max_runs = 100
+        
+        # Load saved targets, seeding the registry with the defaults on first run
+        self.load_targets()
+    
+    def load_targets(self):
+        """Load crawl targets from the target registry"""
+        try:
+            saved = self.db.get_crawl_targets()
+        except Exception as e:
+            self.logger.error(f"Error loading crawl targets: {str(e)}")
+            saved = []
+        
+        if saved:
+            self.targets = [target_from_dict(config) for config in saved]
+        else:
+            self.load_default_targets()
+            for target in self.targets:
+                self.save_target(target)
+    
+    def save_target(self, target: CrawlTarget):
+        """Persist a target's configuration and crawl times"""
+        try:
+            self.db.save_crawl_target(target.name, target_to_dict(target))
+        except Exception as e:
+            self.logger.error(f"Error saving crawl target {target.name}: {str(e)}")
     
     def load_default_targets(self):
         """Load default crawl targets"""
@@ -383,11 +1135,18 @@ class CrawlerScheduler:
     def add_target(self, target: CrawlTarget):
         """Add a new crawl target"""
         self.targets.append(target)
+        self.save_target(target)
+        self.schedule(target)
         self.logger.info(f"Added crawl target: {target.name}")
     
     def remove_target(self, target_name: str):
         """Remove a crawl target"""
         self.targets = [t for t in self.targets if t.name != target_name]
+        try:
+            self.db.delete_crawl_target(target_name)
+            self.db.delete_crawl_checkpoint(target_name)
+        except Exception as e:
+            self.logger.error(f"Error deleting crawl target {target_name}: {str(e)}")
         self.logger.info(f"Removed crawl target: {target_name}")
     
     def get_targets(self) -> List[CrawlTarget]:
@@ -401,21 +1160,137 @@ class CrawlerScheduler:
                 return target
         return None
     
-    async def run_single_crawl(self, target_name: str) -> CrawlResult:
+    def new_crawler(self) -> EnhancedCrawler:
+        """Crawler for a run; on the scheduler loop it uses the shared HTTP client"""
+        client = None
+        if self.loop is not None and self.loop is asyncio.get_running_loop():
+            if self.http_client is None:
+                self.http_client = HttpClient(crawl_metrics)
+            client = self.http_client
+        return EnhancedCrawler(self.db, client=client)
+    
+    async def run_single_crawl(self, target_name: str,
+                               on_progress: Optional[Callable[[CrawlJob], None]] = None) -> CrawlResult:
         """Run a single crawl for a specific target"""
         target = self.get_target(target_name)
         if not target:
             raise ValueError(f"Target {target_name} not found")
         
-        async with EnhancedCrawler(self.db) as crawler:
-            result = await crawler.crawl_target(target)
+        async with self.new_crawler() as crawler:
+            result = await crawler.crawl_target(target, on_progress)
             
             # Update target's last crawl time
             target.last_crawl = result.end_time
             target.next_crawl = result.end_time + timedelta(hours=target.crawl_interval_hours)
+            self.save_target(target)
+            self.schedule(target)
             
             return result
     
+    def start_run(self, target_name: str) -> CrawlRun:
+        """Start a crawl in the background and return its run for tracking.
+        
+        The crawl runs on the scheduler's event loop when the scheduler is
+        running, otherwise on the caller's loop. Must be called from a
+        coroutine.
+        """
+        target = self.get_target(target_name)
+        if not target:
+            raise ValueError(f"Target {target_name} not found")
+        if target_name in self.running_targets:
+            raise RuntimeError(f"Target {target_name} is already being crawled")
+        
+        run = CrawlRun(id=uuid4().hex, target_name=target_name, max_pages=target.max_pages)
+        return self.launch_run(run, lambda on_progress: self.run_single_crawl(target_name, on_progress))
+    
+    def start_adhoc_run(self, target: CrawlTarget) -> CrawlRun:
+        """Crawl a one-off target in the background, like start_run.
+        
+        The target is not added to the registry or rescheduled.
+        """
+        async def crawl(on_progress):
+            async with self.new_crawler() as crawler:
+                return await crawler.crawl_target(target, on_progress)
+        
+        run = CrawlRun(id=uuid4().hex, target_name=target.name, max_pages=target.max_pages, adhoc=True)
+        return self.launch_run(run, crawl)
+    
+    def launch_run(self, run: CrawlRun, crawl: Callable) -> CrawlRun:
+        """Track a run and start its crawl coroutine"""
+        self.runs[run.id] = run
+        while len(self.runs) > self.max_runs:
+            oldest = next((r for r in self.runs.values() if r.finished), None)
+            if oldest is None:
+                break
+            del self.runs[oldest.id]
+        
+        # Claimed now so the scheduler does not start the same target meanwhile
+        self.running_targets.add(run.target_name)
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            run.future = asyncio.run_coroutine_threadsafe(self.execute_run(run, crawl), loop)
+        else:
+            run.future = asyncio.ensure_future(self.execute_run(run, crawl))
+        run.future.add_done_callback(lambda _: self.release_run(run))
+        self.logger.info(f"Started crawl run {run.id} for {run.target_name}")
+        return run
+    
+    async def execute_run(self, run: CrawlRun, crawl: Callable):
+        """Await a run's crawl, keeping the run's progress up to date"""
+        run.status = 'running'
+        run.started_at = datetime.now()
+        try:
+            result = await crawl(run.update)
+            run.pages_crawled = result.pages_crawled
+            run.pages_skipped = result.pages_skipped
+            run.businesses_found = result.businesses_found
+            run.errors = result.errors[-5:]
+            run.error_count = len(result.errors)
+            run.status = 'completed' if result.success else 'failed'
+        except asyncio.CancelledError:
+            run.status = 'cancelled'
+            if run.cancel_requested or run.adhoc:
+                # Cancelled by a user, or never run again: do not keep a checkpoint
+                try:
+                    self.db.delete_crawl_checkpoint(run.target_name)
+                except Exception as e:
+                    self.logger.warning(f"Could not clear checkpoint for {run.target_name}: {str(e)}")
+            raise
+        except Exception as e:
+            run.errors.append(str(e))
+            run.error_count += 1
+            run.status = 'failed'
+            self.logger.error(f"Crawl run {run.id} failed: {str(e)}")
+        finally:
+            run.eta_seconds = None
+            run.finished_at = datetime.now()
+            self.running_targets.discard(run.target_name)
+            self.notify()
+    
+    def release_run(self, run: CrawlRun):
+        """Close out a run that was cancelled before it started"""
+        if run.status == 'queued':
+            run.status = 'cancelled'
+            run.finished_at = datetime.now()
+            self.running_targets.discard(run.target_name)
+    
+    def cancel_run(self, run_id: str) -> Optional[CrawlRun]:
+        """Cancel a running crawl; progress made so far is kept"""
+        run = self.runs.get(run_id)
+        if run is None:
+            return None
+        if not run.finished and run.future is not None:
+            run.cancel_requested = True
+            run.future.cancel()
+        return run
+    
+    def get_run(self, run_id: str) -> Optional[CrawlRun]:
+        return self.runs.get(run_id)
+    
+    def get_runs(self) -> List[CrawlRun]:
+        """Recent on-demand crawls, newest first"""
+        return list(reversed(list(self.runs.values())))
+    
     def get_due_targets(self) -> List[CrawlTarget]:
         """Get targets that are due for crawling"""
         now = datetime.now()
@@ -430,39 +1305,135 @@ class CrawlerScheduler:
         
         return due_targets
     
+    @staticmethod
+    def scheduled_time(target: CrawlTarget) -> float:
+        """Heap key of a target: its next crawl time, or 0 to crawl right away"""
+        return target.next_crawl.timestamp() if target.next_crawl else 0.0
+    
+    def schedule(self, target: CrawlTarget):
+        """Queue a target at its next crawl time and wake the scheduler.
+        
+        Call this whenever a target is added or its next_crawl/active flag changes.
+        """
+        with self.heap_lock:
+            heapq.heappush(self.heap, (self.scheduled_time(target), next(self.sequence), target.name))
+        self.notify()
+    
+    def notify(self):
+        """Wake the scheduler loop from any thread"""
+        loop, wakeup = self.loop, self.wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+    
+    def rebuild_heap(self):
+        """Rebuild the heap from the current target list"""
+        with self.heap_lock:
+            self.heap = [
+                (self.scheduled_time(t), next(self.sequence), t.name)
+                for t in self.targets
+            ]
+            heapq.heapify(self.heap)
+    
+    def pop_due_targets(self, limit: int) -> List[CrawlTarget]:
+        """Pop up to limit targets whose crawl time has come"""
+        due = []
+        now = time.time()
+        with self.heap_lock:
+            while self.heap and len(due) < limit and self.heap[0][0] <= now:
+                when, _, name = heapq.heappop(self.heap)
+                target = self.get_target(name)
+                # Skip entries for removed, paused, running or rescheduled targets
+                if (target is None or not target.active or name in self.running_targets or
+                        when != self.scheduled_time(target) or any(t.name == name for t in due)):
+                    continue
+                due.append(target)
+        return due
+    
+    def seconds_until_next(self, busy: int) -> Optional[float]:
+        """How long the loop can sleep; None waits for a wakeup"""
+        if busy >= self.max_concurrent_crawls:
+            return None  # A finishing crawl will wake the loop
+        with self.heap_lock:
+            if not self.heap:
+                return None
+            return min(3600.0, max(0.0, self.heap[0][0] - time.time()))
+    
+    async def run_scheduled_crawl(self, target: CrawlTarget):
+        """Run one due target, then put it back on the heap"""
+        try:
+            if self.distributed:
+                queued = seed_frontier(self.db, target)
+                if target.use_sitemaps:
+                    async with self.new_crawler() as crawler:
+                        seeds = await crawler.sitemap_seeds(target, max(0, target.max_pages - queued))
+                    queued += self.db.enqueue_frontier(target.name, [(url, 1) for url, _ in seeds])
+                    # Workers do not see lastmods, so they are recorded once queued
+                    self.db.save_sitemap_lastmods(target.name, [s for s in seeds if s[1]])
+                self.logger.info(f"Queued {queued} start URLs of {target.name} for crawl workers")
+                target.last_crawl = datetime.now()
+                target.next_crawl = target.last_crawl + timedelta(hours=target.crawl_interval_hours)
+                self.save_target(target)
+                return
+            
+            result = await self.run_single_crawl(target.name)
+            self.logger.info(
+                f"Completed crawl for {target.name}: "
+                f"{result.businesses_found} businesses from {result.pages_crawled} pages"
+            )
+        except Exception as e:
+            self.logger.error(f"Error crawling {target.name}: {str(e)}")
+            # Retry failed targets in an hour rather than immediately
+            target.next_crawl = datetime.now() + timedelta(hours=1)
+            self.save_target(target)
+        finally:
+            self.running_targets.discard(target.name)
+            self.schedule(target)
+    
     async def scheduler_loop(self):
-        """Main scheduler loop"""
+        """Main scheduler loop.
+        
+        Sleeps until the earliest next_crawl on the heap or until woken by
+        a target change or a finished crawl, and runs up to
+        max_concurrent_crawls targets in parallel.
+        """
         self.logger.info("Crawler scheduler started")
+        self.loop = asyncio.get_running_loop()
+        self.wakeup = asyncio.Event()
+        self.rebuild_heap()
+        crawls = set()
         
         while self.running:
             try:
-                due_targets = self.get_due_targets()
+                self.wakeup.clear()
                 
+                due_targets = self.pop_due_targets(self.max_concurrent_crawls - len(self.running_targets))
                 if due_targets:
                     self.logger.info(f"Found {len(due_targets)} targets due for crawling")
-                    
-                    for target in due_targets:
-                        if not self.running:
-                            break
-                        
-                        try:
-                            result = await self.run_single_crawl(target.name)
-                            self.logger.info(
-                                f"Completed crawl for {target.name}: "
-                                f"{result.businesses_found} businesses from {result.pages_crawled} pages"
-                            )
-                        except Exception as e:
-                            self.logger.error(f"Error crawling {target.name}: {str(e)}")
                 
-                # Sleep for 1 hour before checking again
-                for _ in range(3600):  # 1 hour = 3600 seconds
-                    if not self.running:
-                        break
-                    await asyncio.sleep(1)
+                for target in due_targets:
+                    self.running_targets.add(target.name)
+                    task = asyncio.create_task(self.run_scheduled_crawl(target))
+                    crawls.add(task)
+                    task.add_done_callback(crawls.discard)
+                
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), self.seconds_until_next(len(self.running_targets)))
+                except asyncio.TimeoutError:
+                    pass
                 
             except Exception as e:
                 self.logger.error(f"Error in scheduler loop: {str(e)}")
                 await asyncio.sleep(60)  # Wait 1 minute before retrying
+        
+        for task in crawls:
+            task.cancel()
+        if crawls:
+            await asyncio.gather(*crawls, return_exceptions=True)
+        if self.http_client is not None:
+            await self.http_client.close()
+            self.http_client = None
+        self.loop = None
+        self.wakeup = None
     
     def start(self):
         """Start the scheduler"""
@@ -480,6 +1451,7 @@ class CrawlerScheduler:
     def stop(self):
         """Stop the scheduler"""
         self.running = False
+        self.notify()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
         self.logger.info("Crawler scheduler stopped")
@@ -494,6 +1466,10 @@ class CrawlerScheduler:
             'active_targets': len([t for t in self.targets if t.active]),
             'due_targets': len(due_targets),
             'due_target_names': [t.name for t in due_targets],
+            'running_targets': sorted(self.running_targets),
+            'max_concurrent_crawls': self.max_concurrent_crawls,
+            'metrics': crawl_metrics.snapshot(),
+            'http_client': self.http_client.get_stats() if self.http_client else None,
             'next_crawl_times': {
                 t.name: t.next_crawl.isoformat() if t.next_crawl else None 
                 for t in self.targets
@@ -504,17 +1480,17 @@ class CrawlerScheduler:
 # Global scheduler instance
 crawler_scheduler = None
 
-def get_crawler_scheduler() -> CrawlerScheduler:
+def get_crawler_scheduler(distributed: bool = False) -> CrawlerScheduler:
     """Get or create the global crawler scheduler"""
     global crawler_scheduler
     if crawler_scheduler is None:
         db = Database()
-        crawler_scheduler = CrawlerScheduler(db)
+        crawler_scheduler = CrawlerScheduler(db, distributed=distributed)
     return crawler_scheduler
 
-def start_crawler_service():
+def start_crawler_service(distributed: bool = False):
     """Start the crawler service"""
-    scheduler = get_crawler_scheduler()
+    scheduler = get_crawler_scheduler(distributed)
     scheduler.start()
     return scheduler
 
@@ -523,6 +1499,7 @@ def stop_crawler_service():
     global crawler_scheduler
     if crawler_scheduler:
         crawler_scheduler.stop()
+    shutdown_extraction_pool()
 
 if __name__ == "__main__":
     # Setup logging
@@ -531,8 +1508,25 @@ if __name__ == "__main__":
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    # Start the scheduler
-    scheduler = start_crawler_service()
+    # `python crawler_engine.py worker [...]` runs distributed crawl workers
+    if len(sys.argv) > 1 and sys.argv[1] == "worker":
+        from crawl_worker import main
+        sys.exit(main(sys.argv[2:]))
+    
+    # `python crawler_engine.py replay [...]` re-extracts archived pages
+    if len(sys.argv) > 1 and sys.argv[1] == "replay":
+        from crawl_replay import main
+        sys.exit(main(sys.argv[2:]))
+    
+    # `python crawler_engine.py serve [...]` runs the crawler service that the
+    # API controls over a Unix socket (BIZINTEL_CRAWLER_MODE=process)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from crawl_service import main
+        sys.exit(main(sys.argv[2:]))
+    
+    # Start the scheduler; with --distributed it only queues due targets
+    # for crawl workers
+    scheduler = start_crawler_service(distributed="--distributed" in sys.argv)
     
     try:
         # Keep the main thread alive
@@ -1,7 +1,24 @@
+import json
 import sqlite3
+import time
 from typing import Optional
 from contextlib import contextmanager
 
+from gazetteer import geocode
+
+UPSERT_BUSINESS = """INSERT OR REPLACE INTO businesses(
+    id, name, bi_id, region, sector, digital_score, formality,
+    premium, verified, claimed, latitude, longitude, location_precision
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Columns added to the businesses table after its first release
+BUSINESS_LOCATION_COLUMNS = {
+    "latitude": "REAL",
+    "longitude": "REAL",
+    "location_precision": "TEXT",
+}
+
+
 class Database:
     def __init__(self, path: str = "bizinteltz.db"):
         self.path = path
@@ -17,6 +34,8 @@ class Database:
 
     def _init_db(self):
         with self.connection() as conn:
+            # WAL lets crawler workers in other processes read while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
             c = conn.cursor()
             c.execute(
                 """CREATE TABLE IF NOT EXISTS businesses (
@@ -29,9 +48,13 @@ class Database:
                     formality TEXT,
                     premium INTEGER,
                     verified INTEGER,
-                    claimed INTEGER
+                    claimed INTEGER,
+                    latitude REAL,
+                    longitude REAL,
+                    location_precision TEXT
                 )"""
             )
+            added = self._add_missing_columns(conn, "businesses", BUSINESS_LOCATION_COLUMNS)
             c.execute(
                 """CREATE TABLE IF NOT EXISTS reviews (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -71,33 +94,259 @@ class Database:
                     filename TEXT
                 )"""
             )
+            # Change log the API workers follow to keep their caches current
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS state_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    collection TEXT,
+                    key TEXT,
+                    changed_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_seen_filters (
+                    target_name TEXT PRIMARY KEY,
+                    data BLOB,
+                    updated_at TEXT,
+                    created_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_fetch_state (
+                    url TEXT PRIMARY KEY,
+                    target_name TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    content_hash TEXT,
+                    last_status INTEGER,
+                    links TEXT,
+                    fetched_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_sitemap_lastmods (
+                    url TEXT PRIMARY KEY,
+                    target_name TEXT,
+                    lastmod TEXT,
+                    updated_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_archive (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT,
+                    target_name TEXT,
+                    segment TEXT,
+                    offset INTEGER,
+                    length INTEGER,
+                    content_hash TEXT,
+                    archived_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE INDEX IF NOT EXISTS idx_crawl_archive_url
+                ON crawl_archive(url, id)"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_selector_stats (
+                    target_name TEXT PRIMARY KEY,
+                    stats TEXT,
+                    updated_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+                    target_name TEXT PRIMARY KEY,
+                    state TEXT,
+                    visited BLOB,
+                    queued BLOB,
+                    updated_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_targets (
+                    name TEXT PRIMARY KEY,
+                    config TEXT,
+                    updated_at TEXT
+                )"""
+            )
+            c.execute(
+                """CREATE TABLE IF NOT EXISTS crawl_frontier (
+                    target_name TEXT,
+                    url TEXT,
+                    depth INTEGER,
+                    status TEXT DEFAULT 'pending',
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER DEFAULT 0,
+                    PRIMARY KEY (target_name, url)
+                )"""
+            )
+            c.execute(
+                """CREATE INDEX IF NOT EXISTS idx_crawl_frontier_status
+                ON crawl_frontier(target_name, status, depth)"""
+            )
             conn.commit()
+        if added:
+            # Businesses stored before coordinates existed
+            self.geocode_businesses()
+
+    @staticmethod
+    def _add_missing_columns(conn, table: str, columns: dict) -> list:
+        """Add columns an older database lacks; returns the names added"""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        added = []
+        for name, column_type in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+                added.append(name)
+        return added
+
+    @staticmethod
+    def _business_location(biz) -> tuple:
+        """Coordinates given with a business, else those of its region text"""
+        latitude = getattr(biz, "latitude", None)
+        longitude = getattr(biz, "longitude", None)
+        # Geocoded coordinates are derived again so they follow region edits
+        if latitude is not None and longitude is not None and \
+                getattr(biz, "location_precision", None) in (None, "exact"):
+            return latitude, longitude, "exact"
+        location = geocode(biz.region)
+        if location is None:
+            return None, None, None
+        return location.latitude, location.longitude, location.precision
+
+    @staticmethod
+    def _business_row(biz) -> tuple:
+        return (
+            biz.id,
+            biz.name,
+            biz.bi_id,
+            biz.region,
+            biz.sector,
+            biz.digital_score,
+            biz.formality,
+            int(biz.premium),
+            int(biz.verified),
+            int(biz.claimed),
+            *Database._business_location(biz),
+        )
+
+    @staticmethod
+    def _log_changes(conn, collection: str, keys):
+        """Record changed keys of a collection, inside the caller's transaction"""
+        conn.executemany(
+            "INSERT INTO state_changes(collection, key, changed_at) VALUES (?, ?, datetime('now'))",
+            [(collection, str(key)) for key in keys],
+        )
+
+    @staticmethod
+    def _select_in(conn, query: str, column: str, keys: Optional[list]) -> list:
+        """Rows of a single-table query in insertion order, optionally only those whose column is in keys"""
+        conn.row_factory = sqlite3.Row
+        if keys is None:
+            return [dict(row) for row in conn.execute(f"{query} ORDER BY rowid")]
+        rows = []
+        keys = list(keys)
+        # Stay below SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows.extend(dict(row) for row in conn.execute(
+                f"{query} WHERE {column} IN ({','.join('?' * len(chunk))}) ORDER BY rowid",
+                chunk,
+            ))
+        return rows
 
     def add_business(self, biz):
         with self.connection() as conn:
-            conn.execute(
-                """INSERT OR REPLACE INTO businesses(
+            conn.execute(UPSERT_BUSINESS, self._business_row(biz))
+            self._log_changes(conn, "businesses", [biz.id])
+            conn.commit()
+
+    def seed_business(self, biz) -> bool:
+        """Insert a business only into an empty table; returns whether it was inserted.
+
+        The check and insert share one write transaction, so API workers
+        starting at once against the same database seed it only once.
+        """
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                """INSERT INTO businesses(
                     id, name, bi_id, region, sector, digital_score, formality,
-                    premium, verified, claimed
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    biz.id,
-                    biz.name,
-                    biz.bi_id,
-                    biz.region,
-                    biz.sector,
-                    biz.digital_score,
-                    biz.formality,
-                    int(biz.premium),
-                    int(biz.verified),
-                    int(biz.claimed),
-                ),
+                    premium, verified, claimed, latitude, longitude, location_precision
+                ) SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                WHERE NOT EXISTS (SELECT 1 FROM businesses)""",
+                self._business_row(biz),
             )
+            inserted = cursor.rowcount > 0
+            if inserted:
+                self._log_changes(conn, "businesses", [biz.id])
             conn.commit()
+            return inserted
+
+    def add_businesses(self, bizs) -> list:
+        """Upsert many businesses in a single transaction.
+
+        Rows are written one statement at a time so a bad row does not abort
+        the batch; returns (biz, error message) for each row that failed.
+        """
+        failures = []
+        written = []
+        with self.connection() as conn:
+            for biz in bizs:
+                try:
+                    conn.execute(UPSERT_BUSINESS, self._business_row(biz))
+                    written.append(biz.id)
+                except sqlite3.Error as e:
+                    failures.append((biz, str(e)))
+            self._log_changes(conn, "businesses", written)
+            conn.commit()
+        return failures
+
+    def get_businesses(self, ids: Optional[list] = None) -> list:
+        """All businesses, or those with the given ids"""
+        with self.connection() as conn:
+            return self._select_in(
+                conn,
+                """SELECT id, name, bi_id, region, sector, digital_score, formality,
+                    premium, verified, claimed, latitude, longitude, location_precision
+                FROM businesses""",
+                "id", ids,
+            )
+
+    def geocode_businesses(self, batch_size: int = 500) -> int:
+        """Locate businesses without coordinates from their region; returns the number located"""
+        located = 0
+        last_id = ""
+        while True:
+            with self.connection() as conn:
+                rows = conn.execute(
+                    """SELECT id, region FROM businesses
+                    WHERE latitude IS NULL AND region IS NOT NULL AND id > ?
+                    ORDER BY id LIMIT ?""",
+                    (last_id, batch_size),
+                ).fetchall()
+                if not rows:
+                    return located
+                last_id = rows[-1][0]
+                updates = []
+                for biz_id, region in rows:
+                    location = geocode(region)
+                    if location is not None:
+                        updates.append((location.latitude, location.longitude, location.precision, biz_id))
+                conn.executemany(
+                    "UPDATE businesses SET latitude=?, longitude=?, location_precision=? WHERE id=?",
+                    updates,
+                )
+                self._log_changes(conn, "businesses", [update[-1] for update in updates])
+                conn.commit()
+                located += len(updates)
 
     def delete_business(self, biz_id: str):
         with self.connection() as conn:
             conn.execute("DELETE FROM businesses WHERE id=?", (biz_id,))
+            self._log_changes(conn, "businesses", [biz_id])
             conn.commit()
 
     def add_review(self, review):
@@ -106,44 +355,383 @@ class Database:
                 "INSERT INTO reviews(business_id, rating, comment) VALUES (?, ?, ?)",
                 (review.business_id, review.rating, review.comment),
             )
+            self._log_changes(conn, "reviews", [review.business_id])
             conn.commit()
 
-    def add_claim(self, claim):
+    def get_reviews(self, business_ids: Optional[list] = None) -> list:
+        """Reviews in the order they were posted, optionally of some businesses only"""
         with self.connection() as conn:
-            conn.execute(
+            return self._select_in(
+                conn,
+                "SELECT id, business_id, rating, comment FROM reviews",
+                "business_id", business_ids,
+            )
+
+    def add_claim(self, claim) -> int:
+        """Store a claim and mark its business as claimed; returns the claim id"""
+        with self.connection() as conn:
+            claim_id = conn.execute(
                 "INSERT INTO claims(business_id, owner_name, contact, approved) VALUES (?, ?, ?, ?)",
                 (claim.business_id, claim.owner_name, claim.contact, int(claim.approved)),
-            )
+            ).lastrowid
+            conn.execute("UPDATE businesses SET claimed=1 WHERE id=?", (claim.business_id,))
+            self._log_changes(conn, "claims", [claim_id])
+            self._log_changes(conn, "businesses", [claim.business_id])
             conn.commit()
+            return claim_id
 
-    def approve_claim(self, claim):
+    def approve_claim(self, claim_id: int):
+        """Approve a claim and mark its business as claimed and verified"""
         with self.connection() as conn:
+            conn.execute("UPDATE claims SET approved=1 WHERE id=?", (claim_id,))
             conn.execute(
-                "UPDATE claims SET approved=1 WHERE business_id=? AND owner_name=? AND contact=?",
-                (claim.business_id, claim.owner_name, claim.contact),
+                """UPDATE businesses SET verified=1, claimed=1
+                WHERE id=(SELECT business_id FROM claims WHERE id=?)""",
+                (claim_id,),
             )
+            self._log_changes(conn, "claims", [claim_id])
+            self._log_changes(conn, "businesses", [
+                row[0] for row in conn.execute("SELECT business_id FROM claims WHERE id=?", (claim_id,))
+            ])
             conn.commit()
 
+    def get_claims(self, ids: Optional[list] = None) -> list:
+        with self.connection() as conn:
+            return self._select_in(
+                conn,
+                "SELECT id, business_id, owner_name, contact, approved FROM claims",
+                "id", ids,
+            )
+
     def add_event(self, event):
         with self.connection() as conn:
             conn.execute(
                 "INSERT INTO analytics(business_id, action) VALUES (?, ?)",
                 (event.business_id, event.action),
             )
+            self._log_changes(conn, "events", [event.business_id])
             conn.commit()
 
+    def get_event_counts(self) -> dict:
+        """Number of analytics events per action"""
+        with self.connection() as conn:
+            return dict(conn.execute("SELECT action, COUNT(*) FROM analytics GROUP BY action").fetchall())
+
+    def get_business_event_counts(self, business_ids: Optional[list] = None) -> list:
+        """Event counts per business and action, for all businesses or the given ones"""
+        query = "SELECT business_id, action, COUNT(*) AS count FROM analytics"
+        group = " GROUP BY business_id, action ORDER BY business_id, action"
+        with self.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            if business_ids is None:
+                return [dict(row) for row in conn.execute(query + group)]
+            rows = []
+            business_ids = list(business_ids)
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(business_ids), 500):
+                chunk = business_ids[start:start + 500]
+                rows.extend(dict(row) for row in conn.execute(
+                    f"{query} WHERE business_id IN ({','.join('?' * len(chunk))}){group}", chunk
+                ))
+            return rows
+
     def add_lead(self, lead):
         with self.connection() as conn:
-            conn.execute(
+            lead_id = conn.execute(
                 "INSERT INTO leads(business_id, name, message) VALUES (?, ?, ?)",
                 (lead.business_id, lead.name, lead.message),
-            )
+            ).lastrowid
+            self._log_changes(conn, "leads", [lead_id])
             conn.commit()
 
+    def get_leads(self, ids: Optional[list] = None) -> list:
+        with self.connection() as conn:
+            return self._select_in(
+                conn, "SELECT id, business_id, name, message FROM leads", "id", ids
+            )
+
     def add_media(self, biz_id: str, filename: str):
         with self.connection() as conn:
             conn.execute(
                 "INSERT INTO media(business_id, filename) VALUES (?, ?)",
                 (biz_id, filename),
             )
+            self._log_changes(conn, "media", [biz_id])
+            conn.commit()
+
+    def get_media(self, business_ids: Optional[list] = None) -> list:
+        with self.connection() as conn:
+            return self._select_in(
+                conn, "SELECT id, business_id, filename FROM media", "business_id", business_ids
+            )
+
+    def get_state_changes(self, after_seq: int) -> tuple:
+        """Oldest logged sequence number and the (seq, collection, key) changes after after_seq"""
+        with self.connection() as conn:
+            first_seq = conn.execute("SELECT MIN(seq) FROM state_changes").fetchone()[0]
+            changes = conn.execute(
+                "SELECT seq, collection, key FROM state_changes WHERE seq > ? ORDER BY seq",
+                (after_seq,),
+            ).fetchall()
+            return first_seq, changes
+
+    def get_state_seq(self) -> int:
+        """Sequence number of the latest change"""
+        with self.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM state_changes").fetchone()[0]
+
+    def prune_state_changes(self, keep_seconds: int):
+        """Drop old change log entries, always keeping the latest"""
+        with self.connection() as conn:
+            conn.execute(
+                """DELETE FROM state_changes
+                WHERE changed_at < datetime('now', ?) AND seq < (SELECT MAX(seq) FROM state_changes)""",
+                (f"-{int(keep_seconds)} seconds",),
+            )
+            conn.commit()
+
+    def load_seen_filter(self, target_name: str) -> Optional[tuple]:
+        """The stored seen-set of a target and its age in days"""
+        with self.connection() as conn:
+            row = conn.execute(
+                """SELECT data, julianday('now') - julianday(created_at)
+                FROM crawl_seen_filters WHERE target_name=?""",
+                (target_name,),
+            ).fetchone()
+            return (row[0], row[1] or 0.0) if row else None
+
+    def save_seen_filter(self, target_name: str, data: bytes):
+        """Store a target's seen-set, keeping the creation time of the one it replaces"""
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO crawl_seen_filters(target_name, data, updated_at, created_at)
+                VALUES (?, ?, datetime('now'), datetime('now'))
+                ON CONFLICT(target_name) DO UPDATE SET
+                    data = excluded.data, updated_at = excluded.updated_at""",
+                (target_name, data),
+            )
+            conn.commit()
+
+    def delete_seen_filter(self, target_name: str):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM crawl_seen_filters WHERE target_name=?", (target_name,))
+            conn.commit()
+
+    def get_fetch_state(self, url: str) -> Optional[dict]:
+        with self.connection() as conn:
+            row = conn.execute(
+                """SELECT url, target_name, etag, last_modified, content_hash,
+                    last_status, links, fetched_at
+                FROM crawl_fetch_state WHERE url=?""",
+                (url,),
+            ).fetchone()
+            if not row:
+                return None
+            keys = ("url", "target_name", "etag", "last_modified", "content_hash",
+                    "last_status", "links", "fetched_at")
+            state = dict(zip(keys, row))
+            state["links"] = json.loads(state["links"] or "[]")
+            return state
+
+    def save_fetch_state(self, state: dict):
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO crawl_fetch_state(
+                    url, target_name, etag, last_modified, content_hash,
+                    last_status, links, fetched_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))""",
+                (
+                    state["url"],
+                    state.get("target_name"),
+                    state.get("etag"),
+                    state.get("last_modified"),
+                    state.get("content_hash"),
+                    state.get("last_status"),
+                    json.dumps(state.get("links") or []),
+                ),
+            )
             conn.commit()
+
+    def get_sitemap_lastmods(self, urls: list) -> dict:
+        """Sitemap lastmod recorded at each URL's last crawl, for those that have one"""
+        lastmods = {}
+        with self.connection() as conn:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(urls), 500):
+                chunk = urls[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT url, lastmod FROM crawl_sitemap_lastmods WHERE url IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                lastmods.update(rows)
+        return lastmods
+
+    def save_sitemap_lastmods(self, target_name: str, entries: list):
+        """Record the sitemap lastmod of crawled URLs, given as (url, lastmod) pairs"""
+        with self.connection() as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO crawl_sitemap_lastmods(url, target_name, lastmod, updated_at)
+                VALUES (?, ?, ?, datetime('now'))""",
+                [(url, target_name, lastmod) for url, lastmod in entries],
+            )
+            conn.commit()
+
+    def add_archive_entry(self, entry: dict):
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO crawl_archive(
+                    url, target_name, segment, offset, length, content_hash, archived_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    entry["url"],
+                    entry["target_name"],
+                    entry["segment"],
+                    entry["offset"],
+                    entry["length"],
+                    entry.get("content_hash"),
+                    entry["archived_at"],
+                ),
+            )
+            conn.commit()
+
+    def delete_archive_segments(self, segments: list):
+        """Drop the index entries of deleted archive segments"""
+        with self.connection() as conn:
+            conn.executemany("DELETE FROM crawl_archive WHERE segment=?", [(s,) for s in segments])
+            conn.commit()
+
+    def get_archive_entries(self, target_name: Optional[str] = None) -> list:
+        """Index entries of the newest archived copy of each URL, in file order"""
+        query = """SELECT url, target_name, segment, offset, length, content_hash, archived_at
+            FROM crawl_archive
+            WHERE id IN (SELECT MAX(id) FROM crawl_archive GROUP BY url)"""
+        params = ()
+        if target_name:
+            query += " AND target_name=?"
+            params = (target_name,)
+        query += " ORDER BY segment, offset"
+        keys = ("url", "target_name", "segment", "offset", "length", "content_hash", "archived_at")
+        with self.connection() as conn:
+            return [dict(zip(keys, row)) for row in conn.execute(query, params).fetchall()]
+
+    def get_selector_stats(self, target_name: str) -> dict:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT stats FROM crawl_selector_stats WHERE target_name=?",
+                (target_name,),
+            ).fetchone()
+            return json.loads(row[0]) if row else {}
+
+    def save_selector_stats(self, target_name: str, stats: dict):
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO crawl_selector_stats(target_name, stats, updated_at)
+                VALUES (?, ?, datetime('now'))""",
+                (target_name, json.dumps(stats)),
+            )
+            conn.commit()
+
+    def get_crawl_checkpoint(self, target_name: str) -> Optional[dict]:
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT state, visited, queued FROM crawl_checkpoints WHERE target_name=?",
+                (target_name,),
+            ).fetchone()
+            if not row:
+                return None
+            return {"state": row[0], "visited": row[1], "queued": row[2]}
+
+    def save_crawl_checkpoint(self, target_name: str, checkpoint: dict):
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO crawl_checkpoints(target_name, state, visited, queued, updated_at)
+                VALUES (?, ?, ?, ?, datetime('now'))""",
+                (target_name, checkpoint["state"], checkpoint["visited"], checkpoint["queued"]),
+            )
+            conn.commit()
+
+    def delete_crawl_checkpoint(self, target_name: str):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM crawl_checkpoints WHERE target_name=?", (target_name,))
+            conn.commit()
+
+    def get_crawl_targets(self) -> list:
+        with self.connection() as conn:
+            rows = conn.execute("SELECT config FROM crawl_targets ORDER BY rowid").fetchall()
+            return [json.loads(row[0]) for row in rows]
+
+    def save_crawl_target(self, name: str, config: dict):
+        with self.connection() as conn:
+            conn.execute(
+                """INSERT INTO crawl_targets(name, config, updated_at)
+                VALUES (?, ?, datetime('now'))
+                ON CONFLICT(name) DO UPDATE SET config=excluded.config, updated_at=excluded.updated_at""",
+                (name, json.dumps(config)),
+            )
+            conn.commit()
+
+    def delete_crawl_target(self, name: str):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM crawl_targets WHERE name=?", (name,))
+            conn.commit()
+
+    def reset_frontier(self, target_name: str):
+        with self.connection() as conn:
+            conn.execute("DELETE FROM crawl_frontier WHERE target_name=?", (target_name,))
+            conn.commit()
+
+    def enqueue_frontier(self, target_name: str, items: list) -> int:
+        """Add (url, depth) pairs; URLs already in the target's frontier are ignored"""
+        with self.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO crawl_frontier(target_name, url, depth) VALUES (?, ?, ?)",
+                [(target_name, url, depth) for url, depth in items],
+            )
+            conn.commit()
+            return conn.total_changes - before
+
+    def lease_frontier(self, target_name: str, worker_id: str, limit: int,
+                       lease_seconds: float, max_attempts: int = 3) -> list:
+        """Atomically lease up to limit pending or expired URLs, shallowest first"""
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """SELECT url, depth FROM crawl_frontier
+                WHERE target_name=? AND attempts < ?
+                    AND (status='pending' OR (status='leased' AND lease_expires < ?))
+                ORDER BY depth LIMIT ?""",
+                (target_name, max_attempts, now, limit),
+            ).fetchall()
+            conn.executemany(
+                """UPDATE crawl_frontier
+                SET status='leased', lease_owner=?, lease_expires=?, attempts=attempts+1
+                WHERE target_name=? AND url=?""",
+                [(worker_id, now + lease_seconds, target_name, url) for url, _ in rows],
+            )
+            conn.commit()
+            return rows
+
+    def complete_frontier(self, target_name: str, worker_id: str, urls: list):
+        """Mark leased URLs as done; leases taken over by another worker are left alone"""
+        with self.connection() as conn:
+            conn.executemany(
+                """UPDATE crawl_frontier SET status='done', lease_expires=NULL
+                WHERE target_name=? AND url=? AND lease_owner=?""",
+                [(target_name, url, worker_id) for url in urls],
+            )
+            conn.commit()
+
+    def frontier_counts(self, target_name: str, max_attempts: int = 3) -> dict:
+        now = time.time()
+        with self.connection() as conn:
+            rows = conn.execute(
+                """SELECT CASE
+                    WHEN status='leased' AND lease_expires < ? AND attempts >= ? THEN 'failed'
+                    WHEN status='leased' AND lease_expires < ? THEN 'pending'
+                    ELSE status END AS state, COUNT(*)
+                FROM crawl_frontier WHERE target_name=? GROUP BY state""",
+                (now, max_attempts, now, target_name),
+            ).fetchall()
+            return dict(rows)
@@ -0,0 +1,134 @@
+import hashlib
+import re
+import struct
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from gazetteer import geocode
+from text_match import jaccard, tokenize, trigrams
+
+
+# Legal-form and filler tokens that do not distinguish one business from another
+NAME_STOPWORDS = {
+    'ltd', 'limited', 'plc', 'inc', 'llc', 'corp', 'corporation',
+    'co', 'company', 't', 'tz', 'the', 'and'
+}
+
+MATCH_THRESHOLD = 0.8
+
+# MinHash/LSH parameters: 8 bands of 4 rows catch ~98% of pairs at 0.8 similarity
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    struct.unpack('>QQ', hashlib.blake2b(f"perm-{i}".encode(), digest_size=16).digest())
+    for i in range(NUM_PERM)
+]
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase a business name and drop punctuation and legal-form words"""
+    tokens = [t for t in tokenize(name or '') if t not in NAME_STOPWORDS]
+    return ' '.join(tokens)
+
+
+def normalize_region(region: Optional[str]) -> str:
+    """Map free-text locations onto a canonical Tanzanian region where possible.
+
+    Regions come from the gazetteer, so a record is deduplicated under the
+    same region it is geocoded to, districts and aliases included.
+    """
+    text = ' '.join(tokenize(region or ''))
+    if not text:
+        return ''
+    location = geocode(text)
+    if location is not None:
+        return location.region.lower()
+    text = re.sub(r'\b(region|mkoa wa|mkoa)\b', ' ', text)
+    return ' '.join(text.split())
+
+
+def number_tokens(text: str) -> Set[str]:
+    return set(re.findall(r'\d+', text))
+
+
+def minhash(shingles: FrozenSet[str]) -> List[int]:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingles
+    ]
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def lsh_keys(signature: List[int]) -> List[Tuple]:
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+class EntityIndex:
+    """In-memory index of known businesses used to resolve crawled duplicates.
+
+    Exact (name, region) keys give a fast path; otherwise candidates come
+    from MinHash LSH buckets over name trigrams and are confirmed with the
+    trigram Jaccard similarity.
+    """
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.records: Dict[str, Dict] = {}
+        self.shingles: Dict[str, FrozenSet[str]] = {}
+        self.exact: Dict[Tuple[str, str], str] = {}
+        self.buckets: Dict[Tuple, Set[str]] = {}
+        self.bi_ids: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: Dict):
+        """Index a business record (a dict of businesses table columns)"""
+        biz_id = record['id']
+        name = normalize_name(record.get('name'))
+        region = normalize_region(record.get('region'))
+        self.records[biz_id] = record
+        if record.get('bi_id'):
+            self.bi_ids.add(record['bi_id'])
+        if not name:
+            return
+
+        shingles = trigrams(name)
+        self.shingles[biz_id] = shingles
+        self.exact.setdefault((name, region), biz_id)
+        for key in lsh_keys(minhash(shingles)):
+            self.buckets.setdefault(key, set()).add(biz_id)
+
+    def match(self, name: str, region: Optional[str] = None) -> Optional[Dict]:
+        """Find the existing record for a business, or None if it is new"""
+        norm_name = normalize_name(name)
+        norm_region = normalize_region(region)
+        if not norm_name:
+            return None
+
+        biz_id = self.exact.get((norm_name, norm_region))
+        if biz_id:
+            return self.records[biz_id]
+
+        shingles = trigrams(norm_name)
+        candidates = set()
+        for key in lsh_keys(minhash(shingles)):
+            candidates.update(self.buckets.get(key, ()))
+
+        numbers = number_tokens(norm_name)
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            # "Shop 1" and "Shop 11" look alike but are different businesses
+            if number_tokens(normalize_name(self.records[candidate].get('name'))) != numbers:
+                continue
+            candidate_region = normalize_region(self.records[candidate].get('region'))
+            if norm_region and candidate_region and norm_region != candidate_region:
+                continue
+            score = jaccard(shingles, self.shingles[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return self.records[best] if best else None
@@ -0,0 +1,237 @@
+import re
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+# Regions: (latitude, longitude) of the regional capital and approximate area in km²
+REGIONS: Dict[str, Tuple[float, float, float]] = {
+    'Arusha': (-3.3869, 36.6830, 34516),
+    'Dar es Salaam': (-6.7924, 39.2083, 1393),
+    'Dodoma': (-6.1630, 35.7516, 41311),
+    'Geita': (-2.8711, 32.2318, 20054),
+    'Iringa': (-7.7700, 35.6990, 35503),
+    'Kagera': (-1.3317, 31.8122, 25265),
+    'Katavi': (-6.3436, 31.0694, 45843),
+    'Kigoma': (-4.8769, 29.6267, 37037),
+    'Kilimanjaro': (-3.3349, 37.3404, 13250),
+    'Lindi': (-9.9971, 39.7144, 66046),
+    'Manyara': (-4.2117, 35.7475, 44522),
+    'Mara': (-1.5000, 33.8000, 21760),
+    'Mbeya': (-8.9094, 33.4608, 35954),
+    'Morogoro': (-6.8210, 37.6612, 70624),
+    'Mtwara': (-10.2736, 40.1828, 16707),
+    'Mwanza': (-2.5164, 32.9175, 9467),
+    'Njombe': (-9.3333, 34.7667, 21347),
+    'Pwani': (-6.7667, 38.9167, 32547),
+    'Rukwa': (-7.9667, 31.6167, 22792),
+    'Ruvuma': (-10.6833, 35.6500, 63669),
+    'Shinyanga': (-3.6619, 33.4232, 18901),
+    'Simiyu': (-2.8000, 33.9833, 25212),
+    'Singida': (-4.8163, 34.7439, 49340),
+    'Songwe': (-9.1000, 32.9333, 27656),
+    'Tabora': (-5.0162, 32.8266, 76151),
+    'Tanga': (-5.0689, 39.0988, 26677),
+    'Kaskazini Pemba': (-5.0567, 39.7264, 574),
+    'Kusini Pemba': (-5.2459, 39.7666, 332),
+    'Kaskazini Unguja': (-5.8750, 39.2556, 470),
+    'Kusini Unguja': (-6.1333, 39.2833, 854),
+    'Mjini Magharibi': (-6.1659, 39.2026, 230),
+}
+
+# Other spellings of region names
+REGION_ALIASES = {
+    'dar': 'Dar es Salaam',
+    'dsm': 'Dar es Salaam',
+    'daressalaam': 'Dar es Salaam',
+    'coast': 'Pwani',
+    'kilimanjaro region': 'Kilimanjaro',
+    'zanzibar': 'Mjini Magharibi',
+    'znz': 'Mjini Magharibi',
+    'zanzibar urban west': 'Mjini Magharibi',
+    'unguja': 'Mjini Magharibi',
+    'zanzibar north': 'Kaskazini Unguja',
+    'north unguja': 'Kaskazini Unguja',
+    'zanzibar south': 'Kusini Unguja',
+    'zanzibar central south': 'Kusini Unguja',
+    'south unguja': 'Kusini Unguja',
+    'pemba': 'Kusini Pemba',
+    'north pemba': 'Kaskazini Pemba',
+    'pemba north': 'Kaskazini Pemba',
+    'south pemba': 'Kusini Pemba',
+    'pemba south': 'Kusini Pemba',
+}
+
+# Districts, towns and city neighbourhoods: (latitude, longitude, region)
+PLACES: Dict[str, Tuple[float, float, str]] = {
+    # Dar es Salaam
+    'Kinondoni': (-6.7735, 39.2406, 'Dar es Salaam'),
+    'Ilala': (-6.8245, 39.2694, 'Dar es Salaam'),
+    'Temeke': (-6.8833, 39.2500, 'Dar es Salaam'),
+    'Ubungo': (-6.7870, 39.2070, 'Dar es Salaam'),
+    'Kigamboni': (-6.8500, 39.3167, 'Dar es Salaam'),
+    'Kariakoo': (-6.8190, 39.2750, 'Dar es Salaam'),
+    'Posta': (-6.8150, 39.2900, 'Dar es Salaam'),
+    'Upanga': (-6.8080, 39.2830, 'Dar es Salaam'),
+    'Masaki': (-6.7500, 39.2800, 'Dar es Salaam'),
+    'Oyster Bay': (-6.7720, 39.2880, 'Dar es Salaam'),
+    'Mikocheni': (-6.7600, 39.2500, 'Dar es Salaam'),
+    'Msasani': (-6.7450, 39.2700, 'Dar es Salaam'),
+    'Sinza': (-6.7750, 39.2250, 'Dar es Salaam'),
+    'Mwenge': (-6.7680, 39.2270, 'Dar es Salaam'),
+    'Kimara': (-6.7900, 39.1550, 'Dar es Salaam'),
+    'Mbezi': (-6.7270, 39.1500, 'Dar es Salaam'),
+    'Tegeta': (-6.6500, 39.1950, 'Dar es Salaam'),
+    'Kawe': (-6.7330, 39.2330, 'Dar es Salaam'),
+    'Buguruni': (-6.8350, 39.2450, 'Dar es Salaam'),
+    'Tabata': (-6.8400, 39.2200, 'Dar es Salaam'),
+    'Ukonga': (-6.8750, 39.1800, 'Dar es Salaam'),
+    'Mbagala': (-6.9000, 39.2700, 'Dar es Salaam'),
+    # Arusha
+    'Karatu': (-3.3400, 35.6700, 'Arusha'),
+    'Monduli': (-3.3000, 36.4500, 'Arusha'),
+    'Usa River': (-3.3667, 36.8500, 'Arusha'),
+    'Longido': (-2.7300, 36.6900, 'Arusha'),
+    'Ngorongoro': (-3.2400, 35.4900, 'Arusha'),
+    # Kilimanjaro
+    'Moshi': (-3.3349, 37.3404, 'Kilimanjaro'),
+    'Hai': (-3.2700, 37.2500, 'Kilimanjaro'),
+    'Rombo': (-3.1600, 37.5600, 'Kilimanjaro'),
+    'Mwanga': (-3.6600, 37.5800, 'Kilimanjaro'),
+    # Mwanza
+    'Ilemela': (-2.4800, 32.9000, 'Mwanza'),
+    'Nyamagana': (-2.5200, 32.9000, 'Mwanza'),
+    'Sengerema': (-2.6500, 32.6333, 'Mwanza'),
+    'Ukerewe': (-2.0500, 33.0000, 'Mwanza'),
+    'Magu': (-2.5833, 33.4333, 'Mwanza'),
+    # Dodoma
+    'Kondoa': (-4.9000, 35.7833, 'Dodoma'),
+    'Mpwapwa': (-6.3500, 36.4833, 'Dodoma'),
+    'Kongwa': (-6.2000, 36.4167, 'Dodoma'),
+    # Morogoro
+    'Kilosa': (-6.8333, 36.9833, 'Morogoro'),
+    'Ifakara': (-8.1333, 36.6833, 'Morogoro'),
+    'Mvomero': (-6.3000, 37.4500, 'Morogoro'),
+    # Tanga
+    'Muheza': (-5.1667, 38.7833, 'Tanga'),
+    'Korogwe': (-5.1558, 38.4581, 'Tanga'),
+    'Lushoto': (-4.7833, 38.2833, 'Tanga'),
+    'Pangani': (-5.4267, 38.9767, 'Tanga'),
+    'Handeni': (-5.4250, 38.0250, 'Tanga'),
+    # Mbeya and Songwe
+    'Tukuyu': (-9.2500, 33.6500, 'Mbeya'),
+    'Kyela': (-9.5833, 33.8667, 'Mbeya'),
+    'Chunya': (-8.5333, 33.4167, 'Mbeya'),
+    'Tunduma': (-9.3000, 32.7667, 'Songwe'),
+    'Vwawa': (-9.1000, 32.9333, 'Songwe'),
+    # Iringa and Njombe
+    'Mafinga': (-8.3000, 35.3000, 'Iringa'),
+    'Makambako': (-8.8500, 34.8333, 'Njombe'),
+    # Pwani
+    'Kibaha': (-6.7667, 38.9167, 'Pwani'),
+    'Bagamoyo': (-6.4333, 38.9000, 'Pwani'),
+    'Kisarawe': (-6.9000, 39.0667, 'Pwani'),
+    'Mkuranga': (-7.1167, 39.2000, 'Pwani'),
+    'Rufiji': (-8.0000, 38.7667, 'Pwani'),
+    'Mafia': (-7.9000, 39.6667, 'Pwani'),
+    # Kagera
+    'Bukoba': (-1.3317, 31.8122, 'Kagera'),
+    'Karagwe': (-1.5700, 31.1000, 'Kagera'),
+    'Muleba': (-1.8400, 31.6500, 'Kagera'),
+    'Ngara': (-2.5100, 30.6500, 'Kagera'),
+    # Mara
+    'Musoma': (-1.5000, 33.8000, 'Mara'),
+    'Tarime': (-1.3500, 34.3667, 'Mara'),
+    'Bunda': (-2.0500, 33.8667, 'Mara'),
+    'Serengeti': (-1.8600, 34.6700, 'Mara'),
+    # Mtwara and Lindi
+    'Masasi': (-10.7167, 38.8000, 'Mtwara'),
+    'Newala': (-10.9500, 39.2833, 'Mtwara'),
+    'Kilwa': (-8.9333, 39.5167, 'Lindi'),
+    'Nachingwea': (-10.3833, 38.7667, 'Lindi'),
+    # Ruvuma
+    'Songea': (-10.6833, 35.6500, 'Ruvuma'),
+    'Mbinga': (-10.9333, 35.0167, 'Ruvuma'),
+    'Tunduru': (-11.1000, 37.3500, 'Ruvuma'),
+    # Lake and western zone
+    'Kahama': (-3.8333, 32.6000, 'Shinyanga'),
+    'Nzega': (-4.2167, 33.1833, 'Tabora'),
+    'Urambo': (-5.0667, 32.0500, 'Tabora'),
+    'Kasulu': (-4.5833, 30.1000, 'Kigoma'),
+    'Ujiji': (-4.9167, 29.6667, 'Kigoma'),
+    'Chato': (-2.6333, 31.7667, 'Geita'),
+    'Bariadi': (-2.8000, 33.9833, 'Simiyu'),
+    'Maswa': (-3.1833, 33.7833, 'Simiyu'),
+    'Sumbawanga': (-7.9667, 31.6167, 'Rukwa'),
+    'Mpanda': (-6.3436, 31.0694, 'Katavi'),
+    # Central
+    'Manyoni': (-5.7500, 34.8333, 'Singida'),
+    'Babati': (-4.2117, 35.7475, 'Manyara'),
+    'Mbulu': (-3.8500, 35.5333, 'Manyara'),
+    # Zanzibar
+    'Stone Town': (-6.1622, 39.1921, 'Mjini Magharibi'),
+    'Nungwi': (-5.7264, 39.2981, 'Kaskazini Unguja'),
+    'Paje': (-6.2667, 39.5333, 'Kusini Unguja'),
+    'Wete': (-5.0567, 39.7264, 'Kaskazini Pemba'),
+    'Chake Chake': (-5.2459, 39.7666, 'Kusini Pemba'),
+    'Mkoani': (-5.3667, 39.6500, 'Kusini Pemba'),
+}
+
+# Longest place name, in words, tried when matching free text
+MAX_NAME_WORDS = 3
+
+
+class Location(NamedTuple):
+    latitude: float
+    longitude: float
+    region: str
+    precision: str  # 'district' or 'region'
+
+
+def normalize_place(text: str) -> str:
+    """Lowercase words only, so 'Dar-es-Salaam,' and 'dar es salaam' compare equal"""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+
+def build_lookup() -> Dict[str, Location]:
+    lookup = {}
+    for name, (lat, lng, _) in REGIONS.items():
+        lookup[normalize_place(name)] = Location(lat, lng, name, 'region')
+    for alias, name in REGION_ALIASES.items():
+        lat, lng, _ = REGIONS[name]
+        lookup[normalize_place(alias)] = Location(lat, lng, name, 'region')
+    for name, (lat, lng, region) in PLACES.items():
+        lookup[normalize_place(name)] = Location(lat, lng, region, 'district')
+    return lookup
+
+
+LOOKUP = build_lookup()
+
+
+@lru_cache(maxsize=4096)
+def geocode(text: Optional[str]) -> Optional[Location]:
+    """Locate free-text like 'Mikocheni, Dar es Salaam' or 'Arusha Region'.
+
+    The most specific name found wins: a district, town or neighbourhood
+    over a region. Returns None when no known name appears in the text.
+    Results are cached, so geocoding many rows with the same region is cheap.
+    """
+    if not text:
+        return None
+    words = normalize_place(text).split()
+    best = None
+    for size in range(min(MAX_NAME_WORDS, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            location = LOOKUP.get(' '.join(words[start:start + size]))
+            if location is None:
+                continue
+            if location.precision == 'district':
+                return location
+            if best is None:
+                best = location
+    return best
+
+
+def region_area(region: str) -> Optional[float]:
+    """Area of a region in km², by canonical name"""
+    entry = REGIONS.get(region)
+    return entry[2] if entry else None
@@ -0,0 +1,216 @@
+import math
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Geohash lengths the grid keeps cells for: ~156 km, ~39 km, ~4.9 km and ~1.2 km wide
+GRID_PRECISIONS = (3, 4, 5, 6)
+
+# Most cells a query visits; larger areas are answered from coarser cells
+MAX_QUERY_CELLS = 64
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode_geohash(lat: float, lng: float, precision: int) -> str:
+    """Geohash of a point, interleaving longitude and latitude bits"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, point = (lng_range, lng) if even else (lat_range, lat)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if point >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def decode_geohash(geohash: str) -> Tuple[float, float, float, float]:
+    """Bounds of a geohash cell as (min_lat, min_lng, max_lat, max_lng)"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if value >> shift & 1:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Height and width in degrees of a cell at a geohash length"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Bounding box of a circle, as (min_lat, min_lng, max_lat, max_lng)"""
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    # The circle is widest slightly poleward of its centre, hence the asin
+    ratio = math.sin(min(angle, math.pi / 2)) / max(math.cos(math.radians(lat)), 1e-12)
+    dlng = 180.0 if ratio >= 1 else math.degrees(math.asin(ratio))
+    return max(-90.0, lat - dlat), max(-180.0, lng - dlng), min(90.0, lat + dlat), min(180.0, lng + dlng)
+
+
+class GeoIndex:
+    """Geohash grid over located items, kept current as they change.
+
+    Each item sits in one cell per length in GRID_PRECISIONS. Radius and
+    bounding-box queries only look at the cells covering the area, using
+    the finest length that keeps the visit under MAX_QUERY_CELLS, and
+    per-group counts (e.g. by region and sector) are maintained as items
+    come and go, so density figures never scan the items.
+
+    locate(item) returns (latitude, longitude) or None for items without
+    coordinates; group(item) returns the key the item is counted under.
+    """
+
+    def __init__(self, locate: Callable[[Any], Optional[Tuple[float, float]]],
+                 group: Callable[[Any], Hashable] = lambda item: None,
+                 precisions: Tuple[int, ...] = GRID_PRECISIONS):
+        self.locate = locate
+        self.group = group
+        self.precisions = tuple(sorted(precisions))
+        self.cells: Dict[int, Dict[str, Set[str]]] = {p: {} for p in self.precisions}
+        self.points: Dict[str, Tuple[float, float, str]] = {}  # key -> (lat, lng, finest geohash)
+        self.groups: Dict[str, Hashable] = {}
+        self.group_counts: Counter = Counter()
+
+    def clear(self):
+        self.cells = {p: {} for p in self.precisions}
+        self.points = {}
+        self.groups = {}
+        self.group_counts = Counter()
+
+    def update(self, key: str, old: Any, new: Any):
+        """Replace the entry of a key; old or new is None for an insert or delete"""
+        self.remove(key)
+        if new is not None:
+            self.add(key, new)
+
+    def add(self, key: str, item: Any):
+        group = self.group(item)
+        self.groups[key] = group
+        self.group_counts[group] += 1
+
+        point = self.locate(item)
+        if point is None:
+            return
+        lat, lng = point
+        geohash = encode_geohash(lat, lng, self.precisions[-1])
+        self.points[key] = (lat, lng, geohash)
+        for precision in self.precisions:
+            self.cells[precision].setdefault(geohash[:precision], set()).add(key)
+
+    def remove(self, key: str):
+        if key in self.groups:
+            group = self.groups.pop(key)
+            self.group_counts[group] -= 1
+            if not self.group_counts[group]:
+                del self.group_counts[group]
+
+        entry = self.points.pop(key, None)
+        if entry is None:
+            return
+        geohash = entry[2]
+        for precision in self.precisions:
+            cell = self.cells[precision].get(geohash[:precision])
+            if cell is not None:
+                cell.discard(key)
+                if not cell:
+                    del self.cells[precision][geohash[:precision]]
+
+    def covering_cells(self, min_lat: float, min_lng: float,
+                       max_lat: float, max_lng: float) -> Tuple[int, Set[str]]:
+        """Geohash length and the cells at it that cover a bounding box"""
+        precision = self.precisions[0]
+        for candidate in self.precisions:
+            height, width = geohash_cell_size(candidate)
+            rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+            cols = math.floor(max_lng / width) - math.floor(min_lng / width) + 1
+            if rows * cols > MAX_QUERY_CELLS:
+                break
+            precision = candidate
+
+        height, width = geohash_cell_size(precision)
+        cells = set()
+        # Step from the cell corner so no cell along the box is skipped
+        lat = math.floor(min_lat / height) * height + height / 2
+        while lat - height / 2 <= max_lat:
+            lng = math.floor(min_lng / width) * width + width / 2
+            while lng - width / 2 <= max_lng:
+                cells.add(encode_geohash(max(-90.0, min(90.0, lat)), max(-180.0, min(180.0, lng)), precision))
+                lng += width
+            lat += height
+        return precision, cells
+
+    def candidates(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+        precision, cells = self.covering_cells(min_lat, min_lng, max_lat, max_lng)
+        grid = self.cells[precision]
+        for cell in cells:
+            yield from grid.get(cell, ())
+
+    def within_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[str]:
+        """Keys of items inside a bounding box"""
+        keys = []
+        for key in self.candidates(min_lat, min_lng, max_lat, max_lng):
+            lat, lng, _ = self.points[key]
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                keys.append(key)
+        return keys
+
+    def within_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, str]]:
+        """(distance in km, key) of items within radius_km of a point, nearest first"""
+        matches = []
+        for key in self.candidates(*radius_bbox(lat, lng, radius_km)):
+            point_lat, point_lng, _ = self.points[key]
+            distance = haversine_km(lat, lng, point_lat, point_lng)
+            if distance <= radius_km:
+                matches.append((distance, key))
+        matches.sort()
+        return matches
+
+    def cell_counts(self, precision: int) -> Dict[str, int]:
+        """Located items per grid cell at one of the indexed geohash lengths"""
+        if precision not in self.cells:
+            raise ValueError(f"Geohash length must be one of {self.precisions}")
+        return {cell: len(keys) for cell, keys in self.cells[precision].items()}
+
+    def get_stats(self) -> Dict:
+        return {
+            'items': len(self.groups),
+            'located': len(self.points),
+            'cells': {precision: len(cells) for precision, cells in self.cells.items()}
+        }
@@ -1,4 +1,5 @@
 from typing import List, Optional
+from collections import Counter
 from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.responses import StreamingResponse
@@ -12,9 +13,14 @@ import datetime
 import logging
 import asyncio
 
+from autocomplete import SUGGESTION_LIMIT, Autocomplete
 from database import Database
-from crawler import crawl_site
-from crawler_engine import start_crawler_service, stop_crawler_service
+from gazetteer import REGIONS, geocode, region_area
+from geo_index import GRID_PRECISIONS, GeoIndex, decode_geohash
+from market_cube import MEASURE, MarketCube
+from search_index import SearchIndex
+from shared_state import SharedState
+from crawl_ipc import MAX_ADHOC_PAGES, CrawlerServiceError, get_crawler_backend
 import crawler_api
 
 # Configure logging
@@ -44,15 +50,25 @@ app.include_router(crawler_api.router)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-# In-memory data stores for the demo
-businesses = {}
-reviews = {}
-claims = []
-media_store = {}
-analytics = []
-leads = []
+# Radius used by /search when a point is given without radius_km
+DEFAULT_SEARCH_RADIUS_KM = 10.0
 
+# Sectors counted as retail by /distribution/retail-density
+RETAIL_SECTORS = {"retail", "trade", "wholesale"}
+
+# Results of a /search by name when no limit is given
+SEARCH_TOP_K = 50
+
+# Businesses listed by /rankings/market-share and plotted by /rankings/heatmap
+MARKET_SHARE_TOP = 10
+HEATMAP_TOP = 200
+
+SHARE_COLORS = ["#2563eb", "#16a34a", "#f59e0b", "#dc2626", "#7c3aed",
+                "#0891b2", "#db2777", "#65a30d", "#ea580c", "#4b5563"]
+
+# SQLite is the source of truth; each worker process reads through its own cache
 db = Database()
+state = SharedState(db)
 
 class Business(BaseModel):
     id: str
@@ -65,6 +81,9 @@ class Business(BaseModel):
     premium: bool = False
     verified: bool = False  # Whether the business is verified through claims
     claimed: bool = False   # Whether the business has been claimed
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    location_precision: Optional[str] = None  # exact, or district/region when geocoded from the region
 
 class BusinessCreate(BaseModel):
     name: str
@@ -73,6 +92,8 @@ class BusinessCreate(BaseModel):
     digital_score: Optional[int] = None
     formality: Optional[str] = None
     premium: bool = False
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class BusinessUpdate(BaseModel):
     name: Optional[str] = None
@@ -81,6 +102,8 @@ class BusinessUpdate(BaseModel):
     digital_score: Optional[int] = None
     formality: Optional[str] = None
     premium: Optional[bool] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class Review(BaseModel):
     business_id: str
@@ -108,6 +131,81 @@ class BIVerificationRequest(BaseModel):
     requester_contact: str
     purpose: str
 
+def business_from_row(row: dict) -> Business:
+    return Business(**{k: v for k, v in row.items() if v is not None})
+
+def business_point(biz: Business):
+    if biz.latitude is None or biz.longitude is None:
+        return None
+    return biz.latitude, biz.longitude
+
+def business_group(biz: Business) -> tuple:
+    """(gazetteer region, lowercase sector) a business is counted under"""
+    location = geocode(biz.region)
+    return (location.region if location else None, (biz.sector or "").lower())
+
+geo_index = GeoIndex(business_point, business_group)
+market_cube = MarketCube()
+cube_feeds = market_cube.feeds()
+search_index = SearchIndex()
+autocomplete = Autocomplete()
+completion_feeds = autocomplete.feeds()
+
+state.register("businesses", db.get_businesses, key="id", build=business_from_row,
+               indexes=[geo_index, cube_feeds["businesses"], search_index, completion_feeds["businesses"]])
+state.register("reviews", db.get_reviews, key="business_id", grouped=True, build=lambda row: Review(**row),
+               indexes=[cube_feeds["reviews"]])
+state.register("events", db.get_business_event_counts, key="business_id", grouped=True,
+               indexes=[cube_feeds["events"], completion_feeds["events"]])
+state.register("claims", db.get_claims, key="id")
+state.register("leads", db.get_leads, key="id", build=lambda row: Lead(**row))
+state.register("media", db.get_media, key="business_id", grouped=True, build=lambda row: row["filename"])
+
+def get_businesses() -> dict:
+    return state.get("businesses")
+
+def get_geo_index() -> GeoIndex:
+    state.refresh()
+    return geo_index
+
+def get_search_index() -> SearchIndex:
+    state.refresh()
+    return search_index
+
+def get_autocomplete() -> Autocomplete:
+    state.refresh()
+    return autocomplete
+
+def get_market_cube() -> MarketCube:
+    state.refresh()
+    return market_cube
+
+def cube_position(dimension: str, label: Optional[str]) -> Optional[int]:
+    """Position of a region or sector in the cube; None for all of them"""
+    if not label:
+        return None
+    position = market_cube.position(dimension, label)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Unknown {dimension}: {label}")
+    return position
+
+def percentage(part: float, whole: float) -> float:
+    return round(100 * part / whole, 1) if whole else 0.0
+
+def parse_bbox(bbox: str) -> tuple:
+    """Parse 'min_lat,min_lng,max_lat,max_lng'"""
+    try:
+        min_lat, min_lng, max_lat, max_lng = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lat,min_lng,max_lat,max_lng")
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="bbox minimums must not exceed its maximums")
+    return min_lat, min_lng, max_lat, max_lng
+
+def get_claims() -> List[dict]:
+    """Claim rows in submission order; approve endpoints address them by position"""
+    return sorted(state.get("claims").values(), key=lambda c: c["id"])
+
 # Authentication stubs
 fake_users_db = {
     "admin": {
@@ -146,32 +244,66 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 async def search(q: Optional[str] = None, region: Optional[str] = None,
                  sector: Optional[str] = None, min_score: Optional[int] = None,
                  premium: Optional[bool] = None, bi_id: Optional[str] = None,
-                 verified: Optional[bool] = None):
-    results = []
-    for biz in businesses.values():
-        if q and q.lower() not in biz.name.lower():
-            continue
+                 verified: Optional[bool] = None, lat: Optional[float] = None,
+                 lng: Optional[float] = None, radius_km: Optional[float] = None,
+                 bbox: Optional[str] = None, limit: Optional[int] = None):
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    businesses = get_businesses()
+    candidates = None  # Every business
+    if lat is not None or lng is not None or radius_km is not None:
+        # Near a point, nearest first
+        if lat is None or lng is None:
+            raise HTTPException(status_code=400, detail="lat and lng are both required for a radius search")
+        radius_km = DEFAULT_SEARCH_RADIUS_KM if radius_km is None else radius_km
+        if radius_km <= 0:
+            raise HTTPException(status_code=400, detail="radius_km must be positive")
+        candidates = [businesses[key] for _, key in get_geo_index().within_radius(lat, lng, radius_km)]
+        if bbox:
+            min_lat, min_lng, max_lat, max_lng = parse_bbox(bbox)
+            candidates = [b for b in candidates
+                          if min_lat <= b.latitude <= max_lat and min_lng <= b.longitude <= max_lng]
+    elif bbox:
+        candidates = [businesses[key] for key in get_geo_index().within_bbox(*parse_bbox(bbox))]
+
+    def wanted(biz: Business) -> bool:
         if region and biz.region != region:
-            continue
+            return False
         if sector and biz.sector != sector:
-            continue
+            return False
         if min_score and (biz.digital_score or 0) < min_score:
-            continue
+            return False
         if premium is not None and biz.premium != premium:
-            continue
+            return False
         if bi_id and biz.bi_id != bi_id:
-            continue
+            return False
         if verified is not None and biz.verified != verified:
-            continue
-        results.append(biz)
-    # sort premium first, then verified
+            return False
+        return True
+    
+    if q:
+        # Ranked by relevance, tolerating misspelled names
+        allowed = None if candidates is None else {biz.id for biz in candidates}
+        hits = get_search_index().search(
+            q, limit or SEARCH_TOP_K,
+            accept=lambda key: (allowed is None or key in allowed) and wanted(businesses[key])
+        )
+        return [businesses[key] for _, key in hits]
+    
+    results = [biz for biz in (businesses.values() if candidates is None else candidates) if wanted(biz)]
+    # sort premium first, then verified; the sort is stable so nearer stays first
     results.sort(key=lambda b: (b.premium, b.verified), reverse=True)
-    return results
+    return results[:limit]
+
+@app.get("/autocomplete")
+async def autocomplete_businesses(q: str, limit: int = SUGGESTION_LIMIT):
+    """Id, name and BI ID of the most viewed businesses matching what has been typed so far"""
+    return get_autocomplete().suggest(q, limit)
 
 @app.get("/verify-bi/{bi_id}")
 async def verify_bi_id(bi_id: str):
     """Verify a Business Intelligence ID and return business information"""
-    for biz in businesses.values():
+    for biz in get_businesses().values():
         if biz.bi_id == bi_id:
             return {
                 "valid": True,
@@ -188,7 +320,7 @@ async def verify_bi_id(bi_id: str):
 @app.post("/request-verification")
 async def request_bi_verification(request: BIVerificationRequest):
     """Request verification details for a BI ID (for banks/institutions)"""
-    for biz in businesses.values():
+    for biz in get_businesses().values():
         if biz.bi_id == request.bi_id:
             # In a real system, this would log the request and potentially notify the business
             return {
@@ -202,12 +334,18 @@ async def request_bi_verification(request: BIVerificationRequest):
             }
     raise HTTPException(status_code=404, detail="BI ID not found")
 
+def require_coordinate_pair(latitude: Optional[float], longitude: Optional[float]):
+    """Coordinates are only meaningful together; one alone would pair with a geocoded other"""
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=422, detail="latitude and longitude must be given together")
+
 @app.post("/business", response_model=Business)
 async def create_business(biz: BusinessCreate):
+    require_coordinate_pair(biz.latitude, biz.longitude)
     biz_id = str(uuid4())
     bi_id = generate_bi_id()
     # Ensure BI ID is unique
-    while any(b.bi_id == bi_id for b in businesses.values()):
+    while any(b.bi_id == bi_id for b in get_businesses().values()):
         bi_id = generate_bi_id()
     
     new_biz = Business(
@@ -217,27 +355,31 @@ async def create_business(biz: BusinessCreate):
         claimed=False,
         **biz.dict()
     )
-    businesses[biz_id] = new_biz
     db.add_business(new_biz)
-    return new_biz
+    state.invalidate()
+    # Read back to include coordinates geocoded on write
+    return get_businesses().get(biz_id, new_biz)
 
 @app.put("/business/{biz_id}", response_model=Business)
 async def update_business(biz_id: str, biz: BusinessUpdate):
-    existing = businesses.get(biz_id)
+    existing = get_businesses().get(biz_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Business not found")
-    update_data = biz.dict(exclude_unset=True)
-    for k, v in update_data.items():
-        setattr(existing, k, v)
-    businesses[biz_id] = existing
-    db.add_business(existing)
-    return existing
+    changes = biz.dict(exclude_unset=True)
+    if "latitude" in changes or "longitude" in changes:
+        require_coordinate_pair(changes.get("latitude"), changes.get("longitude"))
+        # Cleared coordinates are geocoded again from the region
+        changes["location_precision"] = "exact" if changes.get("latitude") is not None else None
+    updated = existing.copy(update=changes)
+    db.add_business(updated)
+    state.invalidate()
+    return get_businesses().get(biz_id, updated)
 
 @app.delete("/business/{biz_id}")
 async def delete_business(biz_id: str):
-    if biz_id in businesses:
-        del businesses[biz_id]
+    if biz_id in get_businesses():
         db.delete_business(biz_id)
+        state.invalidate()
         return {"status": "deleted"}
     raise HTTPException(status_code=404, detail="Business not found")
 
@@ -249,7 +391,7 @@ async def scrape(source: str = Form(...), region: Optional[str] = Form(None)):
         biz_id = str(uuid4())
         bi_id = generate_bi_id()
         # Ensure BI ID is unique
-        while any(b.bi_id == bi_id for b in businesses.values()):
+        while any(b.bi_id == bi_id for b in get_businesses().values()):
             bi_id = generate_bi_id()
             
         name = f"{source.title()} Biz {random.randint(1, 1000)}"
@@ -261,23 +403,33 @@ async def scrape(source: str = Form(...), region: Optional[str] = Form(None)):
             verified=False,
             claimed=False
         )
-        businesses[biz_id] = new_biz
         db.add_business(new_biz)
+        state.invalidate()
         generated.append(new_biz)
     return {"status": "Scraped", "added": len(generated)}
 
-
-@app.post("/crawl")
-async def crawl(start_url: str = Form(...), pages: int = Form(5)):
-    added = crawl_site(start_url, db, max_pages=pages)
-    return {"status": "crawl_complete", "added": added}
+@app.post("/crawl", status_code=202)
+async def crawl(start_url: str = Form(...), pages: int = Form(5, ge=1, le=MAX_ADHOC_PAGES)):
+    """Start a one-off crawl of a site; follow it at /crawler/jobs/{job_id}"""
+    try:
+        job = await get_crawler_backend().call("adhoc_run", start_url=start_url, pages=pages)
+    except CrawlerServiceError as e:
+        raise HTTPException(status_code=e.status, detail=e.message)
+    
+    # Stored businesses reach every worker's cache through the change log
+    return {
+        "status": "crawl_started",
+        "job_id": job["job_id"],
+        "status_url": f"/crawler/jobs/{job['job_id']}",
+        "events_url": f"/crawler/jobs/{job['job_id']}/events"
+    }
 
 @app.get("/export")
 async def export_data():
     csv_file = io.StringIO()
     writer = csv.writer(csv_file)
-    writer.writerow(["id", "name", "bi_id", "region", "sector", "digital_score", "formality", "premium", "verified", "claimed"])
-    for biz in businesses.values():
+    writer.writerow(["id", "name", "bi_id", "region", "sector", "digital_score", "formality", "premium", "verified", "claimed", "latitude", "longitude"])
+    for biz in get_businesses().values():
         writer.writerow([
             biz.id,
             biz.name,
@@ -289,6 +441,8 @@ async def export_data():
             biz.premium,
             biz.verified,
             biz.claimed,
+            "" if biz.latitude is None else biz.latitude,
+            "" if biz.longitude is None else biz.longitude,
         ])
     csv_file.seek(0)
     headers = {"Content-Disposition": "attachment; filename=businesses.csv"}
@@ -296,105 +450,96 @@ async def export_data():
 
 @app.get("/profile/{biz_id}", response_model=Business)
 async def get_profile(biz_id: str):
-    biz = businesses.get(biz_id)
+    biz = get_businesses().get(biz_id)
     if not biz:
         raise HTTPException(status_code=404, detail="Business not found")
     return biz
 
 @app.post("/review")
 async def post_review(review: Review):
-    reviews.setdefault(review.business_id, []).append(review)
     db.add_review(review)
+    state.invalidate()
     return {"status": "Review added"}
 
 @app.get("/reviews/{biz_id}", response_model=List[Review])
 async def list_reviews(biz_id: str):
-    return reviews.get(biz_id, [])
+    return state.get("reviews").get(biz_id, [])
 
 @app.post("/admin/feature")
 async def feature_business(biz_id: str, token: str = Depends(oauth2_scheme)):
-    biz = businesses.get(biz_id)
+    biz = get_businesses().get(biz_id)
     if not biz:
         raise HTTPException(status_code=404, detail="Business not found")
-    biz.premium = True
-    businesses[biz_id] = biz
+    db.add_business(biz.copy(update={"premium": True}))
+    state.invalidate()
     return {"status": "Business featured"}
 
 @app.post("/claim")
 async def claim_business(claim: Claim):
-    claims.append(claim)
-    # Mark business as claimed but not verified until approved
-    biz = businesses.get(claim.business_id)
-    if biz:
-        biz.claimed = True
-        businesses[claim.business_id] = biz
+    # Marks the business as claimed but not verified until approved
     db.add_claim(claim)
+    state.invalidate()
     return {"status": "Claim submitted"}
 
 @app.get("/claims", response_model=List[Claim])
 async def list_claims(token: str = Depends(oauth2_scheme)):
-    return claims
+    return [Claim(**row) for row in get_claims()]
 
 @app.post("/claims/approve/{index}")
 async def approve_claim(index: int, token: str = Depends(oauth2_scheme)):
+    claims = get_claims()
     if index < 0 or index >= len(claims):
         raise HTTPException(status_code=404, detail="Claim not found")
     
-    claim = claims[index]
-    claim.approved = True
-
-    db.approve_claim(claim)
-    
-    # Mark business as verified when claim is approved
-    biz = businesses.get(claim.business_id)
-    if biz:
-        biz.verified = True
-        biz.claimed = True
-        businesses[claim.business_id] = biz
+    # Also marks the business as verified
+    db.approve_claim(claims[index]["id"])
+    state.invalidate()
     
     return {"status": "approved"}
 
 @app.post("/track")
 async def track(event: AnalyticsEvent):
-    analytics.append(event)
     db.add_event(event)
     return {"status": "Event logged"}
 
 @app.get("/analytics")
 async def get_analytics():
-    views = sum(1 for e in analytics if e.action == "view")
-    clicks = sum(1 for e in analytics if e.action == "click")
+    counts = db.get_event_counts()
+    views = counts.get("view", 0)
+    clicks = counts.get("click", 0)
     return {"views": views, "clicks": clicks}
 
 @app.post("/upload-media")
 async def upload_media(biz_id: str = Form(...), file: UploadFile = File(...)):
-    media_store.setdefault(biz_id, []).append(file.filename)
     db.add_media(biz_id, file.filename)
+    state.invalidate()
     return {"status": "File uploaded", "filename": file.filename}
 
 @app.post("/lead")
 async def create_lead(lead: Lead):
-    leads.append(lead)
     db.add_lead(lead)
+    state.invalidate()
     return {"status": "Lead stored"}
 
 @app.get("/leads", response_model=List[Lead])
 async def list_leads(token: str = Depends(oauth2_scheme)):
-    return leads
+    return list(state.get("leads").values())
 
 @app.get("/media/{biz_id}")
 async def list_media(biz_id: str):
-    return media_store.get(biz_id, [])
+    return state.get("media").get(biz_id, [])
 
 @app.get("/admin")
 async def admin_dashboard(token: str = Depends(oauth2_scheme)):
-    pending = len([c for c in claims if not c.approved])
+    claims = get_claims()
+    businesses = get_businesses()
+    pending = len([c for c in claims if not c["approved"]])
     verified_businesses = len([b for b in businesses.values() if b.verified])
     return {
         "status": "Admin dashboard",
         "total_claims": len(claims),
         "pending_claims": pending,
-        "leads": len(leads),
+        "leads": len(state.get("leads")),
         "verified_businesses": verified_businesses,
         "total_businesses": len(businesses)
     }
@@ -403,7 +548,7 @@ async def admin_dashboard(token: str = Depends(oauth2_scheme)):
 @app.get("/rankings/leaderboard")
 async def get_leaderboard(region: Optional[str] = None, sector: Optional[str] = None):
     # Generate mock leaderboard data
-    business_list = list(businesses.values())
+    business_list = list(get_businesses().values())
     if not business_list:
         business_list = [
             Business(
@@ -484,22 +629,193 @@ async def get_leaderboard(region: Optional[str] = None, sector: Optional[str] =
         ]
     }
 
-# Seed with sample business
-if not businesses:
-    biz_id = str(uuid4())
-    bi_id = generate_bi_id()
-    businesses[biz_id] = Business(
-        id=biz_id, 
-        name="Sample Business",
-        bi_id=bi_id,
-        region="Dar es Salaam",
-        sector="Services",
-        digital_score=75,
-        formality="Formal",
-        premium=True,
-        verified=True,
-        claimed=True
-    )
+@app.get("/rankings/market-share")
+async def get_market_share(sector: str, region: Optional[str] = None):
+    """Leading businesses of a sector by their share of its digital score, with view and review shares"""
+    cube = get_market_cube()
+    selected = {"sector": cube_position("sector", sector), "region": cube_position("region", region)}
+    totals = cube.totals(**selected)
+    businesses = get_businesses()
+    leaders = []
+    for rank, biz_id in enumerate(cube.top_members(MARKET_SHARE_TOP, **selected), 1):
+        own = cube.business_measures(biz_id)
+        leaders.append({
+            "id": biz_id,
+            "name": businesses[biz_id].name,
+            "market_share": percentage(own["score_sum"], totals["score_sum"]),
+            "views_share": percentage(own["views"], totals["views"]),
+            "reviews_share": percentage(own["reviews"], totals["reviews"]),
+            "rank": rank,
+            "color": SHARE_COLORS[(rank - 1) % len(SHARE_COLORS)]
+        })
+    
+    # Herfindahl index of the score shares: near 0 with many equal players, 1 for a monopoly
+    hhi = totals["score_sq_sum"] / totals["score_sum"] ** 2 if totals["score_sum"] else 1.0
+    return {
+        "sector": cube.labels["sector"][selected["sector"]],
+        "region": cube.labels["region"][selected["region"]] if selected["region"] is not None else None,
+        "total_market_size": int(totals["businesses"]),
+        "businesses": leaders,
+        "competition_intensity": round(100 * (1 - hhi), 1)
+    }
+
+@app.get("/rankings/heatmap")
+async def get_visibility_heatmap(region: Optional[str] = None):
+    """Most visible businesses of a region on the map, and the leader of each sector there"""
+    cube = get_market_cube()
+    position = cube_position("region", region)
+    businesses = get_businesses()
+    
+    plotted = []
+    for biz_id in cube.top_members(HEATMAP_TOP, region=position):
+        biz = businesses[biz_id]
+        if biz.latitude is None or biz.longitude is None:
+            continue
+        score = biz.digital_score or 0
+        plotted.append({
+            "id": biz.id,
+            "name": biz.name,
+            "latitude": biz.latitude,
+            "longitude": biz.longitude,
+            "dominance_score": score,
+            "visibility_radius": round(1 + score / 20, 1),
+            "color": "#16a34a" if score >= 80 else "#f59e0b" if score >= 60 else "#dc2626",
+            "size": 8 + score // 10
+        })
+    
+    dominance = []
+    by_sector = cube.rollup("sector", region=position)
+    for index, sector in enumerate(cube.labels["sector"]):
+        count = by_sector[index, MEASURE["businesses"]]
+        leader = cube.top_members(1, region=position, sector=index)
+        if not count or not leader:
+            continue
+        leader_score = cube.business_measures(leader[0])["score_sum"]
+        dominance.append({
+            "area": sector,
+            "leader": businesses[leader[0]].name,
+            "leader_id": leader[0],
+            "dominance_percentage": percentage(leader_score, by_sector[index, MEASURE["score_sum"]]),
+            "competition_level": "high" if count >= 10 else "medium" if count >= 3 else "low"
+        })
+    
+    name = cube.labels["region"][position] if position is not None else "Tanzania"
+    area = region_area(name) or sum(region_area(r) for r in REGIONS)
+    count = cube.totals(region=position)["businesses"]
+    gaps = cube.sector_gaps(position) if position is not None else []
+    return {
+        "region": name,
+        "businesses": plotted,
+        "dominance_scores": dominance,
+        "competition_density": round(count / area, 4),
+        "market_opportunities": [
+            f"{sector}: about {gap:.0f} fewer businesses than the national mix suggests"
+            for sector, gap in gaps[:5]
+        ]
+    }
+
+@app.get("/market-mapping")
+async def get_market_mapping(region: Optional[str] = None, sector: Optional[str] = None):
+    """Size and make-up of a market, by region and sector, with under-served sectors"""
+    cube = get_market_cube()
+    region_position = cube_position("region", region)
+    sector_position = cube_position("sector", sector)
+    totals = cube.totals(region=region_position, sector=sector_position)
+    size = totals["businesses"]
+    
+    def breakdown(dimension: str, counts) -> List[dict]:
+        rows = [
+            {dimension: label, "percentage": percentage(count, size), "business_count": int(count)}
+            for label, count in zip(cube.labels[dimension], counts) if count
+        ]
+        return sorted(rows, key=lambda row: row["business_count"], reverse=True)
+    
+    average_score = totals["score_sum"] / totals["scored"] if totals["scored"] else 0.0
+    gaps = cube.sector_gaps(region_position) if region_position is not None else []
+    return {
+        "market_size": int(size),
+        # Share of businesses that manage their own listing
+        "penetration_rate": percentage(totals["claimed"], size),
+        # No listing history is kept yet to measure growth against
+        "growth_rate": 0.0,
+        # Lower digital adoption leaves more room to grow
+        "opportunity_score": round(100 - average_score, 1),
+        "regional_breakdown": breakdown(
+            "region", cube.rollup("region", region=region_position, sector=sector_position)[:, MEASURE["businesses"]]
+        ),
+        "sector_breakdown": breakdown(
+            "sector", cube.rollup("sector", region=region_position, sector=sector_position)[:, MEASURE["businesses"]]
+        ),
+        "opportunities": [
+            {
+                "title": f"{gap_sector} in {cube.labels['region'][region_position]}",
+                "description": f"About {gap:.0f} fewer {gap_sector} businesses than the national mix suggests",
+                "priority": "High" if gap >= 5 else "Medium" if gap >= 2 else "Low",
+                "estimated_value": round(gap)
+            }
+            for gap_sector, gap in gaps[:5]
+        ]
+    }
+
+@app.get("/distribution/retail-density")
+async def get_retail_density(region: Optional[str] = None):
+    """Retail businesses per km² of each region, from the geo index's running counts"""
+    retail = Counter()
+    for (biz_region, sector), count in get_geo_index().group_counts.items():
+        if biz_region and sector in RETAIL_SECTORS:
+            retail[biz_region] += count
+    densities = {name: retail[name] / region_area(name) for name in REGIONS}
+    peak = max(densities.values())
+
+    regions = list(REGIONS)
+    if region:
+        location = geocode(region)
+        if not location:
+            raise HTTPException(status_code=404, detail="Region not found")
+        regions = [location.region]
+    return sorted([
+        {
+            "region": name,
+            "retail_count": retail[name],
+            "density_per_km": round(densities[name], 4),
+            # Relative to the densest region
+            "market_saturation": round(100 * densities[name] / peak, 1) if peak else 0.0
+        }
+        for name in regions
+    ], key=lambda row: row["density_per_km"], reverse=True)
+
+@app.get("/distribution/grid")
+async def get_density_grid(precision: int = 4, bbox: Optional[str] = None):
+    """Located businesses per geohash cell, optionally only cells centred in a bounding box"""
+    try:
+        counts = get_geo_index().cell_counts(precision)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    bounds = parse_bbox(bbox) if bbox else None
+    cells = []
+    for geohash, count in counts.items():
+        min_lat, min_lng, max_lat, max_lng = decode_geohash(geohash)
+        lat, lng = (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+        if bounds and not (bounds[0] <= lat <= bounds[2] and bounds[1] <= lng <= bounds[3]):
+            continue
+        cells.append({"geohash": geohash, "latitude": round(lat, 5), "longitude": round(lng, 5), "count": count})
+    cells.sort(key=lambda cell: cell["count"], reverse=True)
+    return {"precision": precision, "precisions": list(GRID_PRECISIONS), "cells": cells}
+
+# Seed with sample business; the database skips it once any business exists
+if db.seed_business(Business(
+    id=str(uuid4()),
+    name="Sample Business",
+    bi_id=generate_bi_id(),
+    region="Dar es Salaam",
+    sector="Services",
+    digital_score=75,
+    formality="Formal",
+    premium=True,
+    verified=True,
+    claimed=True
+)):
+    state.invalidate()
 
 @app.on_event("startup")
 async def startup_event():
@@ -507,7 +823,7 @@ async def startup_event():
     
     # Start the crawler service
     try:
-        start_crawler_service()
+        get_crawler_backend().start()
         logger.info("Crawler service started successfully")
     except Exception as e:
         logger.error(f"Failed to start crawler service: {str(e)}")
@@ -518,7 +834,7 @@ async def shutdown_event():
     
     # Stop the crawler service
     try:
-        stop_crawler_service()
+        get_crawler_backend().stop()
         logger.info("Crawler service stopped successfully")
     except Exception as e:
         logger.error(f"Failed to stop crawler service: {str(e)}")
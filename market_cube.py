@@ -0,0 +1,236 @@
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from gazetteer import REGIONS, geocode
+from shared_state import IndexFeed
+
+
+SECTORS = (
+    'Agriculture', 'Manufacturing', 'Services', 'Trade', 'Retail', 'Technology',
+    'Healthcare', 'Education', 'Tourism', 'Mining', 'Finance', 'Transport'
+)
+FORMALITIES = ('Formal', 'Semi-formal', 'Informal')
+
+# Labels for values outside the known dimension values
+UNKNOWN = 'Unknown'
+OTHER = 'Other'
+
+# Totals kept for every region x sector x formality cell
+MEASURES = (
+    'businesses', 'premium', 'verified', 'claimed', 'scored', 'score_sum', 'score_sq_sum',
+    'reviews', 'rating_sum', 'views', 'clicks'
+)
+MEASURE = {name: i for i, name in enumerate(MEASURES)}
+
+# Digital score histogram buckets, ten points wide
+SCORE_BINS = 10
+
+DIMENSIONS = ('region', 'sector', 'formality')
+
+
+def dimension_key(text: str) -> str:
+    return ' '.join(text.lower().replace('-', ' ').split())
+
+
+class MarketCube:
+    """Region x sector x formality aggregates of businesses and their activity.
+
+    Each cell holds the MEASURES totals and a digital score histogram in
+    NumPy arrays, so slices and roll-ups along any dimension are array
+    sums rather than passes over businesses. Businesses, reviews and
+    event counts are fed in as they change (see feeds()), and every change
+    only adds the difference to the cell the business sits in. Cell
+    membership is kept too, so the top businesses of a slice are found
+    without visiting businesses outside it.
+    """
+
+    def __init__(self):
+        self.labels = {
+            'region': list(REGIONS) + [UNKNOWN],
+            'sector': list(SECTORS) + [OTHER, UNKNOWN],
+            'formality': list(FORMALITIES) + [UNKNOWN],
+        }
+        self.positions = {
+            dimension: {dimension_key(label): i for i, label in enumerate(labels)}
+            for dimension, labels in self.labels.items()
+        }
+        shape = tuple(len(self.labels[dimension]) for dimension in DIMENSIONS)
+        self.values = np.zeros(shape + (len(MEASURES),))
+        self.score_hist = np.zeros(shape + (SCORE_BINS,), dtype=np.int64)
+        self.cell_members: Dict[Tuple[int, int, int], set] = {}
+        self.members: Dict[str, Tuple[Tuple[int, int, int], np.ndarray, Optional[int]]] = {}
+        self.activity: Dict[str, np.ndarray] = {}  # Review and event totals per business
+        self.business_feed = IndexFeed(self.set_business, self.clear_businesses)
+        self.review_feed = IndexFeed(self.set_reviews, self.clear_reviews)
+        self.event_feed = IndexFeed(self.set_events, self.clear_events)
+
+    def cell_of(self, biz) -> Tuple[int, int, int]:
+        location = geocode(biz.region)
+        region = self.positions['region'][dimension_key(location.region if location else UNKNOWN)]
+        sectors = self.positions['sector']
+        sector = sectors.get(dimension_key(biz.sector), sectors[dimension_key(OTHER)]) if biz.sector \
+            else sectors[dimension_key(UNKNOWN)]
+        formalities = self.positions['formality']
+        formality = formalities.get(dimension_key(biz.formality or UNKNOWN), formalities[dimension_key(UNKNOWN)])
+        return region, sector, formality
+
+    def set_business(self, biz_id: str, biz):
+        """Add, move or remove (biz None) a business"""
+        entry = self.members.pop(biz_id, None)
+        if entry is not None:
+            cell, vector, score_bin = entry
+            self.values[cell] -= vector + self.activity.get(biz_id, 0)
+            if score_bin is not None:
+                self.score_hist[cell + (score_bin,)] -= 1
+            self.cell_members[cell].discard(biz_id)
+        if biz is None:
+            return
+
+        cell = self.cell_of(biz)
+        vector = np.zeros(len(MEASURES))
+        vector[MEASURE['businesses']] = 1
+        vector[MEASURE['premium']] = bool(biz.premium)
+        vector[MEASURE['verified']] = bool(biz.verified)
+        vector[MEASURE['claimed']] = bool(biz.claimed)
+        score_bin = None
+        if biz.digital_score is not None:
+            vector[MEASURE['scored']] = 1
+            vector[MEASURE['score_sum']] = biz.digital_score
+            vector[MEASURE['score_sq_sum']] = biz.digital_score ** 2
+            score_bin = min(SCORE_BINS - 1, max(0, int(biz.digital_score) * SCORE_BINS // 100))
+            self.score_hist[cell + (score_bin,)] += 1
+        self.values[cell] += vector + self.activity.get(biz_id, 0)
+        self.members[biz_id] = (cell, vector, score_bin)
+        self.cell_members.setdefault(cell, set()).add(biz_id)
+
+    def set_activity(self, biz_id: str, measures: Dict[str, float]):
+        """Replace some activity totals of a business, moving its cell's totals with them"""
+        old = self.activity.get(biz_id)
+        new = np.zeros(len(MEASURES)) if old is None else old.copy()
+        for name, value in measures.items():
+            new[MEASURE[name]] = value
+        if biz_id in self.members:
+            cell = self.members[biz_id][0]
+            self.values[cell] += new - (0 if old is None else old)
+        if new.any():
+            self.activity[biz_id] = new
+        else:
+            self.activity.pop(biz_id, None)
+
+    def set_reviews(self, biz_id: str, reviews: Optional[List[Any]]):
+        reviews = reviews or []
+        self.set_activity(biz_id, {
+            'reviews': len(reviews),
+            'rating_sum': sum(review.rating for review in reviews)
+        })
+
+    def set_events(self, biz_id: str, rows: Optional[List[Dict]]):
+        counts = {row['action']: row['count'] for row in rows or []}
+        self.set_activity(biz_id, {'views': counts.get('view', 0), 'clicks': counts.get('click', 0)})
+
+    def clear_businesses(self):
+        self.values[...] = 0
+        self.score_hist[...] = 0
+        self.members = {}
+        self.cell_members = {}
+
+    def clear_reviews(self):
+        for biz_id in list(self.activity):
+            self.set_activity(biz_id, {'reviews': 0, 'rating_sum': 0})
+
+    def clear_events(self):
+        for biz_id in list(self.activity):
+            self.set_activity(biz_id, {'views': 0, 'clicks': 0})
+
+    def feeds(self) -> Dict[str, IndexFeed]:
+        """SharedState indexes for the collections the cube is built from"""
+        return {'businesses': self.business_feed, 'reviews': self.review_feed, 'events': self.event_feed}
+
+    def position(self, dimension: str, label: Optional[str]) -> Optional[int]:
+        """Index of a label along a dimension; regions are matched through the gazetteer"""
+        if dimension == 'region':
+            location = geocode(label)
+            label = location.region if location else label
+        return self.positions[dimension].get(dimension_key(label or ''))
+
+    def selection(self, region: Optional[int] = None, sector: Optional[int] = None,
+                  formality: Optional[int] = None) -> tuple:
+        """Index into the cell axes; None keeps a whole dimension"""
+        return tuple(slice(None) if i is None else i for i in (region, sector, formality))
+
+    def totals(self, **selected) -> Dict[str, float]:
+        """MEASURES summed over a slice, e.g. totals(region=0)"""
+        values = self.values[self.selection(**selected)].reshape(-1, len(MEASURES)).sum(axis=0)
+        return dict(zip(MEASURES, values.tolist()))
+
+    def rollup(self, dimension: str, **selected) -> np.ndarray:
+        """Totals of a slice per value of one dimension, shape (values, measures).
+
+        A value chosen for the rolled-up dimension itself keeps the full
+        axis, with every other row zero.
+        """
+        values = self.values
+        for axis in reversed(range(len(DIMENSIONS))):
+            name = DIMENSIONS[axis]
+            if name == dimension:
+                continue
+            chosen = selected.get(name)
+            values = values.sum(axis=axis) if chosen is None else values.take(chosen, axis=axis)
+        chosen = selected.get(dimension)
+        if chosen is not None:
+            only = np.zeros_like(values)
+            only[chosen] = values[chosen]
+            values = only
+        return values
+
+    def histogram(self, **selected) -> List[int]:
+        return self.score_hist[self.selection(**selected)].reshape(-1, SCORE_BINS).sum(axis=0).tolist()
+
+    def slice_members(self, **selected) -> Iterable[str]:
+        """Business ids in the cells of a slice"""
+        ranges = [
+            range(len(self.labels[name])) if selected.get(name) is None else (selected[name],)
+            for name in DIMENSIONS
+        ]
+        for region in ranges[0]:
+            for sector in ranges[1]:
+                for formality in ranges[2]:
+                    yield from self.cell_members.get((region, sector, formality), ())
+
+    def business_measures(self, biz_id: str) -> Dict[str, float]:
+        """A business's own contribution to its cell"""
+        entry = self.members.get(biz_id)
+        vector = np.zeros(len(MEASURES)) if entry is None else entry[1]
+        vector = vector + self.activity.get(biz_id, 0)
+        return dict(zip(MEASURES, vector.tolist()))
+
+    def top_members(self, n: int, measure: str = 'score_sum', **selected) -> List[str]:
+        """The n businesses of a slice with the highest value of a measure"""
+        index = MEASURE[measure]
+
+        def value(biz_id: str) -> float:
+            activity = self.activity.get(biz_id)
+            return self.members[biz_id][1][index] + (0 if activity is None else activity[index])
+        return heapq.nlargest(n, self.slice_members(**selected), key=value)
+
+    def sector_gaps(self, region: int) -> List[Tuple[str, float]]:
+        """Known sectors with fewer businesses in a region than the national mix implies"""
+        counts = self.rollup('sector', region=region)[:, MEASURE['businesses']]
+        national = self.rollup('sector')[:, MEASURE['businesses']]
+        known = len(SECTORS)
+        if not national[:known].sum():
+            return []
+        expected = national[:known] / national[:known].sum() * counts[:known].sum()
+        gaps = expected - counts[:known]
+        order = np.argsort(-gaps)
+        return [(SECTORS[i], float(gaps[i])) for i in order if gaps[i] >= 1]
+
+    def get_stats(self) -> Dict:
+        return {
+            'cells': int(np.prod(self.values.shape[:-1])),
+            'occupied_cells': int(np.count_nonzero(self.values[..., MEASURE['businesses']])),
+            'businesses': len(self.members),
+            'bytes': int(self.values.nbytes + self.score_hist.nbytes)
+        }
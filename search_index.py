@@ -0,0 +1,194 @@
+import heapq
+import math
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from text_match import jaccard, tokenize, trigrams
+
+
+# BM25 term frequency saturation and document length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Lowest trigram similarity at which an indexed term stands in for a query term
+FUZZY_THRESHOLD = 0.3
+
+# Most indexed terms a misspelled query term is expanded to
+MAX_EXPANSIONS = 5
+
+# Most indexed terms a partial word ('sol' for 'solutions') is expanded to
+MAX_PARTIAL_EXPANSIONS = 25
+
+# Blend of the final score: BM25 relevance and whole-name trigram similarity,
+# both scaled to 0..1, plus flat boosts for premium and verified listings
+BM25_WEIGHT = 0.6
+TRIGRAM_WEIGHT = 0.4
+PREMIUM_BOOST = 0.1
+VERIFIED_BOOST = 0.05
+
+# Candidates, per result asked for, that are rescored with name similarity
+RERANK_FACTOR = 5
+
+
+class SearchIndex:
+    """Typo-tolerant ranked search over business names.
+
+    Term statistics (postings with term frequencies, document lengths)
+    and trigram sets of each name and each indexed term are kept as
+    businesses change, through the SharedState index protocol. A query
+    term that is not indexed is replaced by the indexed terms most
+    similar to it by trigrams, and any query term also stands for the
+    indexed terms containing it ('tech' for 'biotech'), so only
+    businesses sharing a (possibly corrected or partial) term are scored. Each is scored with BM25 and premium/
+    verified boosts, and the leaders, taken with a heap, are blended with
+    the trigram similarity of their whole name to pick the top k.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}  # term -> {key: term frequency}
+        self.doc_terms: Dict[str, Set[str]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.length_counts: Counter = Counter()
+        self.total_length = 0
+        self.name_grams: Dict[str, FrozenSet[str]] = {}
+        self.boosts: Dict[str, float] = {}
+        self.term_grams: Dict[str, FrozenSet[str]] = {}
+        self.gram_terms: Dict[str, Set[str]] = {}  # trigram -> indexed terms containing it
+
+    def clear(self):
+        self.__init__()
+
+    def update(self, key: str, old, new):
+        self.remove(key)
+        if new is not None:
+            self.add(key, new.name, bool(new.premium), bool(new.verified))
+
+    def add(self, key: str, name: str, premium: bool = False, verified: bool = False):
+        terms = tokenize(name)
+        for term, count in Counter(terms).items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                grams = self.term_grams[term] = trigrams(term)
+                for gram in grams:
+                    self.gram_terms.setdefault(gram, set()).add(term)
+            postings[key] = count
+        self.doc_terms[key] = set(terms)
+        self.doc_lengths[key] = len(terms)
+        self.length_counts[len(terms)] += 1
+        self.total_length += len(terms)
+        self.name_grams[key] = trigrams(' '.join(terms))
+        self.boosts[key] = PREMIUM_BOOST * premium + VERIFIED_BOOST * verified
+
+    def remove(self, key: str):
+        length = self.doc_lengths.pop(key, None)
+        if length is None:
+            return
+        self.total_length -= length
+        self.length_counts[length] -= 1
+        if not self.length_counts[length]:
+            del self.length_counts[length]
+        for term in self.doc_terms.pop(key):
+            postings = self.postings[term]
+            del postings[key]
+            if not postings:
+                del self.postings[term]
+                for gram in self.term_grams.pop(term):
+                    terms = self.gram_terms[gram]
+                    terms.discard(term)
+                    if not terms:
+                        del self.gram_terms[gram]
+        del self.name_grams[key]
+        del self.boosts[key]
+
+    def expand(self, term: str) -> List[Tuple[str, float]]:
+        """Indexed terms standing in for a query term, with their similarity to it"""
+        expansions = dict(self.partial_matches(term))
+        if term in self.postings:
+            expansions[term] = 1.0
+            return list(expansions.items())
+        grams = trigrams(term)
+        overlaps = Counter()
+        for gram in grams:
+            overlaps.update(self.gram_terms.get(gram, ()))
+        similar = []
+        for candidate, shared in overlaps.items():
+            similarity = shared / (len(grams) + len(self.term_grams[candidate]) - shared)
+            if similarity >= FUZZY_THRESHOLD:
+                similar.append((candidate, similarity))
+        for candidate, similarity in heapq.nlargest(MAX_EXPANSIONS, similar, key=lambda item: item[1]):
+            expansions[candidate] = max(similarity, expansions.get(candidate, 0.0))
+        return list(expansions.items())
+
+    def partial_matches(self, term: str) -> List[Tuple[str, float]]:
+        """Longer indexed terms containing a query term, scored by the share of them it covers.
+
+        Candidates are the terms holding all of the query term's trigrams;
+        a term too short for inner trigrams matches the starts of words.
+        """
+        if len(term) >= 3:
+            grams = {term[i:i + 3] for i in range(len(term) - 2)}
+            contains = lambda candidate: term in candidate
+        else:
+            grams = {f"  {term}"[-3:]}
+            contains = lambda candidate: candidate.startswith(term)
+        postings = sorted((self.gram_terms.get(gram, set()) for gram in grams), key=len)
+        matches = [
+            (candidate, len(term) / len(candidate))
+            for candidate in postings[0].intersection(*postings[1:])
+            if len(candidate) > len(term) and contains(candidate)
+        ]
+        return heapq.nlargest(MAX_PARTIAL_EXPANSIONS, matches, key=lambda item: (item[1], item[0]))
+
+    def length_norms(self) -> Dict[int, float]:
+        """BM25 length normalization for each name length in the index"""
+        average = self.total_length / len(self.doc_lengths) if self.doc_lengths else 1.0
+        return {
+            length: BM25_K1 * (1 - BM25_B + BM25_B * length / (average or 1.0))
+            for length in self.length_counts
+        }
+
+    def search(self, query: str, k: int, accept: Optional[Callable[[str], bool]] = None) -> List[Tuple[float, str]]:
+        """(score, key) of the k best matches for a query, best first"""
+        terms = tokenize(query)
+        if not terms or k <= 0:
+            return []
+
+        norms = self.length_norms()
+        lengths = self.doc_lengths
+        count = len(lengths)
+        relevance: Counter = Counter()
+        for term in dict.fromkeys(terms):
+            best: Dict[str, float] = {}
+            for candidate, similarity in self.expand(term):
+                postings = self.postings[candidate]
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                scale = similarity * idf * (BM25_K1 + 1)
+                for key, tf in postings.items():
+                    weight = scale * tf / (tf + norms[lengths[key]])
+                    if weight > best.get(key, 0.0):
+                        best[key] = weight
+            relevance.update(best)
+        if not relevance:
+            return []
+
+        # Rank by BM25 and boosts first, then rescore the leaders with name similarity
+        top = max(relevance.values())
+        boosts = self.boosts
+        ranked = heapq.nlargest(k * RERANK_FACTOR, (
+            (BM25_WEIGHT * value / top + boosts[key], key)
+            for key, value in relevance.items()
+            if accept is None or accept(key)
+        ))
+        query_grams = trigrams(' '.join(terms))
+        return heapq.nlargest(k, (
+            (score + TRIGRAM_WEIGHT * jaccard(query_grams, self.name_grams[key]), key)
+            for score, key in ranked
+        ))
+
+    def get_stats(self) -> Dict:
+        return {
+            'businesses': len(self.doc_lengths),
+            'terms': len(self.postings),
+            'trigrams': len(self.gram_terms)
+        }
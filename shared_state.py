@@ -0,0 +1,139 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from database import Database
+
+
+# Longest a read may serve data another process changed
+STATE_CHECK_SECONDS = 0.1
+
+# Change log entries are kept this long; a cache further behind reloads fully
+STATE_LOG_KEEP_SECONDS = 24 * 3600
+
+# Seconds between prunes of the change log
+STATE_PRUNE_SECONDS = 3600
+
+
+@dataclass
+class CachedCollection:
+    """A table cached by key, with rows turned into API objects"""
+    load: Callable[[Optional[List[str]]], List[Dict]]  # All rows, or those with the given keys
+    key: str  # Row field the change log keys refer to
+    grouped: bool = False  # Several rows per key, cached as a list
+    build: Callable[[Dict], Any] = dict
+    indexes: List[Any] = field(default_factory=list)  # Kept current through clear() and update(key, old, new)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    def reload(self):
+        self.data = {}
+        self.apply(self.load(None))
+        for index in self.indexes:
+            index.clear()
+            for key, value in self.data.items():
+                index.update(key, None, value)
+
+    def reload_keys(self, keys: List[str]):
+        old = {key: self.data.pop(key, None) for key in keys}
+        self.apply(self.load(keys))
+        for index in self.indexes:
+            for key, value in old.items():
+                index.update(key, value, self.data.get(key))
+
+    def apply(self, rows: List[Dict]):
+        for row in rows:
+            key = str(row[self.key])
+            if self.grouped:
+                self.data.setdefault(key, []).append(self.build(row))
+            else:
+                self.data[key] = self.build(row)
+
+
+class IndexFeed:
+    """Feeds a cached collection into one part of a larger index.
+
+    For indexes built from several collections: each collection gets its
+    own feed, so reloading one clears only what came from it.
+    """
+
+    def __init__(self, update: Callable[[str, Any], None], clear: Callable[[], None]):
+        self.set = update
+        self.clear = clear
+
+    def update(self, key: str, old: Any, new: Any):
+        self.set(key, new)
+
+
+class SharedState:
+    """Per-process read cache of data whose source of truth is SQLite.
+
+    Every write through Database logs the changed keys in the state_changes
+    table in the same transaction. Before a read, if STATE_CHECK_SECONDS
+    have passed, the cache applies the changes logged since it last looked
+    and reloads only those keys, so API workers in separate processes stay
+    consistent. Call invalidate() after a write so this process reads its
+    own writes immediately.
+    """
+
+    def __init__(self, database: Database, check_interval: float = STATE_CHECK_SECONDS):
+        self.db = database
+        self.check_interval = check_interval
+        self.collections: Dict[str, CachedCollection] = {}
+        self.seq: Optional[int] = None  # Last change applied; None until loaded
+        self.checked_at = 0.0
+        self.pruned_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def register(self, name: str, load: Callable, key: str, grouped: bool = False,
+                 build: Optional[Callable[[Dict], Any]] = None, indexes: Optional[List[Any]] = None):
+        self.collections[name] = CachedCollection(
+            load=load, key=key, grouped=grouped, build=build or dict, indexes=list(indexes or [])
+        )
+        self.seq = None
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """The cached collection by key; do not modify it, write through Database"""
+        self.refresh()
+        return self.collections[name].data
+
+    def invalidate(self):
+        """Check the change log on the next read"""
+        self.checked_at = 0.0
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.seq is not None and now - self.checked_at < self.check_interval:
+            return
+        with self.lock:
+            if self.seq is None:
+                self.load_all()
+            else:
+                first_seq, changes = self.db.get_state_changes(self.seq)
+                if first_seq is not None and first_seq > self.seq + 1:
+                    # Changes we have not seen were pruned from the log
+                    self.load_all()
+                elif changes:
+                    self.apply_changes(changes)
+            self.checked_at = now
+
+            if now - self.pruned_at >= STATE_PRUNE_SECONDS:
+                self.db.prune_state_changes(STATE_LOG_KEEP_SECONDS)
+                self.pruned_at = now
+
+    def load_all(self):
+        # Read the sequence first; changes made during the load are applied again later
+        seq = self.db.get_state_seq()
+        for collection in self.collections.values():
+            collection.reload()
+        self.seq = seq
+
+    def apply_changes(self, changes: List[tuple]):
+        changed: Dict[str, set] = {}
+        for _, name, key in changes:
+            changed.setdefault(name, set()).add(key)
+        for name, keys in changed.items():
+            collection = self.collections.get(name)
+            if collection is not None:
+                collection.reload_keys(sorted(keys))
+        self.seq = changes[-1][0]
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { Bot, Play, Pause, Plus, Edit3, Trash2, ArrowLeft, Clock, Globe, Activity } from 'lucide-react'
-import { getCrawlerStatus, getCrawlTargets, runCrawl, addCrawlTarget, deleteCrawlTarget, startCrawler, stopCrawler } from '../utils/api'
+import { getCrawlerStatus, getCrawlTargets, runCrawl, watchCrawlJob, addCrawlTarget, deleteCrawlTarget, startCrawler, stopCrawler } from '../utils/api'
 import { CrawlTarget, CrawlerStatus, CrawlResult } from '../types'
 import toast from 'react-hot-toast'
 
@@ -70,16 +70,31 @@ const CrawlerManagement: React.FC = () => {
   }
 
   const handleRunCrawl = async (targetName: string) => {
+    const toastId = toast.loading(`Starting crawl for ${targetName}...`)
     try {
-      toast.loading(`Starting crawl for ${targetName}...`)
-      const result = await runCrawl(targetName)
-      toast.dismiss()
-      toast.success(`Crawl completed! Found ${result.businesses_found} businesses from ${result.pages_crawled} pages`)
-      await loadCrawlerData()
+      const job = await runCrawl(targetName)
+      // The crawl runs in the background; follow its progress stream
+      watchCrawlJob(
+        job.job_id,
+        (progress) => {
+          const eta = progress.eta_seconds !== null ? `, ~${Math.ceil(progress.eta_seconds)}s left` : ''
+          toast.loading(
+            `Crawling ${targetName}: ${progress.pages_crawled}/${progress.max_pages} pages, ${progress.businesses_found} businesses${eta}`,
+            { id: toastId }
+          )
+        },
+        async (result) => {
+          if (result.status === 'completed') {
+            toast.success(`Crawl completed! Found ${result.businesses_found} businesses from ${result.pages_crawled} pages`, { id: toastId })
+          } else {
+            toast.error(`Crawl ${result.status} after ${result.pages_crawled} pages`, { id: toastId })
+          }
+          await loadCrawlerData()
+        }
+      )
     } catch (error) {
-      toast.dismiss()
       console.error('Error running crawl:', error)
-      toast.error('Failed to run crawl')
+      toast.error('Failed to run crawl', { id: toastId })
     }
   }
 
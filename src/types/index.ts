@@ -11,6 +11,12 @@ export interface Business {
   claimed: boolean   // Whether the business has been claimed
 }
 
+export interface BusinessSuggestion {
+  id: string
+  name: string
+  bi_id: string
+}
+
 export interface BusinessCreate {
   name: string
   region?: string
@@ -122,6 +128,25 @@ export interface CrawlResult {
   success: boolean
 }
 
+export interface CrawlJob {
+  job_id: string
+  target_name: string
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled'
+  created_at: string
+  started_at: string | null
+  finished_at: string | null
+  pages_crawled: number
+  pages_skipped: number
+  businesses_found: number
+  queued_urls: number
+  max_pages: number
+  errors: string[]
+  error_count: number
+  eta_seconds: number | null
+  status_url?: string
+  events_url?: string
+}
+
 export interface CrawlerStatus {
   running: boolean
   total_targets: number
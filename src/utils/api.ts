@@ -1,6 +1,7 @@
 import axios from 'axios'
 import { 
   Business, 
+  BusinessSuggestion, 
   BusinessCreate, 
   BusinessUpdate, 
   Review, 
@@ -52,7 +53,7 @@ import {
   CompetitiveAlert,
   CrawlTarget,
   CrawlerStatus,
-  CrawlResult
+  CrawlJob
 } from '../types'
 
 const api = axios.create({
@@ -75,6 +76,11 @@ export const searchBusinesses = async (filters: SearchFilters): Promise<Business
   return response.data
 }
 
+export const autocompleteBusinesses = async (q: string, limit?: number): Promise<BusinessSuggestion[]> => {
+  const response = await api.get('/autocomplete', { params: { q, limit } })
+  return response.data
+}
+
 export const createBusiness = async (business: BusinessCreate): Promise<Business> => {
   const response = await api.post('/business', business)
   return response.data
@@ -109,11 +115,35 @@ export const getCrawlTargets = async (): Promise<CrawlTarget[]> => {
   return response.data
 }
 
-export const runCrawl = async (targetName: string): Promise<CrawlResult> => {
+export const runCrawl = async (targetName: string): Promise<CrawlJob> => {
   const response = await api.post(`/crawler/run/${targetName}`)
   return response.data
 }
 
+export const getCrawlJob = async (jobId: string): Promise<CrawlJob> => {
+  const response = await api.get(`/crawler/jobs/${jobId}`)
+  return response.data
+}
+
+export const cancelCrawlJob = async (jobId: string): Promise<void> => {
+  await api.post(`/crawler/jobs/${jobId}/cancel`)
+}
+
+// Streams job progress; call close() on the returned EventSource to stop watching
+export const watchCrawlJob = (
+  jobId: string,
+  onProgress: (job: CrawlJob) => void,
+  onDone: (job: CrawlJob) => void
+): EventSource => {
+  const source = new EventSource(`${api.defaults.baseURL}/crawler/jobs/${jobId}/events`)
+  source.addEventListener('progress', (event) => onProgress(JSON.parse((event as MessageEvent).data)))
+  source.addEventListener('done', (event) => {
+    source.close()
+    onDone(JSON.parse((event as MessageEvent).data))
+  })
+  return source
+}
+
 export const addCrawlTarget = async (target: CrawlTarget): Promise<void> => {
   await api.post('/crawler/targets', target)
 }
@@ -0,0 +1,22 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def make_business():
+    """Factory of objects with the fields of main.Business, without importing the API"""
+    def make(id, name='Test Business', **fields):
+        values = {
+            'bi_id': f'BI-{id}', 'region': None, 'sector': None, 'digital_score': None,
+            'formality': None, 'premium': False, 'verified': False, 'claimed': False,
+            'latitude': None, 'longitude': None, 'location_precision': None,
+        }
+        values.update(fields)
+        return SimpleNamespace(id=str(id), name=name, **values)
+    return make
@@ -0,0 +1,99 @@
+import random
+
+import autocomplete
+from autocomplete import Autocomplete, completion_key
+
+
+def views(count):
+    return [{'action': 'view', 'count': count}, {'action': 'click', 'count': 1}]
+
+
+def ids(suggestions):
+    return [suggestion['id'] for suggestion in suggestions]
+
+
+def test_completion_key():
+    assert completion_key('  Café-Bar ') == 'cafe bar'
+    assert completion_key(None) == ''
+
+
+def test_prefixes_of_any_word_and_bi_id(make_business):
+    index = Autocomplete()
+    index.business_feed.update('1', None, make_business(1, 'Kilimanjaro Coffee House', bi_id='TZ-ABC-1'))
+    index.business_feed.update('2', None, make_business(2, 'Coffee Corner', bi_id='TZ-XYZ-2'))
+    assert ids(index.suggest('kili')) == ['1']
+    assert set(ids(index.suggest('coff'))) == {'1', '2'}
+    assert ids(index.suggest('house')) == ['1']
+    assert ids(index.suggest('tz xyz')) == ['2']
+    assert index.suggest('tea') == []
+    assert index.suggest('  ') == []
+    assert index.suggest('kili')[0] == {'id': '1', 'name': 'Kilimanjaro Coffee House', 'bi_id': 'TZ-ABC-1'}
+
+
+def test_ranked_by_views_then_featured_then_shorter(make_business):
+    index = Autocomplete()
+    index.business_feed.update('long', None, make_business('long', 'Duka Kubwa la Mama'))
+    index.business_feed.update('short', None, make_business('short', 'Duka'))
+    index.business_feed.update('premium', None, make_business('premium', 'Duka Premium', premium=True))
+    assert ids(index.suggest('duka')) == ['premium', 'short', 'long']
+    index.event_feed.update('long', None, views(3))
+    assert ids(index.suggest('duka')) == ['long', 'premium', 'short']
+    assert ids(index.suggest('duka', limit=1)) == ['long']
+
+
+def test_renames_and_deletes(make_business):
+    index = Autocomplete()
+    old = make_business(1, 'Mama Lishe')
+    index.business_feed.update('1', None, old)
+    index.business_feed.update('1', old, make_business(1, 'Baba Lishe'))
+    assert index.suggest('mama') == []
+    assert ids(index.suggest('baba')) == ['1']
+    index.business_feed.update('1', None, None)
+    assert index.suggest('lishe') == []
+    assert index.get_stats()['entries'] == 0
+
+
+def brute_force(businesses, counts, prefix):
+    def rank(biz):
+        boost = autocomplete.PREMIUM_WEIGHT * biz.premium + autocomplete.VERIFIED_WEIGHT * biz.verified
+        return counts.get(biz.id, 0) + boost, -len(biz.name)
+    matches = [
+        biz for biz in businesses.values()
+        if any(key.startswith(prefix) for key in
+               [' '.join(completion_key(biz.name).split()[i:]) for i in range(len(biz.name.split()))] +
+               [completion_key(biz.bi_id)])
+    ]
+    return sorted(matches, key=rank, reverse=True)[:autocomplete.SUGGESTION_LIMIT]
+
+
+def test_cached_prefixes_match_brute_force(make_business, monkeypatch):
+    # A low threshold so most prefixes go through the cache
+    monkeypatch.setattr(autocomplete, 'HOT_PREFIX_ENTRIES', 3)
+    rng = random.Random(5)
+    words = ['duka', 'dawa', 'mama', 'maji', 'kahawa', 'kilimo', 'soko', 'samaki']
+    index = Autocomplete()
+    businesses, counts = {}, {}
+    prefixes = ['d', 'du', 'ma', 'k', 'ki', 's', 'sa', 'bi']
+    for step in range(600):
+        key = str(rng.randrange(80))
+        roll = rng.random()
+        if roll < 0.5:
+            counts[key] = max(0, counts.get(key, 0) + rng.choice([-2, -1, 1, 1, 2, 3]))
+            rows = views(counts[key]) if counts[key] else None
+            index.event_feed.update(key, None, rows)
+        elif roll < 0.6 and key in businesses:
+            index.business_feed.update(key, businesses.pop(key), None)
+        else:
+            # Ids are unique per business, so their BI IDs never tie on rank
+            biz = make_business(key, ' '.join(rng.choices(words, k=rng.randint(1, 3))),
+                                premium=rng.random() < 0.2, verified=rng.random() < 0.2)
+            index.business_feed.update(key, businesses.get(key), biz)
+            businesses[key] = biz
+        if step % 10 == 0:
+            for prefix in prefixes:
+                expected = brute_force(businesses, counts, prefix)
+                suggested = index.suggest(prefix)
+                rank = lambda biz: (counts.get(biz.id, 0), biz.premium, biz.verified, -len(biz.name))
+                # Equal ranks may come in either order
+                assert [rank(businesses[biz_id]) for biz_id in ids(suggested)] == [rank(b) for b in expected]
+    assert index.get_stats()['cached_prefixes'] > 0
@@ -0,0 +1,80 @@
+import asyncio
+
+from crawl_metrics import CrawlMetrics
+from crawler_engine import BusinessSink
+from database import Database
+
+
+def record(biz_id, bi_id=None, name='Sink Test Shop'):
+    return {
+        'id': biz_id, 'name': name, 'bi_id': bi_id or f'BI-{biz_id}', 'region': 'Arusha',
+        'sector': 'Retail', 'digital_score': 50, 'formality': 'Formal',
+        'premium': False, 'verified': False, 'claimed': False
+    }
+
+
+class CountingDatabase(Database):
+    """Database that counts the transactions add_businesses runs"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.batches = []
+
+    def add_businesses(self, bizs):
+        self.batches.append(len(bizs))
+        return super().add_businesses(bizs)
+
+
+def test_records_are_written_in_batches(tmp_path):
+    db = CountingDatabase(str(tmp_path / 'sink.db'))
+
+    async def store():
+        sink = BusinessSink(db, batch_size=3, metrics=CrawlMetrics())
+        await sink.add([record('1'), record('2')])
+        assert db.batches == []
+        await sink.add([record('3'), record('4')])
+        await sink.flush()
+        return sink
+
+    sink = asyncio.run(store())
+    assert db.batches == [4]
+    assert sink.written == 4 and sink.failed == 0
+    assert len(db.get_businesses()) == 4
+
+
+def test_failed_rows_do_not_abort_the_batch(tmp_path):
+    db = Database(str(tmp_path / 'sink.db'))
+    errors = []
+
+    async def store():
+        sink = BusinessSink(db, errors=errors, metrics=CrawlMetrics())
+        # A JSON-LD name left as an object cannot be bound as a column value
+        await sink.add([record('1'), record('2', name={'@value': 'Shop'}), record('3')])
+        await sink.flush()
+        return sink
+
+    sink = asyncio.run(store())
+    assert sink.written == 2 and sink.failed == 1
+    assert len(errors) == 1 and '@value' in errors[0]
+    assert sorted(b['id'] for b in db.get_businesses()) == ['1', '3']
+
+
+def test_later_updates_of_a_record_win(tmp_path):
+    db = Database(str(tmp_path / 'sink.db'))
+
+    async def store():
+        sink = BusinessSink(db, batch_size=1, metrics=CrawlMetrics())
+        await asyncio.gather(sink.add([record('1', name='Old Name')]),
+                             sink.add([record('1', name='New Name')]))
+        await sink.flush()
+
+    asyncio.run(store())
+    assert [b['name'] for b in db.get_businesses()] == ['New Name']
+
+
+def test_batch_changes_are_logged_once_per_row(tmp_path):
+    db = Database(str(tmp_path / 'sink.db'))
+    start = db.get_state_seq()
+    db.add_businesses([type('Business', (), record(str(i))) for i in range(5)])
+    _, changes = db.get_state_changes(start)
+    assert [(collection, key) for _, collection, key in changes] == [('businesses', str(i)) for i in range(5)]
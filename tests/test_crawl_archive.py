@@ -0,0 +1,85 @@
+import asyncio
+import gzip
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+import crawler_engine
+from crawl_archive import PageArchive
+from crawl_replay import replay_archive
+from database import Database
+
+
+def listing(name):
+    return f'<html><body><h3 class="business-name" data-biz-name="{name}">{name}</h3></body></html>'
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'crawl.db'))
+
+
+@pytest.fixture
+def archive(db, tmp_path):
+    return PageArchive(db, str(tmp_path / 'archive'))
+
+
+def test_record_reads_back_from_its_index_entry(archive, tmp_path):
+    entry = archive.append('https://example.com/', 'site', listing('Näive Café'), 'abc')
+    headers, html = archive.read(entry['segment'], entry['offset'], entry['length'])
+    assert html == listing('Näive Café')
+    assert headers['WARC-Target-URI'] == 'https://example.com/'
+    assert headers['BizIntel-Target'] == 'site'
+
+    # Each record is its own gzip member, readable without the rest of the segment
+    with open(tmp_path / 'archive' / entry['segment'], 'rb') as f:
+        f.seek(entry['offset'])
+        assert gzip.decompress(f.read(entry['length'])).startswith(b'WARC/1.1\r\n')
+
+
+def test_segments_rotate_at_max_size(db, tmp_path):
+    archive = PageArchive(db, str(tmp_path / 'archive'), segment_max_bytes=1)
+    first = archive.append('https://example.com/a', 'site', listing('A'))
+    second = archive.append('https://example.com/b', 'site', listing('B'))
+    assert first['segment'] != second['segment']
+    assert len(os.listdir(tmp_path / 'archive')) == 2
+
+
+def test_only_the_newest_copy_of_a_page_is_replayed(archive):
+    archive.append('https://example.com/a', 'site', listing('Old A'))
+    archive.append('https://example.com/b', 'other', listing('B'))
+    archive.append('https://example.com/a', 'site', listing('New A'))
+    pages = {entry['url']: html for entry, html in archive.iter_latest()}
+    assert pages == {'https://example.com/a': listing('New A'), 'https://example.com/b': listing('B')}
+    assert [entry['url'] for entry, _ in archive.iter_latest('other')] == ['https://example.com/b']
+
+
+def test_replay_extracts_without_fetching(archive, db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    archive.append('https://example.com/a', 'site', listing('Archive Traders'))
+    archive.append('https://example.com/b', 'site', listing('Replay Traders'))
+
+    dry_run = asyncio.run(replay_archive(db, archive_dir=archive.directory, store=False))
+    assert (dry_run['pages'], dry_run['businesses_extracted'], dry_run['businesses_stored']) == (2, 2, 0)
+    assert db.get_businesses() == []
+
+    stats = asyncio.run(replay_archive(db, archive_dir=archive.directory))
+    assert stats['businesses_stored'] == 2
+    assert sorted(b['name'] for b in db.get_businesses()) == ['Archive Traders', 'Replay Traders']
+
+
+def test_oldest_segments_are_deleted_past_max_bytes(db, tmp_path):
+    record_size = len(PageArchive.build_record('https://example.com/0', 'site', listing('Shop 0'),
+                                               datetime.now(timezone.utc)))
+    archive = PageArchive(db, str(tmp_path / 'archive'), segment_max_bytes=1,
+                          max_bytes=int(record_size * 2.5))
+    for index in range(4):
+        entry = archive.append(f'https://example.com/{index}', 'site', listing(f'Shop {index}'))
+        # Segments are ordered by modification time
+        os.utime(tmp_path / 'archive' / entry['segment'], (1000 + index, 1000 + index))
+
+    assert len(os.listdir(tmp_path / 'archive')) == 2
+    assert [entry['url'] for entry, _ in archive.iter_latest()] == \
+        ['https://example.com/2', 'https://example.com/3']
+    assert len(db.get_archive_entries()) == 2
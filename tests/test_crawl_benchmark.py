@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import socket
+import time
+
+import crawl_benchmark
+from crawl_benchmark import compare, directory_page, wait_for_result, wait_for_server
+
+OPTIONS = {'pages': 20, 'fanout': 3, 'jsonld': 0.3, 'microdata': 0.3, 'padding': 1}
+
+
+def test_directory_pages_are_deterministic_and_linked():
+    page = directory_page(4, OPTIONS)
+    assert page == directory_page(4, OPTIONS)
+    assert '<a href="/listing/5">' in page
+    assert page.count('Benchmark Business 4-') == crawl_benchmark.BUSINESSES_PER_PAGE
+
+
+def test_compare_skips_failed_scenarios():
+    baseline = {'results': [{'scenario': 'engine', 'pages_per_second': 10.0}]}
+    assert compare([{'scenario': 'engine', 'error': 'crashed'}], baseline) == []
+    lines = compare([{'scenario': 'engine', 'pages_per_second': 15.0}], baseline)
+    assert len(lines) == 1 and '+50.0%' in lines[0]
+
+
+def test_wait_for_result_reports_a_dead_scenario(monkeypatch):
+    monkeypatch.setattr(crawl_benchmark, 'POLL_SECONDS', 0.1)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=os._exit, args=(3,))
+    process.start()
+    result = wait_for_result(process, results, timeout=30)
+    process.join()
+    assert 'code 3' in result['error']
+
+
+def test_wait_for_result_times_out(monkeypatch):
+    monkeypatch.setattr(crawl_benchmark, 'POLL_SECONDS', 0.1)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=time.sleep, args=(30,))
+    process.start()
+    result = wait_for_result(process, results, timeout=0.5)
+    process.join()
+    assert 'did not finish' in result['error']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_wait_for_server_tells_its_site_from_another(monkeypatch):
+    monkeypatch.setattr(crawl_benchmark, 'POLL_SECONDS', 0.1)
+    context = multiprocessing.get_context('spawn')
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    options = dict(OPTIONS, seed=1, latency_ms=0, jitter_ms=0, error_rate=0)
+    server = context.Process(target=crawl_benchmark.serve, args=(options, port, 'first'), daemon=True)
+    server.start()
+    try:
+        assert wait_for_server(server, base_url, 'first', timeout=30) is None
+        # A second site on the same port cannot bind it and exits
+        clash = context.Process(target=crawl_benchmark.serve, args=(options, port, 'second'), daemon=True)
+        clash.start()
+        error = wait_for_server(clash, base_url, 'second', timeout=30)
+        clash.join()
+        assert 'another server' in error or 'already in use' in error
+    finally:
+        server.terminate()
+        server.join()
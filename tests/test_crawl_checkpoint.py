@@ -0,0 +1,105 @@
+import asyncio
+from collections import deque
+from datetime import datetime
+
+import pytest
+from aiohttp import web
+
+import crawler_engine
+from crawl_frontier import BloomFilter
+from crawler_engine import (CrawlerScheduler, CrawlJob, CrawlTarget, EnhancedCrawler,
+                            target_from_dict, target_to_dict)
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # The page archive is written to the working directory
+    monkeypatch.chdir(tmp_path)
+    return Database(str(tmp_path / 'crawl.db'))
+
+
+def make_job(**kwargs):
+    visited, queued = BloomFilter(capacity=1000), BloomFilter(capacity=1000)
+    visited.add('https://example.com/')
+    queued.add('https://example.com/a')
+    return CrawlJob(target_name='site', start_time=datetime(2024, 5, 1, 8, 30),
+                    visited_urls=visited, queued_urls=queued, **kwargs)
+
+
+def test_job_round_trips_through_checkpoint(db):
+    job = make_job(url_queue=deque([('https://example.com/a', 1)]),
+                   in_flight=[('https://example.com/b', 1)],
+                   sitemap_lastmod={'https://example.com/a': '2024-04-01'},
+                   pages_crawled=7, pages_skipped=2, businesses_found=11, errors=['HTTP 500'])
+    db.save_crawl_checkpoint('site', job.to_checkpoint())
+    restored = CrawlJob.from_checkpoint('site', db.get_crawl_checkpoint('site'))
+
+    assert restored.start_time == job.start_time
+    # Pages in flight when the checkpoint was taken are fetched again first
+    assert list(restored.url_queue) == [('https://example.com/b', 1), ('https://example.com/a', 1)]
+    assert restored.revisit == {'https://example.com/b'}
+    assert 'https://example.com/' in restored.visited_urls
+    assert 'https://example.com/a' in restored.queued_urls
+    assert restored.sitemap_lastmod == job.sitemap_lastmod
+    assert (restored.pages_crawled, restored.pages_skipped, restored.businesses_found) == (7, 2, 11)
+    assert restored.errors == ['HTTP 500']
+
+
+def test_target_round_trips_through_dict():
+    target = CrawlTarget(name='site', start_urls=['https://example.com/'], allowed_domains=['example.com'],
+                         delay_range=(0.5, 2), next_crawl=datetime(2024, 5, 2, 6, 0), incremental=True)
+    data = target_to_dict(target)
+    data['removed_option'] = True  # Saved by an older version
+    assert target_from_dict(data) == target
+
+
+def test_targets_persist_across_schedulers(db):
+    scheduler = CrawlerScheduler(db)
+    defaults = [t.name for t in scheduler.get_targets()]
+    scheduler.add_target(CrawlTarget(name='site', start_urls=['https://example.com/'],
+                                     allowed_domains=['example.com'], max_pages=5))
+    scheduler.remove_target(defaults[0])
+
+    reloaded = CrawlerScheduler(db)
+    assert [t.name for t in reloaded.get_targets()] == defaults[1:] + ['site']
+    assert reloaded.get_target('site').max_pages == 5
+
+
+def test_crawl_resumes_from_checkpoint(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    requested = []
+
+    async def page(request):
+        requested.append(request.path)
+        return web.Response(text='<html><body><p>No listings</p></body></html>', content_type='text/html')
+
+    async def robots(request):
+        return web.Response(text='User-agent: *\nAllow: /\n')
+
+    async def crawl():
+        app = web.Application()
+        app.router.add_get('/robots.txt', robots)
+        app.router.add_get('/{path:.*}', page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        try:
+            target = CrawlTarget(name='site', start_urls=[f'{base}/'], allowed_domains=['127.0.0.1'],
+                                 delay_range=(0, 0))
+            # Interrupted after the start page, with one page still queued
+            job = make_job(url_queue=deque([(f'{base}/remaining', 1)]), pages_crawled=1)
+            job.visited_urls.add(f'{base}/')
+            db.save_crawl_checkpoint('site', job.to_checkpoint())
+            async with EnhancedCrawler(db) as crawler:
+                return await crawler.crawl_target(target)
+        finally:
+            await runner.cleanup()
+
+    result = asyncio.run(crawl())
+    assert requested == ['/remaining']
+    assert result.pages_crawled == 2
+    assert result.start_time == datetime(2024, 5, 1, 8, 30)
+    assert db.get_crawl_checkpoint('site') is None
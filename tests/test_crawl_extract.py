@@ -0,0 +1,66 @@
+import json
+
+from crawl_extract import match_selectors, parse_json_ld, parse_page, sniff_charset
+from bs4 import BeautifulSoup
+
+PAGE = """<html><body>
+<div class="listing">
+  <h3 class="business-name">Mama Lishe Restaurant</h3>
+  <span class="location">Arusha</span><span class="category">Food</span><span class="phone">0755</span>
+</div>
+<div class="listing"><h3 class="business-name" data-biz-name="Kilimo Supplies">KS</h3></div>
+<div class="card"><span class="title">No</span></div>
+<div itemscope itemtype="https://schema.org/LocalBusiness">
+  <span itemprop="name">Duka la Dawa</span><span itemprop="address">Mwanza</span>
+</div>
+<script type="application/ld+json">%s</script>
+<a href="/page/2">Next</a><a href="https://other.example/">Other</a><a>No href</a>
+</body></html>""" % json.dumps([
+    {"@type": "LocalBusiness", "name": "Pwani Fish", "description": "Fishing",
+     "address": {"addressLocality": "Bagamoyo"}, "geo": {"latitude": "-6.44", "longitude": 38.9}},
+    {"@type": "Person", "name": "Not a business"},
+])
+
+
+def test_parse_page_extracts_every_kind_of_listing():
+    result = parse_page('https://example.com/page/1', PAGE, ['.business-name', '.title'])
+    by_name = {business['name']: business for business in result['businesses']}
+    assert set(by_name) == {'Mama Lishe Restaurant', 'Kilimo Supplies', 'Duka la Dawa', 'Pwani Fish'}
+    assert by_name['Mama Lishe Restaurant']['region'] == 'Arusha'
+    assert by_name['Mama Lishe Restaurant']['sector'] == 'Food'
+    assert by_name['Mama Lishe Restaurant']['contact'] == '0755'
+    assert by_name['Duka la Dawa'] == {
+        'name': 'Duka la Dawa', 'region': 'Mwanza', 'source_url': 'https://example.com/page/1',
+        'extraction_method': 'microdata'
+    }
+    assert (by_name['Pwani Fish']['latitude'], by_name['Pwani Fish']['longitude']) == (-6.44, 38.9)
+
+
+def test_parse_page_resolves_links_and_counts_selector_hits():
+    result = parse_page('https://example.com/page/1', PAGE, ['.business-name', '.title'])
+    assert result['links'] == ['https://example.com/page/2', 'https://other.example/']
+    assert result['selector_hits'] == {'.business-name': 2, '.title': 1}
+    assert set(result['timings']) == {'parse', 'extract'}
+
+
+def test_match_selectors_prefers_the_first_selector():
+    soup = BeautifulSoup('<p class="a b">x</p><p class="b">y</p>', 'html.parser')
+    matches = match_selectors(soup, ['.a', '.b'])
+    assert sorted(matches.values()) == ['.a', '.b']
+    assert match_selectors(soup, []) == {}
+
+
+def test_parse_json_ld_ignores_bad_input():
+    assert parse_json_ld('u', '{not json') == []
+    assert parse_json_ld('u', None) == []
+    bad_geo = parse_json_ld('u', json.dumps({'@type': 'Organization', 'name': 'X', 'geo': {'latitude': 'n/a'}}))
+    assert 'latitude' not in bad_geo[0] and 'longitude' not in bad_geo[0]
+
+
+def test_sniff_charset_prefers_bom_then_header_then_meta():
+    meta = b'<html><head><meta charset="iso-8859-1">'
+    assert sniff_charset('windows-1252', b'\xef\xbb\xbf' + meta) == 'utf-8-sig'
+    assert sniff_charset('windows-1252', meta) == 'cp1252'
+    assert sniff_charset(None, meta) == 'iso8859-1'
+    assert sniff_charset('no-such-charset', meta) == 'iso8859-1'
+    assert sniff_charset(None, b'<html>') == 'utf-8'
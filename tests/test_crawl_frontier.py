@@ -0,0 +1,53 @@
+from crawl_frontier import BloomFilter, canonicalize_url
+
+
+def test_canonicalize_normalizes_equivalent_urls():
+    assert canonicalize_url('HTTP://Example.COM:80/Shops/?b=2&a=1#top') == 'http://example.com/Shops?a=1&b=2'
+    assert canonicalize_url('https://example.com:443') == 'https://example.com/'
+    assert canonicalize_url('https://example.com:8443/x/') == 'https://example.com:8443/x'
+
+
+def test_canonicalize_drops_tracking_parameters():
+    url = 'https://example.com/list?utm_source=x&page=2&fbclid=abc&PHPSESSID=1'
+    assert canonicalize_url(url) == 'https://example.com/list?page=2'
+
+
+def test_canonicalize_rejects_non_http_links():
+    assert canonicalize_url('mailto:info@example.com') is None
+    assert canonicalize_url('javascript:void(0)') is None
+    assert canonicalize_url('http://[::1') is None
+
+
+def test_bloom_filter_add_and_contains():
+    bloom = BloomFilter(capacity=1000)
+    assert bloom.add('https://example.com/a')
+    assert not bloom.add('https://example.com/a')
+    assert 'https://example.com/a' in bloom
+    assert 'https://example.com/b' not in bloom
+    assert len(bloom) == 1
+
+
+def test_bloom_filter_false_positive_rate_within_capacity():
+    bloom = BloomFilter(capacity=5000, error_rate=0.001)
+    for i in range(5000):
+        bloom.add(f'https://example.com/seen/{i}')
+    false_positives = sum(f'https://example.com/new/{i}' in bloom for i in range(20000))
+    assert false_positives / 20000 < 0.005
+
+
+def test_bloom_filter_round_trip_keeps_capacity():
+    bloom = BloomFilter(capacity=2000)
+    for i in range(50):
+        bloom.add(f'https://example.com/{i}')
+    restored = BloomFilter.from_bytes(bloom.to_bytes())
+    assert restored.capacity == 2000
+    assert len(restored) == 50
+    assert all(f'https://example.com/{i}' in restored for i in range(50))
+
+
+def test_bloom_filter_is_full():
+    bloom = BloomFilter(capacity=10)
+    for i in range(8):
+        bloom.add(str(i))
+    assert not bloom.is_full()
+    assert bloom.is_full(headroom=5)
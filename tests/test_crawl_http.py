@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from crawl_http import USER_AGENT, HttpClient
+from crawl_metrics import CrawlMetrics
+from crawler_engine import CrawlTarget, EnhancedCrawler
+from database import Database
+
+
+async def serve(requests):
+    """Start a local site that records the paths and user agents requested"""
+    async def handler(request):
+        requests.append((request.path, request.headers.get('User-Agent')))
+        if request.path == '/robots.txt':
+            return web.Response(text='User-agent: *\nAllow: /\n')
+        return web.Response(text='<html><body>No listings</body></html>', content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/{path:.*}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # The page archive is written to the working directory
+    monkeypatch.chdir(tmp_path)
+    return Database(str(tmp_path / 'crawl.db'))
+
+
+def test_shared_client_outlives_crawls(db):
+    requests = []
+    metrics = CrawlMetrics()
+
+    async def crawl_twice():
+        runner, base = await serve(requests)
+        target = CrawlTarget(name='site', start_urls=[f'{base}/'], allowed_domains=['127.0.0.1'],
+                             delay_range=(0, 0))
+        try:
+            async with HttpClient(metrics) as client:
+                for path in ('/a', '/b'):
+                    async with EnhancedCrawler(db, metrics=metrics, client=client) as crawler:
+                        await crawler.crawl_url(target, f'{base}{path}')
+                    assert client.get_stats()['open']
+                stats = client.get_stats()
+            return stats, client.get_stats()
+        finally:
+            await runner.cleanup()
+
+    during, after = asyncio.run(crawl_twice())
+    # robots.txt is fetched once and the keep-alive connection is reused
+    assert [path for path, _ in requests] == ['/robots.txt', '/a', '/b']
+    assert {agent for _, agent in requests} == {USER_AGENT}
+    assert during['robots_hosts'] == 1
+    assert metrics.snapshot()['connections']['reused'] >= 1
+    assert not after['open']
+
+
+def test_crawler_closes_the_client_it_owns(db):
+    async def crawl():
+        async with EnhancedCrawler(db, metrics=CrawlMetrics()) as crawler:
+            session = crawler.session
+        return session
+
+    assert asyncio.run(crawl()).closed
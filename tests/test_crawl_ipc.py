@@ -0,0 +1,59 @@
+import fcntl
+import subprocess
+import sys
+import time
+
+from crawl_ipc import EXIT_ALREADY_RUNNING, CrawlerSupervisor, service_locked
+
+
+class ScriptedSupervisor(CrawlerSupervisor):
+    """Supervisor whose service processes run the given Python snippets in turn"""
+
+    def __init__(self, socket_path, scripts):
+        super().__init__(socket_path, restart_delay=0.05, poll_interval=0.05)
+        self.scripts = list(scripts)
+        self.spawned = 0
+
+    def spawn(self):
+        self.spawned += 1
+        return subprocess.Popen([sys.executable, '-c', self.scripts.pop(0)])
+
+
+def wait_until(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+
+def test_service_locked(tmp_path):
+    socket_path = str(tmp_path / 'crawler.sock')
+    assert not service_locked(socket_path)
+    with open(socket_path + '.lock', 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        assert service_locked(socket_path)
+    assert not service_locked(socket_path)
+
+
+def test_supervisor_takes_over_when_the_other_service_exits(tmp_path):
+    socket_path = str(tmp_path / 'crawler.sock')
+    supervisor = ScriptedSupervisor(socket_path, [
+        f'raise SystemExit({EXIT_ALREADY_RUNNING})',
+        'import time; time.sleep(30)',
+    ])
+    # Another worker's service holds the lock
+    lock_file = open(socket_path + '.lock', 'w')
+    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        supervisor.start()
+        wait_until(lambda: supervisor.external)
+        time.sleep(0.2)
+        assert supervisor.spawned == 1
+
+        lock_file.close()  # That service exits
+        wait_until(lambda: supervisor.spawned == 2 and supervisor.process_running())
+        assert not supervisor.external
+    finally:
+        lock_file.close()
+        supervisor.stop()
+    assert not supervisor.process_running()
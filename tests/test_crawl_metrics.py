@@ -0,0 +1,78 @@
+import asyncio
+
+from crawl_metrics import RATE_WINDOW_SECONDS, CrawlMetrics, Histogram
+from crawler_engine import CrawlTarget, EnhancedCrawler, PageOutcome
+from database import Database
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [('0.1', 2), ('1.0', 3), ('+Inf', 4)]
+    assert histogram.count == 4 and histogram.sum == 3.65
+
+
+def test_snapshot_summarises_stages_and_responses():
+    metrics = CrawlMetrics()
+    metrics.observe('fetch', 0.2)
+    metrics.observe('fetch', 0.4)
+    metrics.record_response('example.com', 200, 2048)
+    metrics.record_response('example.com', 0)
+    metrics.record_abort('not_html')
+    metrics.record_connection('created')
+    metrics.record_connection('reused')
+    metrics.record_connection('reused')
+    metrics.record_page(businesses=3)
+    metrics.set_queue('site', 5, 2)
+
+    snapshot = metrics.snapshot()
+    assert snapshot['stages']['fetch'] == {'count': 2, 'total_seconds': 0.6, 'avg_seconds': 0.3}
+    assert snapshot['stages']['parse']['avg_seconds'] is None
+    assert snapshot['status_codes'] == {'example.com': {'200': 1, 'error': 1}}
+    assert snapshot['bytes_downloaded'] == 2048
+    assert snapshot['aborted_responses'] == {'not_html': 1}
+    assert snapshot['connection_reuse_ratio'] == 0.667
+    assert (snapshot['pages_total'], snapshot['businesses_total']) == (1, 3)
+    assert snapshot['pages_per_second'] == round(1 / RATE_WINDOW_SECONDS, 3)
+    assert (snapshot['queue_depth'], snapshot['in_flight']) == ({'site': 5}, {'site': 2})
+
+    metrics.clear_queue('site')
+    assert metrics.snapshot()['queue_depth'] == {}
+
+
+def test_prometheus_output_escapes_labels():
+    metrics = CrawlMetrics()
+    metrics.observe('store', 0.02)
+    metrics.record_response('bad"host', 503)
+    text = metrics.render_prometheus()
+    assert '# TYPE crawler_stage_seconds histogram' in text
+    assert 'crawler_stage_seconds_bucket{le="0.025",stage="store"} 1' in text
+    assert 'crawler_stage_seconds_count{stage="store"} 1' in text
+    assert 'crawler_responses_total{host="bad\\"host",status="503"} 1' in text
+
+
+class StoringCrawler(EnhancedCrawler):
+    """Crawler whose pages each yield a new business, without fetching"""
+
+    pages = 0
+
+    async def crawl_url(self, target, url, selectors=None):
+        self.pages += 1
+        businesses = await self.store_businesses([{'name': f'Metrics Shop {self.pages}', 'region': 'Arusha'}])
+        return PageOutcome(fetched=True, businesses=businesses)
+
+
+def test_target_crawls_report_store_timings(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics = CrawlMetrics()
+    db = Database(str(tmp_path / 'crawl.db'))
+    target = CrawlTarget(name='site', start_urls=['https://example.com/1'], allowed_domains=['example.com'])
+
+    async def crawl():
+        async with StoringCrawler(db, metrics=metrics) as crawler:
+            for _ in range(2):
+                await crawler.crawl_target(target)
+
+    asyncio.run(crawl())
+    assert metrics.snapshot()['stages']['store']['count'] == 2
@@ -0,0 +1,96 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from crawler_engine import CrawlerScheduler, CrawlResult, CrawlRun, CrawlTarget
+from database import Database
+
+
+class SlowCrawlScheduler(CrawlerScheduler):
+    """Scheduler whose crawls report progress, then wait until released"""
+
+    def __init__(self, database):
+        super().__init__(database)
+        self.release = None
+
+    async def run_single_crawl(self, target_name, on_progress=None):
+        on_progress(SimpleNamespace(pages_crawled=3, pages_skipped=1, businesses_found=4,
+                                    url_queue=deque([('https://example.com/next', 1)]), errors=[]))
+        await self.release.wait()
+        now = datetime.now()
+        return CrawlResult(target_name, now, now, 5, 6, [], True)
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = SlowCrawlScheduler(Database(str(tmp_path / 'crawl.db')))
+    scheduler.targets = [CrawlTarget(name='site', start_urls=['https://example.com/'],
+                                     allowed_domains=['example.com'], max_pages=10)]
+    return scheduler
+
+
+def test_run_reports_progress_then_result(scheduler):
+    async def run():
+        scheduler.release = asyncio.Event()
+        run = scheduler.start_run('site')
+        await asyncio.sleep(0)
+        progress = run.to_dict()
+        with pytest.raises(RuntimeError):
+            scheduler.start_run('site')
+        scheduler.release.set()
+        await run.future
+        return run, progress
+
+    run, progress = asyncio.run(run())
+    assert progress['status'] == 'running'
+    assert (progress['pages_crawled'], progress['queued_urls']) == (3, 1)
+    assert run.status == 'completed' and run.finished_at is not None
+    assert (run.pages_crawled, run.businesses_found) == (5, 6)
+    assert scheduler.running_targets == set()
+
+
+def test_cancelled_run_drops_its_checkpoint(scheduler):
+    scheduler.db.save_crawl_checkpoint('site', {'state': '{}', 'visited': b'', 'queued': b''})
+
+    async def run():
+        scheduler.release = asyncio.Event()
+        run = scheduler.start_run('site')
+        await asyncio.sleep(0)
+        scheduler.cancel_run(run.id)
+        with pytest.raises(asyncio.CancelledError):
+            await run.future
+        return run
+
+    run = asyncio.run(run())
+    assert run.status == 'cancelled'
+    assert scheduler.db.get_crawl_checkpoint('site') is None
+    assert 'site' not in scheduler.running_targets
+
+
+def test_eta_is_extrapolated_from_the_crawl_rate():
+    run = CrawlRun(id='r1', target_name='site', max_pages=100,
+                   started_at=datetime.now() - timedelta(seconds=20))
+    run.update(SimpleNamespace(pages_crawled=20, pages_skipped=0, businesses_found=0,
+                               url_queue=deque(), errors=['e'] * 8))
+    assert run.eta_seconds == pytest.approx(80, abs=1)
+    assert len(run.errors) == 5 and run.error_count == 8
+
+
+def test_only_recent_finished_runs_are_kept(scheduler):
+    scheduler.max_runs = 2
+    for index in range(3):
+        scheduler.runs[f'old{index}'] = CrawlRun(id=f'old{index}', target_name='site',
+                                                 max_pages=10, status='completed')
+
+    async def run():
+        scheduler.release = asyncio.Event()
+        scheduler.release.set()
+        run = scheduler.start_run('site')
+        await run.future
+        return run
+
+    run = asyncio.run(run())
+    assert [r.id for r in scheduler.get_runs()] == [run.id, 'old2']
@@ -0,0 +1,40 @@
+from crawl_extract import compile_selector
+from crawl_selectors import SelectorStats
+from database import Database
+
+
+def test_selector_is_demoted_after_a_window_of_misses():
+    stats = SelectorStats(['.name', '.title'], window=3, probe_interval=100)
+    changes = []
+    for _ in range(3):
+        used = stats.choose()
+        changes += stats.record(used, {'.name': 1})
+    assert changes == [('.title', 'demoted')]
+    assert stats.choose() == ['.name']
+
+
+def test_probe_page_restores_a_selector_that_matches_again():
+    stats = SelectorStats(['.name', '.title'], saved={'.title': {'misses': 9, 'demoted': True}},
+                          window=3, probe_interval=4)
+    chosen = [stats.choose() for _ in range(4)]
+    assert chosen[:3] == [['.name']] * 3
+    assert chosen[3] == ['.name', '.title']
+    assert stats.record(chosen[3], {'.title': 2}) == [('.title', 'restored')]
+    assert stats.stats['.title'].misses == 0
+    assert stats.choose() == ['.name', '.title']
+
+
+def test_statistics_survive_a_restart(tmp_path):
+    db = Database(str(tmp_path / 'crawl.db'))
+    stats = SelectorStats(['.name', '.title'], window=1)
+    stats.record(stats.choose(), {'.name': 1})
+    db.save_selector_stats('site', stats.to_dict())
+
+    restored = SelectorStats(['.name', '.title', '.new'], db.get_selector_stats('site'), window=1)
+    assert restored.stats['.title'].demoted
+    assert restored.stats['.name'].hits == 1
+    assert restored.choose() == ['.name', '.new']
+
+
+def test_compiled_selectors_are_cached():
+    assert compile_selector('.name, .title') is compile_selector('.name, .title')
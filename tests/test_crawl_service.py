@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import pytest
+
+from crawl_ipc import MAX_ADHOC_PAGES, CrawlerServiceError
+from crawl_service import CrawlerCommands
+
+
+class SlowScheduler:
+    """Scheduler whose stop blocks like joining the scheduler thread"""
+
+    def __init__(self):
+        self.running = True
+
+    def stop(self):
+        time.sleep(0.5)
+        self.running = False
+
+    def get_target(self, target_name):
+        return None
+
+
+def test_stop_does_not_block_other_commands():
+    commands = CrawlerCommands(SlowScheduler())
+
+    async def run():
+        stop = asyncio.ensure_future(commands.dispatch('stop', {}))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        assert await commands.dispatch('ping', {}) is True
+        answered = time.monotonic() - started
+        return answered, await stop, await commands.dispatch('stop', {})
+
+    answered, stopped, stopped_again = asyncio.run(run())
+    assert answered < 0.2
+    assert stopped is True
+    assert stopped_again is False
+
+
+def test_unknown_command_and_missing_target():
+    commands = CrawlerCommands(SlowScheduler())
+    with pytest.raises(CrawlerServiceError) as error:
+        asyncio.run(commands.dispatch('explode', {}))
+    assert error.value.status == 400
+    with pytest.raises(CrawlerServiceError) as error:
+        asyncio.run(commands.dispatch('run', {'target_name': 'missing'}))
+    assert error.value.status == 404
+
+
+@pytest.mark.parametrize('pages', [0, -3, MAX_ADHOC_PAGES + 1, 10 ** 9])
+def test_adhoc_run_rejects_page_counts_out_of_range(pages):
+    commands = CrawlerCommands(SlowScheduler())
+    with pytest.raises(CrawlerServiceError) as error:
+        asyncio.run(commands.dispatch('adhoc_run', {'start_url': 'https://example.com/', 'pages': pages}))
+    assert error.value.status == 400
@@ -0,0 +1,100 @@
+import asyncio
+import gzip
+
+import pytest
+
+from crawl_sitemap import SitemapParser, read_sitemap
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/a</loc><lastmod>2024-01-01</lastmod></url>
+  <url><loc> https://example.com/b </loc></url>
+  <url><lastmod>2024-01-01</lastmod></url>
+</urlset>"""
+
+INDEX = b"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-1.xml</loc></sitemap>
+</sitemapindex>"""
+
+
+def parse(data: bytes, chunk_size: int = 7, **kwargs):
+    parser = SitemapParser(**kwargs)
+    entries = []
+    for start in range(0, len(data), chunk_size):
+        entries.extend(parser.feed(data[start:start + chunk_size]))
+    return entries + parser.close()
+
+
+def test_parses_urlset_in_chunks():
+    entries = parse(URLSET)
+    assert [(e.loc, e.lastmod, e.is_sitemap) for e in entries] == [
+        ('https://example.com/a', '2024-01-01', False),
+        ('https://example.com/b', None, False),
+    ]
+
+
+def test_parses_sitemap_index():
+    entries = parse(INDEX)
+    assert [(e.loc, e.is_sitemap) for e in entries] == [('https://example.com/sitemap-1.xml', True)]
+
+
+def test_parses_gzipped_sitemap():
+    assert [e.loc for e in parse(gzip.compress(URLSET))] == ['https://example.com/a', 'https://example.com/b']
+
+
+def test_rejects_oversized_sitemap():
+    with pytest.raises(ValueError):
+        parse(gzip.compress(URLSET * 10), max_bytes=len(URLSET))
+
+
+class FakeContent:
+    def __init__(self, chunks, stall=False):
+        self.chunks = chunks
+        self.stall = stall
+
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            yield chunk
+        if self.stall:
+            raise asyncio.TimeoutError()
+
+
+class FakeResponse:
+    def __init__(self, status=200, chunks=(), stall=False):
+        self.status = status
+        self.content = FakeContent(chunks, stall)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url):
+        return self.response
+
+
+def read_all(session):
+    async def collect():
+        return [entry async for entry in read_sitemap(session, 'https://example.com/sitemap.xml')]
+    return asyncio.run(collect())
+
+
+def test_read_sitemap_streams_entries():
+    entries = read_all(FakeSession(FakeResponse(chunks=[URLSET[:100], URLSET[100:]])))
+    assert [e.loc for e in entries] == ['https://example.com/a', 'https://example.com/b']
+
+
+def test_read_sitemap_skips_missing_sitemap():
+    assert read_all(FakeSession(FakeResponse(status=404))) == []
+
+
+def test_read_sitemap_ends_on_timeout():
+    # Entries read before the stall are kept; the timeout does not propagate
+    entries = read_all(FakeSession(FakeResponse(chunks=[URLSET[:URLSET.index(b'</url>') + 6]], stall=True)))
+    assert [e.loc for e in entries] == ['https://example.com/a']
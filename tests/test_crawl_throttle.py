@@ -0,0 +1,169 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+from crawl_throttle import HostThrottle, RobotsCache, parse_retry_after
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('soon') is None
+    later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+    assert 55 <= parse_retry_after(later) <= 60
+    earlier = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=60), usegmt=True)
+    assert parse_retry_after(earlier) == 0.0
+
+
+def run_responses(throttle, statuses, latency=0.1):
+    async def run():
+        for status in statuses:
+            await throttle.acquire()
+            await throttle.release(status, latency=latency)
+    asyncio.run(run())
+
+
+def test_throttle_grows_additively_on_success():
+    throttle = HostThrottle(max_concurrency=4)
+    run_responses(throttle, [200] * 3)
+    assert 2 <= throttle.concurrency < 3
+    run_responses(throttle, [200] * 50)
+    assert throttle.concurrency == 4
+
+
+def test_throttle_backs_off_multiplicatively():
+    throttle = HostThrottle(max_concurrency=8)
+    throttle.concurrency = 8.0
+    run_responses(throttle, [429])
+    assert throttle.concurrency == 4.0
+    assert throttle.delay == 0.5
+    run_responses(throttle, [503])
+    assert throttle.concurrency == 2.0
+    assert throttle.delay == 1.0
+
+
+def test_throttle_backs_off_on_latency_spike():
+    throttle = HostThrottle()
+    throttle.concurrency = 4.0
+    run_responses(throttle, [200], latency=0.5)
+    before = throttle.concurrency
+    run_responses(throttle, [200], latency=3.0)
+    assert throttle.concurrency == before / 2
+
+
+def test_crawl_delay_serializes_requests():
+    throttle = HostThrottle(initial_delay=0.05, min_delay=0.01, max_concurrency=8)
+    assert throttle.max_concurrency == 1
+    run_responses(throttle, [200] * 10)
+    # Healthy responses never take the gap below Crawl-delay or add slots
+    assert throttle.delay == 0.01
+    assert throttle.concurrency == 1
+
+
+def test_throttle_limits_concurrent_requests():
+    throttle = HostThrottle(max_concurrency=2)
+    throttle.concurrency = 2.0
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        await throttle.acquire()
+        peak = max(peak, throttle.active)
+        await asyncio.sleep(0.01)
+        await throttle.release(200)
+
+    async def run():
+        await asyncio.gather(*(request() for _ in range(10)))
+    asyncio.run(run())
+    assert peak == 2
+
+
+def test_cancelled_wait_frees_its_slot():
+    throttle = HostThrottle(initial_delay=10)
+
+    async def run():
+        await throttle.acquire()
+        await throttle.release(200)
+        # The next request has to wait out the delay; cancel it meanwhile
+        waiting = asyncio.create_task(throttle.acquire())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+        return throttle.active
+
+    assert asyncio.run(run()) == 0
+
+
+class FakeContent:
+    def __init__(self, body):
+        self.body = body
+
+    async def read(self, size):
+        return self.body[:size]
+
+
+class FakeResponse:
+    def __init__(self, status, body=b''):
+        self.status = status
+        self.content = FakeContent(body)
+
+    async def __aenter__(self):
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url):
+        self.requests.append(url)
+        response = self.responses[url]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+ROBOTS = b"""User-agent: *
+Disallow: /private
+Crawl-delay: 3
+Sitemap: https://example.com/sitemap.xml
+"""
+
+
+def test_robots_cache_parses_rules_and_fetches_once():
+    session = FakeSession({'https://example.com/robots.txt': FakeResponse(200, ROBOTS)})
+    robots = RobotsCache(session, 'TestBot')
+
+    async def run():
+        allowed = await asyncio.gather(
+            robots.can_fetch('https://example.com/shops'),
+            robots.can_fetch('https://example.com/private/x'),
+        )
+        return allowed, await robots.crawl_delay('https://example.com/'), await robots.sitemaps('https://example.com/')
+    allowed, delay, sitemaps = asyncio.run(run())
+    assert allowed == [True, False]
+    assert delay == 3.0
+    assert sitemaps == ['https://example.com/sitemap.xml']
+    assert session.requests == ['https://example.com/robots.txt']
+
+
+def test_robots_cache_status_handling():
+    session = FakeSession({
+        'https://locked.example/robots.txt': FakeResponse(403),
+        'https://missing.example/robots.txt': FakeResponse(404),
+        'https://down.example/robots.txt': ConnectionError('refused'),
+    })
+    robots = RobotsCache(session, 'TestBot')
+
+    async def run():
+        return [
+            await robots.can_fetch('https://locked.example/a'),
+            await robots.can_fetch('https://missing.example/a'),
+            await robots.can_fetch('https://down.example/a'),
+        ]
+    assert asyncio.run(run()) == [False, True, True]
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from crawl_worker import MAX_ATTEMPTS, CrawlWorker
+from crawler_engine import CrawlTarget, seed_frontier
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'crawl.db'))
+
+
+def urls(count):
+    return [(f'https://example.com/{i}', 1) for i in range(count)]
+
+
+def test_enqueue_ignores_known_urls(db):
+    assert db.enqueue_frontier('site', urls(3)) == 3
+    assert db.enqueue_frontier('site', urls(5)) == 2
+    assert db.frontier_counts('site') == {'pending': 5}
+
+
+def test_leases_are_shallowest_first_and_not_shared(db):
+    db.enqueue_frontier('site', [('https://example.com/deep', 2), ('https://example.com/', 0)])
+    assert db.lease_frontier('site', 'w1', 1, 60) == [('https://example.com/', 0)]
+    assert db.lease_frontier('site', 'w2', 5, 60) == [('https://example.com/deep', 2)]
+    assert db.lease_frontier('site', 'w3', 5, 60) == []
+
+
+def test_concurrent_workers_lease_disjoint_batches(db):
+    db.enqueue_frontier('site', urls(200))
+    leased = {}
+
+    def work(worker_id):
+        mine = []
+        while True:
+            batch = Database(db.path).lease_frontier('site', worker_id, 7, 60)
+            if not batch:
+                break
+            mine.extend(url for url, _ in batch)
+        leased[worker_id] = mine
+
+    threads = [threading.Thread(target=work, args=(f'w{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    all_leased = [url for mine in leased.values() for url in mine]
+    assert len(all_leased) == len(set(all_leased)) == 200
+
+
+def test_expired_leases_are_retried_then_given_up(db):
+    db.enqueue_frontier('site', urls(1))
+    for attempt in range(MAX_ATTEMPTS):
+        # A negative lease expires at once, as if its worker had died
+        assert db.lease_frontier('site', f'w{attempt}', 1, -1, MAX_ATTEMPTS) == urls(1)
+    assert db.lease_frontier('site', 'late', 1, -1, MAX_ATTEMPTS) == []
+    assert db.frontier_counts('site', MAX_ATTEMPTS) == {'failed': 1}
+
+
+def test_completion_by_a_stale_owner_is_ignored(db):
+    db.enqueue_frontier('site', urls(1))
+    db.lease_frontier('site', 'slow', 1, -1)
+    db.lease_frontier('site', 'fast', 1, 60)
+    db.complete_frontier('site', 'slow', ['https://example.com/0'])
+    assert db.frontier_counts('site') == {'leased': 1}
+    db.complete_frontier('site', 'fast', ['https://example.com/0'])
+    assert db.frontier_counts('site') == {'done': 1}
+
+
+def test_worker_lease_stops_at_max_pages(db):
+    target = CrawlTarget(name='site', start_urls=['https://example.com/'],
+                         allowed_domains=['example.com'], max_pages=4)
+    assert seed_frontier(db, target) == 1
+    db.enqueue_frontier('site', urls(10))
+    worker = CrawlWorker(db, worker_id='w1', batch_size=3)
+    first = worker.lease(target)
+    second = worker.lease(target)
+    assert (len(first), len(second)) == (3, 1)
+    assert worker.lease(target) == []
+
+
+def test_seeding_restarts_the_frontier(db):
+    target = CrawlTarget(name='site', start_urls=['https://Example.com/?utm_source=x'],
+                         allowed_domains=['example.com'])
+    db.enqueue_frontier('site', urls(3))
+    seed_frontier(db, target)
+    assert db.lease_frontier('site', 'w1', 10, 60) == [('https://example.com/', 0)]
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+
+import crawler_engine
+from crawl_ipc import MAX_ADHOC_PAGES
+from crawler import crawl_site
+from crawler_engine import adhoc_target
+from database import Database
+
+
+def listing_page(name, links):
+    anchors = ''.join(f'<a href="{link}">{link}</a>' for link in links)
+    return (f'<html><body><h3 class="business-name" data-biz-name="{name}">{name}</h3>'
+            f'{anchors}</body></html>')
+
+
+PAGES = {
+    '/': listing_page('Home Traders', ['/a', '/b', 'https://elsewhere.example/']),
+    '/a': listing_page('Alpha Traders', ['/b']),
+    '/b': listing_page('Beta Traders', ['/']),
+}
+
+
+@pytest.fixture
+def site_url():
+    """Serve PAGES from a thread, since crawl_site runs its own event loop"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def page(request):
+        return web.Response(text=PAGES[request.path], content_type='text/html')
+
+    async def serve():
+        app = web.Application()
+        for path in PAGES:
+            app.router.add_get(path, page)
+        state['runner'] = web.AppRunner(app)
+        await state['runner'].setup()
+        site = web.TCPSite(state['runner'], '127.0.0.1', 0)
+        await site.start()
+        state['port'] = site._server.sockets[0].getsockname()[1]
+        started.set()
+
+    thread = threading.Thread(target=lambda: (loop.run_until_complete(serve()), loop.run_forever()),
+                              daemon=True)
+    thread.start()
+    started.wait(5)
+    yield f"http://127.0.0.1:{state['port']}/"
+    asyncio.run_coroutine_threadsafe(state['runner'].cleanup(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # The page archive is written to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    return Database(str(tmp_path / 'crawl.db'))
+
+
+def test_crawl_site_stops_at_max_pages(db, site_url):
+    assert crawl_site(site_url, db, max_pages=2) == 2
+    assert sorted(b['name'] for b in db.get_businesses()) == ['Alpha Traders', 'Home Traders']
+
+
+def test_crawl_site_stays_on_the_site_and_reports_every_run(db, site_url):
+    assert crawl_site(site_url, db, max_pages=10) == 3
+    # Ad-hoc crawls parse every page again rather than skipping unchanged ones
+    assert crawl_site(site_url, db, max_pages=10) == 3
+    assert len(db.get_businesses()) == 3
+
+
+def test_adhoc_target_is_limited_to_its_host():
+    target = adhoc_target('HTTPS://Example.com/listings?utm_source=mail', 7)
+    assert target.name.startswith('adhoc-')
+    assert target.start_urls == ['https://example.com/listings']
+    assert target.allowed_domains == ['example.com']
+    assert (target.max_pages, target.conditional_fetch) == (7, False)
+    with pytest.raises(ValueError):
+        adhoc_target('ftp://example.com/', 5)
+    assert adhoc_target('https://example.com/', MAX_ADHOC_PAGES).max_pages == MAX_ADHOC_PAGES
+    for pages in (0, MAX_ADHOC_PAGES + 1):
+        with pytest.raises(ValueError):
+            adhoc_target('https://example.com/', pages)
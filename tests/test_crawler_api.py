@@ -0,0 +1,41 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import crawler_api
+from crawl_ipc import CrawlerServiceError
+
+
+class FailingBackend:
+    """Backend whose calls raise the given error"""
+
+    def __init__(self, error):
+        self.error = error
+
+    async def call(self, command, **params):
+        raise self.error
+
+
+@pytest.fixture
+def client_for(monkeypatch):
+    def make(error):
+        monkeypatch.setattr(crawler_api, 'get_crawler_backend', lambda: FailingBackend(error))
+        app = FastAPI()
+        app.include_router(crawler_api.router)
+        return TestClient(app)
+    return make
+
+
+@pytest.mark.parametrize('method, path', [
+    ('get', '/crawler/jobs/abc'),
+    ('get', '/crawler/jobs/abc/events'),
+    ('post', '/crawler/jobs/abc/cancel'),
+])
+def test_job_endpoints_report_backend_errors(client_for, method, path):
+    response = getattr(client_for(CrawlerServiceError(404, 'Crawl job abc not found')), method)(path)
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'Crawl job abc not found'}
+
+    response = getattr(client_for(ConnectionResetError('socket closed')), method)(path)
+    assert response.status_code == 500
+    assert 'socket closed' in response.json()['detail']
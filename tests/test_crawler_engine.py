@@ -0,0 +1,198 @@
+import asyncio
+import socket
+
+import pytest
+from aiohttp import web
+
+import crawler_engine
+from crawler_engine import CrawlTarget, EnhancedCrawler
+from crawl_metrics import CrawlMetrics
+from database import Database
+
+
+PAGE = (
+    '<html><body>'
+    '<h3 class="business-name" data-biz-name="Pool Test Traders">Pool Test Traders</h3>'
+    '<a href="/next">Next</a>'
+    '</body></html>'
+)
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # The page archive is written to the working directory
+    monkeypatch.chdir(tmp_path)
+    return Database(str(tmp_path / 'crawl.db'))
+
+
+async def crawl_local_pages(db, routes, paths=('/',), metrics=None, port=0, **target_options):
+    """Serve routes on localhost and crawl the given paths in turn"""
+    async def robots(request):
+        return web.Response(text='User-agent: *\nAllow: /\n')
+
+    app = web.Application()
+    app.router.add_get('/robots.txt', robots)
+    for route, handler in routes.items():
+        app.router.add_get(route, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        target = CrawlTarget(name='local', start_urls=[f'http://127.0.0.1:{port}/'],
+                             allowed_domains=['127.0.0.1'], delay_range=(0, 0), **target_options)
+        outcomes = []
+        async with EnhancedCrawler(db, metrics=metrics) as crawler:
+            for path in paths:
+                outcomes.append(await crawler.crawl_url(target, f'http://127.0.0.1:{port}{path}'))
+                await crawler.sink.flush()
+        return outcomes
+    finally:
+        await runner.cleanup()
+
+
+def test_page_is_extracted_in_worker_process(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 1)
+    monkeypatch.setattr(crawler_engine, 'extraction_pool', None)
+
+    async def page(request):
+        return web.Response(text=PAGE, content_type='text/html')
+
+    try:
+        outcome, = asyncio.run(crawl_local_pages(db, {'/': page}))
+        assert crawler_engine.extraction_pool is not None
+    finally:
+        crawler_engine.shutdown_extraction_pool(wait=True)
+    assert outcome.fetched and outcome.businesses == 1
+    assert any(link.endswith('/next') for link in outcome.links)
+    assert [b['name'] for b in db.get_businesses()] == ['Pool Test Traders']
+
+
+def test_extraction_runs_in_threads_without_workers(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+
+    async def page(request):
+        return web.Response(text=PAGE, content_type='text/html')
+
+    outcome, = asyncio.run(crawl_local_pages(db, {'/': page}))
+    assert crawler_engine.get_extraction_pool() is None
+    assert outcome.businesses == 1
+
+
+def test_unchanged_page_is_revalidated_and_skipped(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    validators = []
+
+    async def page(request):
+        validators.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.Response(text=PAGE, content_type='text/html', headers={'ETag': '"v1"'})
+
+    first, second = asyncio.run(crawl_local_pages(db, {'/': page}, paths=('/', '/')))
+    assert validators == [None, '"v1"']
+    assert first.businesses == 1 and not first.skipped
+    assert second.fetched and second.skipped and second.businesses == 0
+    assert second.links == first.links
+
+
+def test_same_content_is_skipped_when_validators_are_ignored(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+
+    async def page(request):
+        return web.Response(text=PAGE, content_type='text/html')
+
+    first, second = asyncio.run(crawl_local_pages(db, {'/': page}, paths=('/', '/')))
+    assert not first.skipped and second.skipped
+    assert second.links == first.links
+    assert [b['name'] for b in db.get_businesses()] == ['Pool Test Traders']
+
+
+def test_changed_page_is_extracted_again(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    versions = iter([PAGE, PAGE.replace('Pool Test', 'Changed')])
+
+    async def page(request):
+        return web.Response(text=next(versions), content_type='text/html')
+
+    first, second = asyncio.run(crawl_local_pages(db, {'/': page}, paths=('/', '/')))
+    assert not second.skipped and second.businesses == 1
+    assert sorted(b['name'] for b in db.get_businesses()) == ['Changed Traders', 'Pool Test Traders']
+
+
+def test_fetch_state_round_trips(db):
+    db.save_fetch_state({'url': 'https://example.com/', 'target_name': 'site', 'etag': '"a"',
+                         'content_hash': 'abc', 'last_status': 200, 'links': ['https://example.com/x']})
+    state = db.get_fetch_state('https://example.com/')
+    assert state['etag'] == '"a"' and state['last_modified'] is None
+    assert state['links'] == ['https://example.com/x']
+    assert db.get_fetch_state('https://example.com/missing') is None
+
+
+def test_non_html_and_oversized_bodies_are_not_downloaded(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    metrics = CrawlMetrics()
+
+    async def pdf(request):
+        return web.Response(body=b'%PDF-1.4', content_type='application/pdf')
+
+    async def declared_large(request):
+        return web.Response(text=PAGE + ' ' * 5000, content_type='text/html')
+
+    async def streamed_large(request):
+        # Chunked, so the size is only found out while reading
+        response = web.StreamResponse(headers={'Content-Type': 'text/html'})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for _ in range(10):
+            await response.write(b'<p>' + b'x' * 1000 + b'</p>')
+        await response.write_eof()
+        return response
+
+    routes = {'/doc.pdf': pdf, '/large': declared_large, '/streamed': streamed_large}
+    outcomes = asyncio.run(crawl_local_pages(db, routes, paths=list(routes), metrics=metrics,
+                                             max_page_bytes=4096))
+    assert not any(outcome.fetched for outcome in outcomes)
+    assert metrics.snapshot()['aborted_responses'] == {'not_html': 1, 'too_large': 2}
+
+
+def test_body_is_decoded_with_the_declared_charset(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    page_text = PAGE.replace('Pool Test', 'Café Zanzibar').replace(
+        '<html>', '<html><head><meta charset="windows-1252"></head>')
+
+    async def page(request):
+        return web.Response(body=page_text.encode('cp1252'), headers={'Content-Type': 'text/html'})
+
+    outcome, = asyncio.run(crawl_local_pages(db, {'/': page}))
+    assert outcome.businesses == 1
+    assert [b['name'] for b in db.get_businesses()] == ['Café Zanzibar Traders']
+
+
+def test_page_extracted_without_demoted_selectors_is_not_skipped_later(db, monkeypatch):
+    monkeypatch.setattr(crawler_engine, 'EXTRACTION_WORKERS', 0)
+    selectors = ['.business-name', '.late-listing']
+    db.save_selector_stats('local', {'.late-listing': {'pages': 50, 'misses': 50, 'demoted': True}})
+    late_page = '<html><body><h3 class="late-listing">Late Listing Traders</h3></body></html>'
+
+    async def page(request):
+        return web.Response(text=late_page, content_type='text/html', headers={'ETag': '"v1"'})
+
+    # Both crawls serve the site on the same port, so they fetch the same URL
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    url = f'http://127.0.0.1:{port}/'
+
+    first, = asyncio.run(crawl_local_pages(db, {'/': page}, port=port, business_selectors=selectors))
+    assert first.businesses == 0
+    state = db.get_fetch_state(url)
+    assert state['content_hash'] is None and state['etag'] is None
+
+    # The selector starts matching again (a probe page restored it)
+    db.save_selector_stats('local', {'.late-listing': {'pages': 51, 'hits': 1}})
+    second, = asyncio.run(crawl_local_pages(db, {'/': page}, port=port, business_selectors=selectors))
+    assert not second.skipped and second.businesses == 1
+    assert [b['name'] for b in db.get_businesses()] == ['Late Listing Traders']
+    assert db.get_fetch_state(url)['content_hash']
@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from crawler_engine import CrawlerScheduler, CrawlResult, CrawlTarget
+from database import Database
+
+
+def make_target(name, next_crawl=None, **kwargs):
+    return CrawlTarget(name=name, start_urls=[f'https://{name}.example/'],
+                       allowed_domains=[f'{name}.example'], next_crawl=next_crawl, **kwargs)
+
+
+class FakeCrawlScheduler(CrawlerScheduler):
+    """Scheduler whose crawls just sleep, recording how many overlap"""
+
+    def __init__(self, database, **kwargs):
+        super().__init__(database, **kwargs)
+        self.crawled = []
+        self.active = 0
+        self.peak = 0
+
+    async def run_single_crawl(self, target_name, on_progress=None):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        self.crawled.append(target_name)
+        target = self.get_target(target_name)
+        target.last_crawl = datetime.now()
+        target.next_crawl = target.last_crawl + timedelta(hours=target.crawl_interval_hours)
+        return CrawlResult(target_name, target.last_crawl, target.last_crawl, 0, 0, [], True)
+
+
+@pytest.fixture
+def scheduler(tmp_path):
+    scheduler = FakeCrawlScheduler(Database(str(tmp_path / 'crawl.db')), max_concurrent_crawls=2)
+    scheduler.targets = []
+    return scheduler
+
+
+def test_due_targets_pop_in_time_order(scheduler):
+    now = datetime.now()
+    scheduler.targets = [
+        make_target('later', now - timedelta(minutes=1)),
+        make_target('future', now + timedelta(hours=1)),
+        make_target('first', now - timedelta(hours=1)),
+        make_target('never'),
+    ]
+    scheduler.rebuild_heap()
+    assert [t.name for t in scheduler.pop_due_targets(2)] == ['never', 'first']
+    assert [t.name for t in scheduler.pop_due_targets(5)] == ['later']
+    assert 3500 < scheduler.seconds_until_next(busy=0) <= 3600
+
+
+def test_stale_paused_and_running_entries_are_skipped(scheduler):
+    moved, paused, running = make_target('moved'), make_target('paused'), make_target('running')
+    scheduler.targets = [moved, paused, running]
+    scheduler.rebuild_heap()
+    moved.next_crawl = datetime.now() + timedelta(hours=2)
+    scheduler.schedule(moved)
+    paused.active = False
+    scheduler.running_targets.add('running')
+    assert scheduler.pop_due_targets(5) == []
+    # Only the rescheduled entry is left, for later
+    assert [name for _, _, name in scheduler.heap] == ['moved']
+
+
+def test_sleeps_until_woken_when_busy(scheduler):
+    scheduler.targets = [make_target('a')]
+    scheduler.rebuild_heap()
+    assert scheduler.seconds_until_next(busy=2) is None
+    assert scheduler.seconds_until_next(busy=0) == 0.0
+
+
+def test_loop_runs_targets_concurrently_within_budget(scheduler):
+    scheduler.targets = [make_target(name) for name in 'abcde']
+
+    async def run():
+        scheduler.running = True
+        loop_task = asyncio.create_task(scheduler.scheduler_loop())
+        for _ in range(100):
+            if len(scheduler.crawled) == 5:
+                break
+            await asyncio.sleep(0.02)
+        scheduler.running = False
+        scheduler.notify()
+        await loop_task
+
+    asyncio.run(run())
+    assert sorted(scheduler.crawled) == list('abcde')
+    assert scheduler.peak == 2
+    assert scheduler.running_targets == set()
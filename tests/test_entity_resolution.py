@@ -0,0 +1,56 @@
+from entity_resolution import EntityIndex, jaccard, minhash, normalize_name, normalize_region, trigrams
+
+
+def test_normalize_name_drops_legal_forms_and_accents():
+    assert normalize_name('The Café Moshi Co. Ltd') == 'cafe moshi'
+    assert normalize_name(None) == ''
+
+
+def test_normalize_region_maps_aliases_and_free_text():
+    assert normalize_region('DSM') == 'dar es salaam'
+    assert normalize_region('Kariakoo, Dar es Salaam, Tanzania') == 'dar es salaam'
+    assert normalize_region('Mkoa wa Mwanza') == 'mwanza'
+    assert normalize_region('Nowhere Region') == 'nowhere'
+
+
+def test_minhash_agrees_with_jaccard_on_identical_sets():
+    grams = trigrams('kilimanjaro coffee')
+    assert minhash(grams) == minhash(set(grams))
+    assert jaccard(grams, grams) == 1.0
+    assert jaccard(grams, set()) == 0.0
+
+
+def records():
+    return [
+        {'id': '1', 'name': 'Kilimanjaro Coffee House Ltd', 'region': 'Kilimanjaro', 'bi_id': 'BI-1'},
+        {'id': '2', 'name': 'Mwanza Fish Traders', 'region': 'Mwanza', 'bi_id': 'BI-2'},
+        {'id': '3', 'name': 'Shop 1', 'region': 'Arusha', 'bi_id': 'BI-3'},
+    ]
+
+
+def build_index():
+    index = EntityIndex()
+    for record in records():
+        index.add(record)
+    return index
+
+
+def test_exact_match_ignores_legal_form_and_case():
+    index = build_index()
+    assert len(index) == 3
+    assert index.match('KILIMANJARO COFFEE HOUSE', 'Kilimanjaro')['id'] == '1'
+    assert 'BI-2' in index.bi_ids
+
+
+def test_fuzzy_match_through_lsh():
+    index = build_index()
+    assert index.match('Kilimanjaro Cofee House', 'Kilimanjaro')['id'] == '1'
+    assert index.match('Mwanza Fish Trader', None)['id'] == '2'
+
+
+def test_different_numbers_or_regions_do_not_match():
+    index = build_index()
+    assert index.match('Shop 11', 'Arusha') is None
+    assert index.match('Mwanza Fish Traders Co', 'Dodoma') is None
+    assert index.match('Completely Different Name', 'Mwanza') is None
+    assert index.match('', 'Mwanza') is None
@@ -0,0 +1,45 @@
+import pytest
+
+from database import Database
+from entity_resolution import normalize_region
+from gazetteer import PLACES, REGION_ALIASES, REGIONS, geocode, region_area
+
+
+def test_geocode_regions_and_aliases():
+    location = geocode('Arusha Region')
+    assert location.region == 'Arusha'
+    assert location.precision == 'region'
+    assert (location.latitude, location.longitude) == REGIONS['Arusha'][:2]
+    assert geocode('DSM').region == 'Dar es Salaam'
+    assert geocode('Dar-es-Salaam,').region == 'Dar es Salaam'
+    assert geocode('Pemba North').region == 'Kaskazini Pemba'
+
+
+def test_district_beats_region():
+    location = geocode('Mikocheni, Dar es Salaam')
+    assert location.precision == 'district'
+    assert (location.latitude, location.longitude) == PLACES['Mikocheni'][:2]
+
+
+def test_unknown_places():
+    assert geocode(None) is None
+    assert geocode('Nairobi, Kenya') is None
+
+
+def test_region_area():
+    assert region_area('Dar es Salaam') == REGIONS['Dar es Salaam'][2]
+    assert region_area('Atlantis') is None
+
+
+@pytest.mark.parametrize('text', list(REGIONS) + list(REGION_ALIASES) + ['Kariakoo', 'Stone Town, Zanzibar'])
+def test_dedup_and_geocoding_agree_on_regions(text):
+    assert normalize_region(text) == geocode(text).region.lower()
+
+
+def test_business_location(make_business):
+    exact = make_business(1, region='Arusha', latitude=-3.0, longitude=36.0)
+    assert Database._business_location(exact) == (-3.0, 36.0, 'exact')
+    # Geocoded coordinates follow a region edit
+    moved = make_business(1, region='Mwanza', latitude=-3.3869, longitude=36.6830, location_precision='region')
+    assert Database._business_location(moved) == (*REGIONS['Mwanza'][:2], 'region')
+    assert Database._business_location(make_business(2, region='Atlantis')) == (None, None, None)
@@ -0,0 +1,85 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from geo_index import GeoIndex, decode_geohash, encode_geohash, geohash_cell_size, haversine_km, radius_bbox
+
+
+def test_geohash_known_value():
+    # Reference value from the geohash specification examples
+    assert encode_geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+
+def test_geohash_round_trip():
+    min_lat, min_lng, max_lat, max_lng = decode_geohash(encode_geohash(-6.7924, 39.2083, 6))
+    assert min_lat <= -6.7924 <= max_lat and min_lng <= 39.2083 <= max_lng
+    height, width = geohash_cell_size(6)
+    assert max_lat - min_lat == pytest.approx(height)
+    assert max_lng - min_lng == pytest.approx(width)
+
+
+def test_haversine_and_radius_bbox():
+    # Dar es Salaam to Dodoma is about 400 km
+    assert haversine_km(-6.7924, 39.2083, -6.1630, 35.7516) == pytest.approx(388, abs=10)
+    min_lat, min_lng, max_lat, max_lng = radius_bbox(-6.8, 39.2, 10)
+    assert haversine_km(-6.8, 39.2, max_lat, 39.2) == pytest.approx(10, rel=1e-3)
+    assert haversine_km(-6.8, 39.2, -6.8, max_lng) >= 10
+
+
+def point(lat, lng, group='g'):
+    return SimpleNamespace(lat=lat, lng=lng, group=group)
+
+
+def build(points):
+    index = GeoIndex(lambda item: None if item.lat is None else (item.lat, item.lng), lambda item: item.group)
+    for key, item in points.items():
+        index.update(key, None, item)
+    return index
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(7)
+    return {
+        str(i): point(rng.uniform(-7.2, -6.4), rng.uniform(38.8, 39.6), rng.choice('ab'))
+        for i in range(2000)
+    }
+
+
+@pytest.mark.parametrize('radius_km', [0.5, 3, 25, 200])
+def test_within_radius_matches_brute_force(points, radius_km):
+    index = build(points)
+    found = index.within_radius(-6.8, 39.25, radius_km)
+    expected = sorted(
+        (haversine_km(-6.8, 39.25, item.lat, item.lng), key)
+        for key, item in points.items()
+        if haversine_km(-6.8, 39.25, item.lat, item.lng) <= radius_km
+    )
+    assert found == expected
+
+
+def test_within_bbox_matches_brute_force(points):
+    index = build(points)
+    box = (-6.9, 39.1, -6.7, 39.3)
+    expected = {key for key, item in points.items() if box[0] <= item.lat <= box[2] and box[1] <= item.lng <= box[3]}
+    assert set(index.within_bbox(*box)) == expected
+
+
+def test_updates_move_and_remove_items(points):
+    index = build(points)
+    index.update('0', points['0'], point(-3.38, 36.68, 'c'))
+    index.update('1', points['1'], None)
+    index.update('2', points['2'], point(None, None, 'a'))
+    assert [key for _, key in index.within_radius(-3.38, 36.68, 1)] == ['0']
+    assert '1' not in index.within_bbox(-90, -180, 90, 180)
+    assert index.group_counts['c'] == 1
+    assert sum(index.group_counts.values()) == len(points) - 1
+    assert sum(index.cell_counts(3).values()) == len(points) - 2
+    stats = index.get_stats()
+    assert stats['items'] == len(points) - 1 and stats['located'] == len(points) - 2
+
+
+def test_cell_counts_rejects_unindexed_precision(points):
+    with pytest.raises(ValueError):
+        build(points).cell_counts(9)
@@ -0,0 +1,122 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from market_cube import FORMALITIES, MEASURE, SECTORS, MarketCube
+
+
+def random_businesses(make_business, count=300, seed=3):
+    rng = random.Random(seed)
+    regions = ['Arusha', 'Dar es Salaam', 'Mwanza', 'Kariakoo', 'Atlantis', None]
+    return [
+        make_business(
+            i, region=rng.choice(regions), sector=rng.choice(SECTORS + ('Fishing', None)),
+            formality=rng.choice(FORMALITIES + (None,)), premium=rng.random() < 0.2,
+            claimed=rng.random() < 0.3, digital_score=rng.choice([None, rng.randint(0, 100)])
+        )
+        for i in range(count)
+    ]
+
+
+def build(businesses):
+    cube = MarketCube()
+    for biz in businesses:
+        cube.business_feed.update(biz.id, None, biz)
+    return cube
+
+
+def brute_counts(cube, businesses, dimension, **selected):
+    """Businesses per value of a dimension, counted one business at a time"""
+    counts = np.zeros(len(cube.labels[dimension]))
+    names = ('region', 'sector', 'formality')
+    for biz in businesses:
+        cell = dict(zip(names, cube.cell_of(biz)))
+        if all(value is None or cell[name] == value for name, value in selected.items()):
+            counts[cell[dimension]] += 1
+    return counts
+
+
+def test_businesses_land_in_their_cells(make_business):
+    cube = MarketCube()
+    labels = cube.labels
+    cell = cube.cell_of(make_business(1, region='Kariakoo', sector='retail', formality='semi formal'))
+    assert (labels['region'][cell[0]], labels['sector'][cell[1]], labels['formality'][cell[2]]) == \
+        ('Dar es Salaam', 'Retail', 'Semi-formal')
+    cell = cube.cell_of(make_business(2, region='Atlantis', sector='Fishing'))
+    assert (labels['region'][cell[0]], labels['sector'][cell[1]], labels['formality'][cell[2]]) == \
+        ('Unknown', 'Other', 'Unknown')
+
+
+@pytest.mark.parametrize('dimension', ['region', 'sector', 'formality'])
+def test_rollup_matches_brute_force(make_business, dimension):
+    businesses = random_businesses(make_business)
+    cube = build(businesses)
+    mwanza = cube.position('region', 'Mwanza')
+    retail = cube.position('sector', 'Retail')
+    for selected in ({}, {'region': mwanza}, {'sector': retail}, {'region': mwanza, 'sector': retail}):
+        rolled = cube.rollup(dimension, **selected)[:, MEASURE['businesses']]
+        assert rolled.tolist() == brute_counts(cube, businesses, dimension, **selected).tolist()
+
+
+def test_rollup_filters_on_its_own_dimension(make_business):
+    businesses = [
+        make_business(1, region='Arusha', sector='Retail'),
+        make_business(2, region='Dar es Salaam', sector='Retail'),
+        make_business(3, region='Mwanza', sector='Mining'),
+    ]
+    cube = build(businesses)
+    mwanza = cube.position('region', 'Mwanza')
+    counts = cube.rollup('region', region=mwanza)[:, MEASURE['businesses']]
+    assert counts[mwanza] == 1
+    assert counts.sum() == 1
+    assert cube.totals(region=mwanza)['businesses'] == 1
+
+
+def test_totals_histogram_and_top_members(make_business):
+    businesses = random_businesses(make_business)
+    cube = build(businesses)
+    arusha = cube.position('region', 'Arusha')
+    in_arusha = [b for b in businesses if cube.cell_of(b)[0] == arusha]
+    totals = cube.totals(region=arusha)
+    assert totals['businesses'] == len(in_arusha)
+    assert totals['premium'] == sum(b.premium for b in in_arusha)
+    assert totals['score_sum'] == sum(b.digital_score or 0 for b in in_arusha)
+    scored = [b.digital_score for b in in_arusha if b.digital_score is not None]
+    assert sum(cube.histogram(region=arusha)) == len(scored)
+
+    top = cube.top_members(5, region=arusha)
+    expected = sorted((b.digital_score or 0 for b in in_arusha), reverse=True)[:5]
+    assert [cube.business_measures(biz_id)['score_sum'] for biz_id in top] == expected
+
+
+def test_moves_deletes_and_activity(make_business):
+    cube = MarketCube()
+    biz = make_business(1, region='Arusha', sector='Retail', digital_score=55)
+    cube.business_feed.update('1', None, biz)
+    cube.review_feed.update('1', None, [SimpleNamespace(rating=4), SimpleNamespace(rating=2)])
+    cube.event_feed.update('1', None, [{'action': 'view', 'count': 7}, {'action': 'click', 'count': 2}])
+    arusha, mwanza = cube.position('region', 'Arusha'), cube.position('region', 'Mwanza')
+    assert cube.totals(region=arusha)['rating_sum'] == 6
+    assert cube.totals(region=arusha)['views'] == 7
+
+    moved = make_business(1, region='Mwanza', sector='Retail', digital_score=55)
+    cube.business_feed.update('1', biz, moved)
+    assert cube.totals(region=arusha) == dict.fromkeys(cube.totals(), 0.0)
+    assert cube.totals(region=mwanza)['clicks'] == 2
+
+    cube.event_feed.clear()
+    assert cube.totals()['views'] == 0
+    cube.business_feed.update('1', moved, None)
+    assert cube.totals()['businesses'] == 0
+    assert sum(cube.histogram()) == 0
+    assert cube.get_stats()['businesses'] == 0
+
+
+def test_sector_gaps(make_business):
+    businesses = [make_business(i, region='Dar es Salaam', sector='Retail' if i % 2 else 'Mining') for i in range(20)]
+    businesses += [make_business(100 + i, region='Arusha', sector='Retail') for i in range(10)]
+    cube = build(businesses)
+    gaps = dict(cube.sector_gaps(cube.position('region', 'Arusha')))
+    assert gaps == {'Mining': pytest.approx(10 * 10 / 30)}
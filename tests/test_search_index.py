@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from search_index import SearchIndex
+
+
+NAMES = [
+    'Kilimanjaro Coffee House', 'Kilimanjaro Hardware', 'Coffee Corner', 'Arusha Coffee Traders',
+    'Mwanza Fish Market', 'Café Zanzibar', 'Dodoma Pharmacy', 'Tanga Cement Supplies',
+]
+
+
+def build(make_business, names=NAMES, **fields):
+    index = SearchIndex()
+    for i, name in enumerate(names):
+        index.update(str(i), None, make_business(i, name, **fields))
+    return index
+
+
+def keys(results):
+    return [key for _, key in results]
+
+
+def test_exact_terms_rank_best_match_first(make_business):
+    index = build(make_business)
+    results = index.search('kilimanjaro coffee', 3)
+    assert keys(results)[0] == '0'
+    assert set(keys(results)) <= {'0', '1', '2', '3'}
+    assert results == sorted(results, reverse=True)
+
+
+def test_typos_and_accents_are_tolerated(make_business):
+    index = build(make_business)
+    assert keys(index.search('kilimanjro cofee', 1)) == ['0']
+    assert keys(index.search('cafe zanzibar', 1)) == ['5']
+    assert keys(index.search('pharmasy', 1)) == ['6']
+
+
+def test_no_match_and_empty_queries(make_business):
+    index = build(make_business)
+    assert index.search('xyzzy', 5) == []
+    assert index.search('   ', 5) == []
+    assert index.search('coffee', 0) == []
+
+
+def test_accept_filters_results(make_business):
+    index = build(make_business)
+    assert '0' not in keys(index.search('coffee', 5, accept=lambda key: key != '0'))
+
+
+def test_boosts_break_ties(make_business):
+    index = SearchIndex()
+    index.update('plain', None, make_business('plain', 'Coffee Shop'))
+    index.update('premium', None, make_business('premium', 'Coffee Shop', premium=True))
+    assert keys(index.search('coffee shop', 2)) == ['premium', 'plain']
+
+
+def test_incremental_updates_match_a_fresh_build(make_business):
+    rng = random.Random(11)
+    words = ['coffee', 'house', 'kilimanjaro', 'traders', 'market', 'fish', 'hardware', 'arusha', 'cafe', 'mama']
+    index = SearchIndex()
+    current = {}
+    for step in range(400):
+        key = str(rng.randrange(60))
+        if rng.random() < 0.2:
+            index.update(key, current.pop(key, None), None)
+        else:
+            biz = make_business(key, ' '.join(rng.choices(words, k=rng.randint(1, 4))), premium=rng.random() < 0.2)
+            index.update(key, current.get(key), biz)
+            current[key] = biz
+
+    fresh = SearchIndex()
+    for key, biz in current.items():
+        fresh.update(key, None, biz)
+    assert index.get_stats() == fresh.get_stats()
+    for query in ['coffee', 'kilimanjro house', 'fsh markt', 'mama cafe traders']:
+        expected = fresh.search(query, 10)
+        results = index.search(query, 10)
+        assert keys(results) == keys(expected)
+        assert [score for score, _ in results] == pytest.approx([score for score, _ in expected])
+
+
+def test_partial_words_match_the_words_containing_them(make_business):
+    index = build(make_business, ['Tech Solutions Ltd', 'Biotech Labs', 'Solar Kings', 'Arusha Traders'])
+    assert keys(index.search('sol', 5)) == ['2', '0']
+    assert keys(index.search('olu', 5)) == ['0']
+    # An indexed word still matches the longer words containing it, ranked below itself
+    assert keys(index.search('tech', 5)) == ['0', '1']
+    # Words too short for inner trigrams match the starts of words
+    assert keys(index.search('ar', 5)) == ['3']
+    assert keys(index.search('ab', 5)) == []
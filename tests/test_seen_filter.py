@@ -0,0 +1,78 @@
+import logging
+
+import pytest
+
+from crawl_frontier import BloomFilter
+from crawler_engine import CrawlTarget, EnhancedCrawler
+from database import Database
+
+
+class SeenFilterHost:
+    """Just enough of a crawler to call EnhancedCrawler.load_seen_filter"""
+
+    load_seen_filter = EnhancedCrawler.load_seen_filter
+
+    def __init__(self, db):
+        self.db = db
+        self.logger = logging.getLogger('test')
+
+
+@pytest.fixture
+def host(tmp_path):
+    return SeenFilterHost(Database(str(tmp_path / 'crawl.db')))
+
+
+def incremental_target(**kwargs):
+    return CrawlTarget(name='site', start_urls=['https://example.com/'],
+                       allowed_domains=['example.com'], incremental=True, **kwargs)
+
+
+def test_seen_filter_is_reused_across_runs(host):
+    target = incremental_target()
+    bloom = host.load_seen_filter(target)
+    bloom.add('https://example.com/a')
+    host.db.save_seen_filter(target.name, bloom.to_bytes())
+    assert 'https://example.com/a' in host.load_seen_filter(target)
+
+
+def test_seen_filter_restarts_when_near_capacity(host):
+    target = incremental_target()
+    bloom = BloomFilter(capacity=target.url_filter_capacity())
+    bloom.count = bloom.capacity - target.max_pages + 1
+    bloom.add('https://example.com/a')
+    host.db.save_seen_filter(target.name, bloom.to_bytes())
+    fresh = host.load_seen_filter(target)
+    assert len(fresh) == 0
+    assert host.db.load_seen_filter(target.name) is None
+
+
+def test_seen_filter_restarts_when_max_pages_changes(host):
+    bloom = host.load_seen_filter(incremental_target())
+    bloom.add('https://example.com/a')
+    host.db.save_seen_filter('site', bloom.to_bytes())
+    target = incremental_target(max_pages=1000)
+    fresh = host.load_seen_filter(target)
+    assert fresh.capacity == target.url_filter_capacity()
+    assert 'https://example.com/a' not in fresh
+
+
+def test_seen_filter_expires(host):
+    target = incremental_target(seen_filter_max_age_days=7)
+    bloom = host.load_seen_filter(target)
+    bloom.add('https://example.com/a')
+    host.db.save_seen_filter(target.name, bloom.to_bytes())
+    with host.db.connection() as conn:
+        conn.execute("UPDATE crawl_seen_filters SET created_at = datetime('now', '-8 days')")
+        conn.commit()
+    assert 'https://example.com/a' not in host.load_seen_filter(target)
+
+
+def test_saving_keeps_creation_time(host):
+    host.db.save_seen_filter('site', b'first')
+    with host.db.connection() as conn:
+        conn.execute("UPDATE crawl_seen_filters SET created_at = datetime('now', '-3 days')")
+        conn.commit()
+    host.db.save_seen_filter('site', b'second')
+    data, age_days = host.db.load_seen_filter('site')
+    assert data == b'second'
+    assert 2.9 < age_days < 3.1
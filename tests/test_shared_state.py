@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+
+from database import Database
+from shared_state import IndexFeed, SharedState
+
+
+class RecordingIndex:
+    def __init__(self):
+        self.items = {}
+        self.clears = 0
+
+    def clear(self):
+        self.items = {}
+        self.clears += 1
+
+    def update(self, key, old, new):
+        if new is None:
+            self.items.pop(key, None)
+        else:
+            self.items[key] = new['name']
+
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'state.db'))
+
+
+def worker(db, index=None):
+    """The cache one API worker process would keep"""
+    state = SharedState(db, check_interval=0)
+    state.register('businesses', db.get_businesses, key='id', indexes=[index] if index else [])
+    state.register('reviews', db.get_reviews, key='business_id', grouped=True)
+    return state
+
+
+def test_writes_reach_other_workers(db, make_business):
+    first, second = worker(db), worker(db)
+    assert first.get('businesses') == {}
+    db.add_business(make_business(1, 'Duka la Mama', region='Arusha'))
+    db.add_review(SimpleNamespace(business_id='1', rating=4, comment='Good'))
+    db.add_review(SimpleNamespace(business_id='1', rating=2, comment='Slow'))
+    assert second.get('businesses')['1']['name'] == 'Duka la Mama'
+    assert [review['rating'] for review in second.get('reviews')['1']] == [4, 2]
+    assert first.get('businesses')['1']['region'] == 'Arusha'
+
+
+def test_indexes_follow_updates_and_deletes(db, make_business):
+    index = RecordingIndex()
+    state = worker(db, index)
+    db.add_business(make_business(1, 'One'))
+    db.add_business(make_business(2, 'Two'))
+    state.get('businesses')
+    assert index.items == {'1': 'One', '2': 'Two'}
+
+    db.add_business(make_business(1, 'Uno'))
+    db.delete_business('2')
+    state.get('businesses')
+    assert index.items == {'1': 'Uno'}
+    assert index.clears == 1  # Only the first load rebuilt it
+
+
+def test_reloads_fully_when_the_log_was_pruned(db, make_business):
+    index = RecordingIndex()
+    state = worker(db, index)
+    db.add_business(make_business(1, 'One'))
+    state.get('businesses')
+    db.add_business(make_business(2, 'Two'))
+    db.add_business(make_business(3, 'Three'))
+    with db.connection() as conn:
+        conn.execute('DELETE FROM state_changes WHERE seq < (SELECT MAX(seq) FROM state_changes)')
+        conn.commit()
+    assert set(state.get('businesses')) == {'1', '2', '3'}
+    assert index.clears == 2
+
+
+def test_cached_reads_wait_for_the_check_interval(db, make_business):
+    state = SharedState(db, check_interval=3600)
+    state.register('businesses', db.get_businesses, key='id')
+    state.get('businesses')
+    db.add_business(make_business(1))
+    assert state.get('businesses') == {}
+    state.invalidate()
+    assert set(state.get('businesses')) == {'1'}
+
+
+def test_index_feed_passes_new_values():
+    seen = []
+    feed = IndexFeed(lambda key, value: seen.append((key, value)), lambda: seen.clear())
+    feed.update('1', 'old', 'new')
+    feed.update('2', 'old', None)
+    assert seen == [('1', 'new'), ('2', None)]
+    feed.clear()
+    assert seen == []
+
+
+def test_seed_business_only_fills_an_empty_table(db, make_business):
+    assert db.seed_business(make_business(1, 'Sample Business'))
+    assert not db.seed_business(make_business(2, 'Sample Business'))
+    assert [row['id'] for row in db.get_businesses()] == ['1']
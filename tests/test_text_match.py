@@ -0,0 +1,24 @@
+from entity_resolution import normalize_name
+from text_match import jaccard, normalize_text, tokenize, trigrams
+
+
+def test_tokenize_strips_accents_case_and_punctuation():
+    assert normalize_text('Café') == 'cafe'
+    assert tokenize("Mama's Café & Bar-2") == ['mama', 's', 'cafe', 'bar', '2']
+    assert tokenize(None) == []
+
+
+def test_trigrams_are_padded():
+    assert trigrams('ab') == frozenset({'  a', ' ab', 'ab '})
+
+
+def test_jaccard():
+    a, b = trigrams('coffee'), trigrams('cofee')
+    assert jaccard(a, b) == len(a & b) / len(a | b)
+    assert jaccard(a, a) == 1.0
+    assert jaccard(a, frozenset()) == 0.0
+
+
+def test_search_and_dedup_normalize_names_alike():
+    # Dedup only adds legal-form removal on top of the shared tokenizer
+    assert normalize_name('Café Ltd') == ' '.join(tokenize('Café'))
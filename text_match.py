@@ -0,0 +1,27 @@
+import re
+import unicodedata
+from typing import FrozenSet, List
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase without accents, so 'Café' and 'cafe' compare equal"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free words of letters and digits"""
+    return re.findall(r'[a-z0-9]+', normalize_text(text))
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of a word or phrase, padded so short words still have some"""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)